@@ -1,4 +1,5 @@
 import logging
+import os
 import shutil
 import asyncio
 from pathlib import Path
@@ -12,6 +13,8 @@ from starlette.websockets import WebSocketDisconnect
 from services.stt_service import SpeechToTextService
 from services.tts_service import TextToSpeechService
 from services.llm_service import LLMService
+from services.history import HistoryWindow
+from services.session_store import create_session_store
 from schemas.models import TTSRequest, ChatResponse, UploadResponse
 
 # ---------------------------------------------------
@@ -35,8 +38,11 @@ stt_service = SpeechToTextService()
 tts_service = TextToSpeechService()
 llm_service = LLMService()
 
-# In-memory chat history (for demo)
-chat_history_store = {}
+# Chat history per session id, in memory or in SQLite shared by all workers (SESSION_STORE)
+chat_history_store = create_session_store()
+# History sent with each query is kept under this many (estimated) tokens; older turns are
+# summarized in the background (0: no limit)
+HISTORY_TOKENS = int(os.getenv("HISTORY_TOKENS", "2000"))
 
 # API router for REST endpoints
 api_router = APIRouter(prefix="/api")
@@ -186,17 +192,40 @@ async def chat_with_agent(session_id: str, file: UploadFile = File(...)):
         transcript = await stt_service.transcribe_audio(file_path)
 
         # Manage chat history
-        if session_id not in chat_history_store:
-            chat_history_store[session_id] = []
-        chat_history = chat_history_store[session_id]
-        chat_history.append({"role": "user", "content": transcript})
-
-        # Query LLM with history
-        llm_response = await llm_service.query_llm_with_history(chat_history)
-        chat_history.append({"role": "assistant", "content": llm_response})
-
-        # Limit history to last 10 messages
-        chat_history_store[session_id] = chat_history[-10:]
+        saved = asyncio.Event()
+
+        async def save_summary(batch, summary):
+            # A summary written in the background lands after this turn is stored. The store may
+            # hold newer turns by then, so only the summary and the folded messages change.
+            await saved.wait()
+            await asyncio.to_thread(
+                chat_history_store.update, session_id,
+                lambda state: HistoryWindow.apply_fold(state, batch, summary)
+            )
+
+        chat_history = HistoryWindow(
+            llm_service.summarize, lambda msg: f"{msg['role']}: {msg['content']}", HISTORY_TOKENS,
+            on_fold=save_summary
+        )
+        state, version = await asyncio.to_thread(chat_history_store.load_versioned, session_id)
+        if state:
+            chat_history.restore(state)
+        user_message = {"role": "user", "content": transcript}
+
+        # Query LLM with the summary of older turns and the recent ones
+        summary, messages = chat_history.snapshot
+        llm_response = await llm_service.query_llm_with_history(messages + [user_message], summary)
+        reply = {"role": "assistant", "content": llm_response}
+        chat_history.add(user_message, reply)
+        try:
+            state = chat_history.to_state()
+            # Another request for this session (in any worker) may have saved it while the LLM
+            # answered. Then this turn is appended to what it saved rather than overwriting it.
+            while not await asyncio.to_thread(chat_history_store.save, session_id, state, version):
+                state, version = await asyncio.to_thread(chat_history_store.load_versioned, session_id)
+                state = HistoryWindow.append_turn(state or {}, user_message, reply)
+        finally:
+            saved.set()
 
         # Generate audio
         audio_url = await tts_service.generate_speech(llm_response, voice_id="en-US-ken", style="Conversational")
@@ -231,6 +260,13 @@ async def websocket_endpoint(websocket: WebSocket):
         await websocket.close()
 
 
+@api_router.get("/agent/sessions/stats")
+async def session_stats():
+    """Session store counters (sessions kept, their size, hits and evictions) and Gemini queue waits."""
+    stats = await asyncio.to_thread(chat_history_store.stats)
+    return {**stats, "llm": llm_service.stats()}
+
+
 # ---------------------------------------------------
 # ---------- Health Check ----------
 # ---------------------------------------------------
@@ -246,6 +282,7 @@ async def health_check():
             "/api/tts/echo",
             "/api/llm/query",
             "/agent/chat/{session_id}",
+            "/api/agent/sessions/stats",
             "/ws"
         ]
     }
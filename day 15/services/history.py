@@ -0,0 +1,157 @@
+# services/history.py
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Gemini averages roughly four characters per token for English text."""
+    return max(1, len(text) // 4)
+
+
+class HistoryWindow:
+    """
+    A chat history kept under a token budget, with older turns folded into a running summary.
+
+    Messages are added in (user, reply) pairs. When the summary plus the kept messages go over
+    `token_budget`, the oldest pairs age out of the window and are handed to
+    `summarize(summary, lines)`, which returns the new summary. That runs in a background task,
+    so no turn waits for it; until it finishes, the aged messages are still part of `snapshot`,
+    so nothing is forgotten in between (the prompt can run over the budget by the turns that age
+    out while a summary is being written). If summarizing fails the aged messages are dropped, the
+    way a plain cut-off would.
+
+    `snapshot` is a (summary, messages) tuple replaced as a whole on every change, so a worker
+    thread building a request always sees a consistent pair. A budget of 0 keeps everything.
+    """
+
+    def __init__(
+            self,
+            summarize: Callable[[str, List[str]], Awaitable[str]],
+            render: Callable[[Any], str],
+            token_budget: int,
+            on_fold: Optional[Callable[[List[Any], str], Awaitable[None]]] = None,
+    ):
+        self.summarize = summarize
+        self.render = render
+        self.token_budget = token_budget
+        self.on_fold = on_fold
+        self.summary = ""
+        self._messages: List[Tuple[Any, int]] = []
+        self._aging: List[Any] = []
+        self._fold_task: Optional[asyncio.Task] = None
+        self.snapshot: Tuple[str, List[Any]] = ("", [])
+
+        self.messages_added = 0
+        self.folded = 0
+        self.summaries = 0
+        self.failures = 0
+
+    @property
+    def summary_tokens(self) -> int:
+        return estimate_tokens(self.summary) if self.summary else 0
+
+    @property
+    def tokens(self) -> int:
+        """Estimated tokens in the summary and the kept messages."""
+        return self.summary_tokens + sum(tokens for _, tokens in self._messages)
+
+    def add(self, user_message: Any, reply: Any):
+        """Appends one exchange; called on the event loop."""
+        for message in (user_message, reply):
+            self._messages.append((message, estimate_tokens(self.render(message))))
+        self.messages_added += 2
+
+        if self.token_budget:
+            # Always keep the latest exchange, whatever its size
+            while self.tokens > self.token_budget and len(self._messages) > 2:
+                self._aging.extend(message for message, _ in self._messages[:2])
+                del self._messages[:2]
+            if self._aging and (self._fold_task is None or self._fold_task.done()):
+                self._fold_task = asyncio.get_running_loop().create_task(self._fold())
+        self._publish()
+
+    def to_state(self) -> Dict[str, Any]:
+        """The window as plain data, for a session store."""
+        return {
+            "summary": self.summary,
+            "messages": [message for message, _ in self._messages],
+            "aging": list(self._aging),
+        }
+
+    def restore(self, state: Dict[str, Any]):
+        """Loads a state saved with `to_state()`; aged messages are folded on the next `add()`."""
+        self.summary = state.get("summary", "")
+        self._messages = [(message, estimate_tokens(self.render(message))) for message in state.get("messages", [])]
+        self._aging = list(state.get("aging", []))
+        self._publish()
+
+    @staticmethod
+    def append_turn(state: Dict[str, Any], user_message: Any, reply: Any) -> Dict[str, Any]:
+        """
+        Adds one exchange to a stored state that other requests have changed since it was loaded.
+        Nothing ages out here; the next `add()` after a `restore()` brings it back under budget.
+        """
+        state.setdefault("summary", "")
+        state.setdefault("aging", [])
+        state["messages"] = state.get("messages", []) + [user_message, reply]
+        return state
+
+    @staticmethod
+    def apply_fold(state: Dict[str, Any], batch: List[Any], summary: str) -> Dict[str, Any]:
+        """
+        Applies a finished fold to a stored state that may have moved on since it was loaded.
+
+        The batch is dropped by position: messages that aged out later follow it in `aging`, even
+        when they repeat an earlier message word for word. If the stored state no longer starts
+        with the batch, another request has folded it already and the state is left as it is.
+        """
+        aging = state.get("aging", [])
+        if aging[:len(batch)] != batch:
+            logger.info(f"Skipping a fold of {len(batch)} messages that the stored history no longer has")
+            return state
+        state["summary"] = summary
+        state["aging"] = aging[len(batch):]
+        return state
+
+    def close(self):
+        if self._fold_task is not None:
+            self._fold_task.cancel()
+
+    def _publish(self):
+        self.snapshot = (self.summary, self._aging + [message for message, _ in self._messages])
+
+    async def _fold(self):
+        # Pairs that age out while a summary is being written are folded in the next round
+        while self._aging:
+            batch = list(self._aging)
+            try:
+                summary = await self.summarize(self.summary, [self.render(message) for message in batch])
+                self.summary = summary.strip()
+                self.summaries += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                logger.warning(f"Could not summarize {len(batch)} old messages, dropping them: {e}")
+            del self._aging[:len(batch)]
+            self.folded += len(batch)
+            self._publish()
+            if self.on_fold is not None:
+                try:
+                    await self.on_fold(batch, self.summary)
+                except Exception as e:
+                    logger.warning(f"Could not save the conversation summary: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "messages": len(self._messages),
+            "aging": len(self._aging),
+            "tokens": self.tokens,
+            "summary_tokens": self.summary_tokens,
+            "folded": self.folded,
+            "summaries": self.summaries,
+            "failures": self.failures,
+        }
@@ -1,29 +1,137 @@
 import logging
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 import google.generativeai as genai
+from google.ai import generativelanguage as glm
 from dotenv import load_dotenv
 import os
 import requests
 
 # Configure logging
-logger = logging.getLogger(_name_)
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 
+# Gemini's client is blocking; calls run on a bounded pool so the event loop keeps serving requests
+LLM_WORKERS = int(os.getenv("LLM_WORKERS", "8"))
+_executor = ThreadPoolExecutor(max_workers=LLM_WORKERS, thread_name_prefix="llm")
+# Calls that wait longer than this for a free worker are logged; every wait shows up in stats()
+LLM_SLOW_WAIT_MS = float(os.getenv("LLM_SLOW_WAIT_MS", "100"))
+# Length limit for the running summary of older chat turns
+SUMMARY_WORDS = int(os.getenv("SUMMARY_WORDS", "150"))
+
+# GenerativeModel objects reused across requests, least recently used first. Keyed by
+# (model name, system instruction, API key) and bound to that key's client, so keys never mix.
+MAX_MODELS = 16
+_models = OrderedDict()
+# Gemini clients, one per API key
+MAX_CLIENTS = 8
+_clients = OrderedDict()
+_models_lock = threading.Lock()
+
+
+def get_model(api_key: str, model_name: str = "gemini-1.5-flash", system_instruction: str = None):
+    """Returns the shared model for this name, instruction and key, building it on first use."""
+    key = (model_name, system_instruction, api_key)
+    with _models_lock:
+        model = _models.get(key)
+        if model is not None:
+            _models.move_to_end(key)
+            return model
+
+        model = genai.GenerativeModel(model_name, system_instruction=system_instruction)
+        if api_key:
+            _bind_client(model, _get_client(api_key))
+        _models[key] = model
+        if len(_models) > MAX_MODELS:
+            _models.popitem(last=False)
+        return model
+
+
+def _bind_client(model, client):
+    # The SDK has no public way to give a model its own client; the pinned version reads `_client`.
+    # Fail loudly on a version without it rather than quietly using the process-wide key.
+    if getattr(model, "_client", False) is not None:
+        raise RuntimeError(
+            f"google-generativeai {genai.__version__} can't be bound to a per-key client; "
+            "install the pinned version"
+        )
+    model._client = client
+
+
+def _get_client(api_key: str):
+    # Caller holds _models_lock
+    client = _clients.get(api_key)
+    if client is not None:
+        _clients.move_to_end(api_key)
+        return client
+    client = _clients[api_key] = glm.GenerativeServiceClient(client_options={"api_key": api_key})
+    if len(_clients) > MAX_CLIENTS:
+        # Models still holding the evicted client keep working until they are evicted too
+        _clients.popitem(last=False)
+    return client
+
+
 class LLMService:
-    def _init_(self):
+    def __init__(self):
         self.api_key = os.getenv("GEMINI_API_KEY")
         if not self.api_key:
             logger.warning("GEMINI_API_KEY not found in .env file.")
         genai.configure(api_key=self.api_key)
+        # Queue waits of the last 1000 calls, in ms
+        self._waits = deque(maxlen=1000)
+        self._waits_lock = threading.Lock()
+        self.calls = 0
+        self.slow_calls = 0
+
+    async def _generate(self, prompt: str):
+        """Runs `generate_content` on the LLM pool, recording how long it waited for a worker."""
+        queued_at = time.perf_counter()
+
+        def call():
+            # Measured per call: sessions share the service, so there is no single "last" wait
+            queue_wait_ms = 1000 * (time.perf_counter() - queued_at)
+            slow = queue_wait_ms > LLM_SLOW_WAIT_MS
+            with self._waits_lock:
+                self._waits.append(queue_wait_ms)
+                self.calls += 1
+                self.slow_calls += slow
+            if slow:
+                logger.info(f"Gemini call waited {queue_wait_ms:.0f} ms for a free worker")
+            return get_model(self.api_key).generate_content(prompt)
+
+        return await asyncio.get_running_loop().run_in_executor(_executor, call)
+
+    def stats(self) -> dict:
+        """How long recent Gemini calls waited for a free worker; high waits mean LLM_WORKERS is too low."""
+        with self._waits_lock:
+            waits = sorted(self._waits)
+            calls, slow_calls = self.calls, self.slow_calls
+
+        def percentile(fraction: float) -> float:
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(fraction * len(waits)))], 1)
+
+        return {
+            "workers": LLM_WORKERS,
+            "calls": calls,
+            "slow_calls": slow_calls,
+            "queue_wait_p50_ms": percentile(0.5),
+            "queue_wait_p95_ms": percentile(0.95),
+            "queue_wait_max_ms": percentile(1.0),
+        }
 
     async def query_llm(self, text: str) -> str:
         """Query Gemini LLM with a single text input."""
         if not self.api_key:
             raise ValueError("Gemini API key is missing.")
         try:
-            model = genai.GenerativeModel("gemini-1.5-flash")
-            response = model.generate_content(text)
+            response = await self._generate(text)
             if not response.text:
                 raise ValueError("No response from Gemini LLM.")
             return response.text
@@ -37,15 +145,16 @@ class LLMService:
             logger.error(f"Unexpected LLM error: {str(e)}")
             raise
 
-    async def query_llm_with_history(self, chat_history: list) -> str:
-        """Query Gemini LLM with chat history."""
+    async def query_llm_with_history(self, chat_history: list, summary: str = "") -> str:
+        """Query Gemini LLM with chat history, preceded by a summary of older turns if there is one."""
         if not self.api_key:
             raise ValueError("Gemini API key is missing.")
         try:
             messages = [{"role": "system", "content": "You are a helpful AI assistant."}]
+            if summary:
+                messages.append({"role": "system", "content": f"Summary of the earlier conversation: {summary}"})
             messages.extend(chat_history)
-            model = genai.GenerativeModel("gemini-1.5-flash")
-            response = model.generate_content("\n".join([f"{msg['role']}: {msg['content']}" for msg in messages]))
+            response = await self._generate("\n".join([f"{msg['role']}: {msg['content']}" for msg in messages]))
             if not response.text:
                 raise ValueError("No response from Gemini LLM.")
             return response.text
@@ -57,4 +166,14 @@ class LLMService:
             raise
         except Exception as e:
             logger.error(f"Unexpected LLM error: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    async def summarize(self, summary: str, lines: list) -> str:
+        """Folds older chat lines into the running summary of the conversation."""
+        prompt = (
+            "Merge the new messages into the notes about this conversation. Keep names, facts and "
+            f"open questions; drop small talk. At most {SUMMARY_WORDS} words.\n\n"
+            f"Notes so far:\n{summary or '(none)'}\n\nNew messages:\n" + "\n".join(lines)
+        )
+        response = await self._generate(prompt)
+        return response.text
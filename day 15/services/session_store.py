@@ -0,0 +1,324 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Which store keeps chat sessions: "memory" (one process) or "sqlite" (shared by all workers on the host)
+SESSION_STORE = os.getenv("SESSION_STORE", "memory").lower()
+# Sessions untouched for this long are dropped
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+# Most sessions kept; beyond it the least recently saved ones are evicted
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", "1000"))
+# Memory store limit on the total size of the sessions' JSON state
+SESSION_MAX_MB = float(os.getenv("SESSION_MAX_MB", "50"))
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", str(Path(__file__).resolve().parent.parent / "sessions.db"))
+
+
+class SessionStore(ABC):
+    """
+    Keeps each chat session's state (a JSON-serializable dict) by session id.
+
+    Implementations are thread-safe. `update()` is an atomic read-modify-write, so a change made
+    in the background (e.g. a finished summary) doesn't overwrite a turn saved in the meantime.
+
+    Every write gives the session a new version. A request that loads a session, awaits the LLM
+    and then saves it passes the version it loaded to `save()`, which refuses to write if another
+    request (in any worker) has saved the session since.
+    """
+
+    def load(self, session_id: str) -> Optional[dict]:
+        """Returns the session's state, or None if it doesn't exist or has expired."""
+        return self.load_versioned(session_id)[0]
+
+    @abstractmethod
+    def load_versioned(self, session_id: str) -> Tuple[Optional[dict], int]:
+        """Returns the session's state and version; (None, 0) if it doesn't exist or has expired."""
+
+    @abstractmethod
+    def save(self, session_id: str, state: dict, expected_version: Optional[int] = None) -> bool:
+        """
+        Stores the session's state, replacing the previous one. With `expected_version`, only
+        does so if the session is still at that version (0: doesn't exist); returns whether it did.
+        """
+
+    @abstractmethod
+    def update(self, session_id: str, change: Callable[[dict], dict]):
+        """Replaces the stored state with `change(state)`; does nothing if the session is gone."""
+
+    @abstractmethod
+    def delete(self, session_id: str):
+        """Forgets the session."""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, float]:
+        """Counters for monitoring: sessions, size, hits and evictions."""
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Sessions inside this process, kept as JSON text, least recently used first.
+
+    A session expires `ttl_seconds` after it was last used. Beyond `max_sessions` sessions or
+    `max_bytes` of JSON, the least recently used ones are evicted.
+    """
+
+    def __init__(self, ttl_seconds: float, max_sessions: int, max_bytes: int):
+        self.ttl = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        # session id -> (last used, JSON state, version)
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        # Versions come from one counter, so a session evicted and created again never reuses one
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evicted_ttl = 0
+        self.evicted_count = 0
+        self.evicted_memory = 0
+
+    def load_versioned(self, session_id: str) -> Tuple[Optional[dict], int]:
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                self.misses += 1
+                return None, 0
+            self.hits += 1
+            self._sessions[session_id] = (now,) + entry[1:]
+            self._sessions.move_to_end(session_id)
+        return json.loads(entry[1]), entry[2]
+
+    def save(self, session_id: str, state: dict, expected_version: Optional[int] = None) -> bool:
+        raw = json.dumps(state)
+        with self._lock:
+            if expected_version is not None:
+                self._expire(time.monotonic())
+                entry = self._sessions.get(session_id)
+                if (entry[2] if entry is not None else 0) != expected_version:
+                    return False
+            self._store(session_id, raw)
+        return True
+
+    def update(self, session_id: str, change: Callable[[dict], dict]):
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                self._store(session_id, json.dumps(change(json.loads(entry[1]))))
+
+    def delete(self, session_id: str):
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+            if entry is not None:
+                self._bytes -= len(entry[1])
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self._sessions),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evicted_ttl": self.evicted_ttl,
+                "evicted_count": self.evicted_count,
+                "evicted_memory": self.evicted_memory,
+            }
+
+    # --- caller holds the lock ---
+    def _store(self, session_id: str, raw: str):
+        previous = self._sessions.pop(session_id, None)
+        if previous is not None:
+            self._bytes -= len(previous[1])
+        now = time.monotonic()
+        self._writes += 1
+        self._sessions[session_id] = (now, raw, self._writes)
+        self._bytes += len(raw)
+        self._expire(now)
+        while len(self._sessions) > self.max_sessions:
+            self._evict_oldest()
+            self.evicted_count += 1
+        # The session just written stays even if it alone is over the ceiling
+        while self._bytes > self.max_bytes and len(self._sessions) > 1:
+            self._evict_oldest()
+            self.evicted_memory += 1
+
+    def _expire(self, now: float):
+        # Least recently used first, so expired sessions are all at the front
+        while self._sessions:
+            last_used = next(iter(self._sessions.values()))[0]
+            if now - last_used <= self.ttl:
+                break
+            self._evict_oldest()
+            self.evicted_ttl += 1
+
+    def _evict_oldest(self):
+        _, (_, raw, _) = self._sessions.popitem(last=False)
+        self._bytes -= len(raw)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessions in a SQLite file, so every uvicorn worker on the host serves the same sessions.
+
+    WAL mode lets workers read while another one writes. Sessions expire `ttl_seconds` after
+    their last save; expired rows are deleted at most once a minute, on save. Beyond
+    `max_sessions` rows, the least recently saved ones are deleted on every save.
+    """
+
+    SWEEP_INTERVAL = 60
+
+    def __init__(self, path: str, ttl_seconds: float, max_sessions: int):
+        self.path = path
+        self.ttl = ttl_seconds
+        self.max_sessions = max_sessions
+        self._local = threading.local()
+        self._last_sweep = 0.0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evicted_ttl = 0
+        self.evicted_count = 0
+
+        db = self._connection()
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, state TEXT NOT NULL, updated REAL NOT NULL, version INTEGER NOT NULL DEFAULT 1)"
+        )
+        # Files created before sessions were versioned
+        if "version" not in [column[1] for column in db.execute("PRAGMA table_info(sessions)")]:
+            db.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+        db.execute("CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared between threads, so each thread opens its own
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def load_versioned(self, session_id: str) -> Tuple[Optional[dict], int]:
+        row = self._connection().execute(
+            "SELECT state, version FROM sessions WHERE id = ? AND updated >= ?", (session_id, time.time() - self.ttl)
+        ).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None, 0
+            self.hits += 1
+        return json.loads(row[0]), row[1]
+
+    def save(self, session_id: str, state: dict, expected_version: Optional[int] = None) -> bool:
+        now = time.time()
+        raw = json.dumps(state)
+        db = self._connection()
+        if expected_version is None:
+            db.execute(
+                "INSERT INTO sessions (id, state, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET state = excluded.state, updated = excluded.updated, "
+                "version = version + 1",
+                (session_id, raw, now),
+            )
+        elif expected_version == 0:
+            # An expired row that hasn't been swept yet counts as no session
+            written = db.execute(
+                "INSERT INTO sessions (id, state, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET state = excluded.state, updated = excluded.updated, "
+                "version = version + 1 WHERE updated < ?",
+                (session_id, raw, now, now - self.ttl),
+            ).rowcount
+            if not written:
+                return False
+        else:
+            # Compare-and-set: the version check and the write are one statement
+            written = db.execute(
+                "UPDATE sessions SET state = ?, updated = ?, version = version + 1 "
+                "WHERE id = ? AND version = ? AND updated >= ?",
+                (raw, now, session_id, expected_version, now - self.ttl),
+            ).rowcount
+            if not written:
+                return False
+        self._evict_over_count()
+        self._sweep()
+        return True
+
+    def update(self, session_id: str, change: Callable[[dict], dict]):
+        db = self._connection()
+        # IMMEDIATE takes the write lock up front, so no other worker saves in between
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT state FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is not None:
+                db.execute(
+                    "UPDATE sessions SET state = ?, updated = ?, version = version + 1 WHERE id = ?",
+                    (json.dumps(change(json.loads(row[0]))), time.time(), session_id),
+                )
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+
+    def delete(self, session_id: str):
+        self._connection().execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def _evict_over_count(self):
+        # Everything past the newest max_sessions rows, found through the index on updated
+        deleted = self._connection().execute(
+            "DELETE FROM sessions WHERE id IN (SELECT id FROM sessions ORDER BY updated DESC LIMIT -1 OFFSET ?)",
+            (self.max_sessions,),
+        ).rowcount
+        if deleted:
+            with self._lock:
+                self.evicted_count += deleted
+
+    def _sweep(self):
+        now = time.time()
+        with self._lock:
+            if now - self._last_sweep < self.SWEEP_INTERVAL:
+                return
+            self._last_sweep = now
+        deleted = self._connection().execute("DELETE FROM sessions WHERE updated < ?", (now - self.ttl,)).rowcount
+        with self._lock:
+            self.evicted_ttl += deleted
+
+    def stats(self) -> Dict[str, float]:
+        sessions, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(state)), 0) FROM sessions"
+        ).fetchone()
+        with self._lock:
+            return {
+                "backend": "sqlite",
+                "sessions": sessions,
+                "bytes": size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evicted_ttl": self.evicted_ttl,
+                "evicted_count": self.evicted_count,
+            }
+
+
+def create_session_store() -> SessionStore:
+    """Builds the store selected by SESSION_STORE."""
+    if SESSION_STORE == "sqlite":
+        logger.info(f"Chat sessions are kept in SQLite at {SESSION_DB_PATH}")
+        return SQLiteSessionStore(SESSION_DB_PATH, SESSION_TTL_SECONDS, SESSION_MAX_COUNT)
+    if SESSION_STORE != "memory":
+        logger.warning(f"Unknown SESSION_STORE '{SESSION_STORE}', keeping sessions in memory")
+    return MemorySessionStore(SESSION_TTL_SECONDS, SESSION_MAX_COUNT, int(SESSION_MAX_MB * 1024 * 1024))
@@ -0,0 +1,25 @@
+from services.history import HistoryWindow
+
+
+def message(role, content):
+    return {"role": role, "content": content}
+
+
+def test_apply_fold_drops_the_batch_by_position():
+    thanks = [message("user", "thanks"), message("assistant", "You're welcome!")]
+    # The same exchange aged out twice; only the first copy was in the fold
+    state = {"summary": "", "messages": [], "aging": thanks + thanks}
+
+    HistoryWindow.apply_fold(state, list(thanks), "The user said thanks.")
+
+    assert state == {"summary": "The user said thanks.", "messages": [], "aging": thanks}
+
+
+def test_apply_fold_skips_a_batch_that_was_folded_elsewhere():
+    first = [message("user", "hi"), message("assistant", "Hello!")]
+    later = [message("user", "bye"), message("assistant", "Goodbye!")]
+    state = {"summary": "The user said hi.", "messages": [], "aging": list(later)}
+
+    HistoryWindow.apply_fold(state, first, "A stale summary.")
+
+    assert state == {"summary": "The user said hi.", "messages": [], "aging": later}
@@ -0,0 +1,28 @@
+import asyncio
+import time
+
+from services import llm_service
+
+
+class SlowModel:
+    def generate_content(self, prompt):
+        time.sleep(0.2)
+        return prompt
+
+
+def test_every_queue_wait_is_recorded(monkeypatch):
+    monkeypatch.setattr(llm_service, "get_model", lambda api_key: SlowModel())
+    monkeypatch.setattr(llm_service, "LLM_SLOW_WAIT_MS", 50)
+    service = llm_service.LLMService()
+
+    async def run():
+        # Two more calls than workers: those two wait for a free one
+        await asyncio.gather(*(service._generate("hi") for _ in range(llm_service.LLM_WORKERS + 2)))
+
+    asyncio.run(run())
+    stats = service.stats()
+
+    assert stats["calls"] == llm_service.LLM_WORKERS + 2
+    assert stats["slow_calls"] == 2
+    assert stats["queue_wait_p50_ms"] < 50
+    assert stats["queue_wait_max_ms"] >= 150
@@ -0,0 +1,63 @@
+import sqlite3
+import time
+
+import pytest
+
+from services.history import HistoryWindow
+from services.session_store import MemorySessionStore, SQLiteSessionStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemorySessionStore(ttl_seconds=3600, max_sessions=3, max_bytes=1024 * 1024)
+    return SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl_seconds=3600, max_sessions=3)
+
+
+def test_save_refuses_a_stale_version(store):
+    assert store.save("a", {"messages": ["hi"]}, expected_version=0)
+    state, version = store.load_versioned("a")
+    # Another worker saves a turn while this request waits for the LLM
+    assert store.save("a", {"messages": ["hi", "other"]}, expected_version=version)
+
+    assert not store.save("a", {"messages": ["hi", "mine"]}, expected_version=version)
+    assert not store.save("a", {"messages": ["mine"]}, expected_version=0)
+    assert store.load("a") == {"messages": ["hi", "other"]}
+
+
+def test_a_refused_turn_is_appended_to_the_newer_state(store):
+    store.save("a", {"summary": "", "messages": [], "aging": []})
+    _, version = store.load_versioned("a")
+    store.update("a", lambda state: HistoryWindow.append_turn(state, "other question", "other answer"))
+
+    assert not store.save("a", {"summary": "", "messages": ["mine", "reply"], "aging": []}, version)
+    state, version = store.load_versioned("a")
+    assert store.save("a", HistoryWindow.append_turn(state, "mine", "reply"), version)
+
+    assert store.load("a")["messages"] == ["other question", "other answer", "mine", "reply"]
+
+
+def test_oldest_sessions_are_evicted_over_the_cap(store):
+    for session_id in "abcd":
+        store.save(session_id, {"id": session_id})
+        time.sleep(0.01)
+    store.save("b", {"id": "b", "again": True})
+    store.save("e", {"id": "e"})
+
+    assert [store.load(session_id) is not None for session_id in "abcde"] == [False, True, False, True, True]
+    assert store.stats()["sessions"] == 3
+    assert store.stats()["evicted_count"] == 2
+
+
+def test_sqlite_store_adds_versions_to_an_existing_file(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE sessions (id TEXT PRIMARY KEY, state TEXT NOT NULL, updated REAL NOT NULL)")
+    db.execute("INSERT INTO sessions VALUES ('a', '{}', ?)", (time.time(),))
+    db.commit()
+    db.close()
+
+    store = SQLiteSessionStore(path, ttl_seconds=3600, max_sessions=10)
+
+    assert store.load_versioned("a") == ({}, 1)
+    assert store.save("a", {"saved": True}, expected_version=1)
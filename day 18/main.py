@@ -19,8 +19,7 @@ from typing import Type
 import os
 from dotenv import load_dotenv
 import asyncio
-from concurrent.futures import TimeoutError
-import json
+from services.event_bridge import ClientEventBridge
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -60,78 +59,33 @@ async def websocket_audio(websocket: WebSocket):
     # Get the event loop for WebSocket communication
     loop = asyncio.get_event_loop()
 
+    # SDK callbacks run on AssemblyAI's reader thread; they only queue messages for the
+    # browser, and a single sender task delivers them, so a slow client never stalls them
+    bridge = ClientEventBridge(websocket, loop)
+    bridge.start()
+
     # Define event handlers
     def on_begin(self: Type[StreamingClient], event: BeginEvent):
         logger.info(f"Session started: {event.id}")
-        try:
-            message = {"type": "session", "message": f"Session started: {event.id}"}
-            asyncio.run_coroutine_threadsafe(
-                websocket.send_json(message),
-                loop
-            ).result(timeout=5)
-            logger.info(f"Sent to client: {json.dumps(message)}")
-        except TimeoutError:
-            logger.error("Timeout sending session start message")
-        except Exception as e:
-            logger.error(f"Error sending session start: {str(e)}")
+        bridge.post({"type": "session", "message": f"Session started: {event.id}"})
 
     def on_turn(self: Type[StreamingClient], event: TurnEvent):
         is_formatted = hasattr(event, 'turn_is_formatted') and event.turn_is_formatted
         logger.info(f"Transcript: {event.transcript} (End of turn: {event.end_of_turn}) (Formatted: {is_formatted})")
 
         if event.end_of_turn:
-            try:
-                message = {"type": "end_of_turn"}
-                asyncio.run_coroutine_threadsafe(
-                    websocket.send_json(message),
-                    loop
-                ).result(timeout=5)
-                logger.info(f"Sent to client: {json.dumps(message)}")
-            except TimeoutError:
-                logger.error("Timeout sending end_of_turn message")
-            except Exception as e:
-                logger.error(f"Error sending end_of_turn: {str(e)}")
+            bridge.post({"type": "end_of_turn"})
 
         if is_formatted:
-            try:
-                message = {"type": "transcript", "text": event.transcript}
-                asyncio.run_coroutine_threadsafe(
-                    websocket.send_json(message),
-                    loop
-                ).result(timeout=5)
-                logger.info(f"Sent to client: {json.dumps(message)}")
-            except TimeoutError:
-                logger.error("Timeout sending transcript")
-            except Exception as e:
-                logger.error(f"Error sending transcript: {str(e)}")
+            bridge.post({"type": "transcript", "text": event.transcript})
 
     def on_terminated(self: Type[StreamingClient], event: TerminationEvent):
         logger.info(f"Session terminated: {event.audio_duration_seconds} seconds of audio processed")
-        try:
-            message = {"type": "termination", "message": f"Session ended: {event.audio_duration_seconds}s processed"}
-            asyncio.run_coroutine_threadsafe(
-                websocket.send_json(message),
-                loop
-            ).result(timeout=5)
-            logger.info(f"Sent to client: {json.dumps(message)}")
-        except TimeoutError:
-            logger.error("Timeout sending termination message")
-        except Exception as e:
-            logger.error(f"Error sending termination: {str(e)}")
+        bridge.post({"type": "termination", "message": f"Session ended: {event.audio_duration_seconds}s processed"})
 
     def on_error(self: Type[StreamingClient], error: StreamingError):
         logger.error(f"Streaming error: {error}")
-        try:
-            message = {"type": "error", "message": str(error)}
-            asyncio.run_coroutine_threadsafe(
-                websocket.send_json(message),
-                loop
-            ).result(timeout=5)
-            logger.info(f"Sent to client: {json.dumps(message)}")
-        except TimeoutError:
-            logger.error("Timeout sending error message")
-        except Exception as e:
-            logger.error(f"Error sending error message: {str(e)}")
+        bridge.post({"type": "error", "message": str(error)})
 
     # Register event handlers
     client.on(StreamingEvents.Begin, on_begin)
@@ -172,6 +126,8 @@ async def websocket_audio(websocket: WebSocket):
             pass
     finally:
         client.disconnect(terminate=True)
+        # Deliver the termination message and anything still queued before closing
+        await bridge.close()
         await websocket.close()
 
 # Health Check
@@ -20,9 +20,9 @@ from typing import Type
 import os
 from dotenv import load_dotenv
 import asyncio
-from concurrent.futures import TimeoutError
 import json
 from services.llm_service import LLMService
+from services.event_bridge import ClientEventBridge
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -72,66 +72,29 @@ async def websocket_audio(websocket: WebSocket):
     # Get the event loop for WebSocket communication
     loop = asyncio.get_event_loop()
 
+    # SDK callbacks run on AssemblyAI's reader thread; they only queue messages for the
+    # browser, and a single sender task delivers them, so a slow client never stalls them
+    bridge = ClientEventBridge(websocket, loop)
+    bridge.start()
+
     # Define event handlers
     def on_begin(_: Type[StreamingClient], event: BeginEvent):
-        try:
-            msg = {"type": "session", "message": f"Session started: {event.id}"}
-            asyncio.run_coroutine_threadsafe(
-                websocket.send_json(msg), loop
-            ).result(timeout=5)
-        except TimeoutError:
-            pass
-        except Exception:
-            pass
+        bridge.post({"type": "session", "message": f"Session started: {event.id}"})
 
     def on_turn(_: Type[StreamingClient], event: TurnEvent):
         is_formatted = hasattr(event, 'turn_is_formatted') and event.turn_is_formatted
         if event.end_of_turn:
-            try:
-                msg = {"type": "end_of_turn"}
-                asyncio.run_coroutine_threadsafe(
-                    websocket.send_json(msg), loop
-                ).result(timeout=5)
-            except TimeoutError:
-                pass
-            except Exception:
-                pass
+            bridge.post({"type": "end_of_turn"})
         if is_formatted and event.end_of_turn:
-            try:
-                msg = {"type": "transcript", "text": event.transcript}
-                asyncio.run_coroutine_threadsafe(
-                    websocket.send_json(msg), loop
-                ).result(timeout=5)
-                # Stream LLM response for final transcript
-                asyncio.run_coroutine_threadsafe(
-                    llm_service.stream_llm(event.transcript), loop
-                )
-            except TimeoutError:
-                pass
-            except Exception as e:
-                logger.error(f"Error in on_turn handler: {str(e)}")
+            bridge.post({"type": "transcript", "text": event.transcript})
+            # Stream LLM response for final transcript, after the transcript has been sent
+            bridge.spawn(llm_service.stream_llm, event.transcript)
 
     def on_terminated(_: Type[StreamingClient], event: TerminationEvent):
-        try:
-            msg = {"type": "termination", "message": f"Session ended: {event.audio_duration_seconds}s processed"}
-            asyncio.run_coroutine_threadsafe(
-                websocket.send_json(msg), loop
-            ).result(timeout=5)
-        except TimeoutError:
-            pass
-        except Exception:
-            pass
+        bridge.post({"type": "termination", "message": f"Session ended: {event.audio_duration_seconds}s processed"})
 
     def on_error(_: Type[StreamingClient], error: StreamingError):
-        try:
-            msg = {"type": "error", "message": str(error)}
-            asyncio.run_coroutine_threadsafe(
-                websocket.send_json(msg), loop
-            ).result(timeout=5)
-        except TimeoutError:
-            pass
-        except Exception:
-            pass
+        bridge.post({"type": "error", "message": str(error)})
 
     # Register event handlers
     client.on(StreamingEvents.Begin, on_begin)
@@ -169,6 +132,8 @@ async def websocket_audio(websocket: WebSocket):
         if connection_id in active_websockets:
             del active_websockets[connection_id]
         client.disconnect(terminate=True)
+        # Deliver the termination message and anything still queued before closing
+        await bridge.close()
         await websocket.close()
 
 
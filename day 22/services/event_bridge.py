@@ -0,0 +1,88 @@
+# event_bridge.py
+import asyncio
+import logging
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class ClientEventBridge:
+    """
+    Hands messages from AssemblyAI's reader thread to the browser without blocking it.
+
+    `post()` and `spawn()` may be called from any thread: they only enqueue the item on the
+    event loop with `call_soon_threadsafe` and return at once. A single sender task per socket
+    drains the queue in order, so a slow browser delays its own messages, never the next
+    transcript event. Items beyond `max_pending` are dropped and counted.
+    """
+
+    def __init__(self, websocket, loop: asyncio.AbstractEventLoop, max_pending: int = 1000):
+        self.websocket = websocket
+        self.loop = loop
+        self.max_pending = max_pending
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task = None
+        self._spawned = set()
+        self._send_failed = False
+
+        self.sent = 0
+        self.dropped = 0
+
+    def start(self):
+        self._task = self.loop.create_task(self._run())
+
+    def post(self, message: dict):
+        """Queues a JSON message for the browser. Safe to call from any thread."""
+        self._enqueue(message)
+
+    def spawn(self, coroutine_function, *args):
+        """Starts `coroutine_function(*args)` as a task once everything posted before it is sent."""
+        self._enqueue((coroutine_function, args))
+
+    async def close(self, timeout: float = 5.0):
+        """Sends what is still queued (up to `timeout` seconds), then stops the sender task."""
+        # Scheduled like post(), so messages whose put is still waiting on the loop (e.g. the
+        # termination event from the reader thread) are queued ahead of the stop marker
+        self.loop.call_soon_threadsafe(self._queue.put_nowait, _STOP)
+        if self._task:
+            try:
+                await asyncio.wait_for(self._task, timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Timed out flushing messages to the client")
+
+    def _enqueue(self, item):
+        try:
+            self.loop.call_soon_threadsafe(self._put, item)
+        except RuntimeError:
+            # The event loop is already closed; the client is gone
+            pass
+
+    def _put(self, item):
+        if self._queue.qsize() >= self.max_pending:
+            self.dropped += 1
+            return
+        self._queue.put_nowait(item)
+
+    async def _run(self):
+        while True:
+            item = await self._queue.get()
+            if item is _STOP:
+                return
+            if isinstance(item, tuple):
+                coroutine_function, args = item
+                task = self.loop.create_task(coroutine_function(*args))
+                # Keep a reference so the task isn't garbage collected while it runs
+                self._spawned.add(task)
+                task.add_done_callback(self._spawned.discard)
+                continue
+            if self._send_failed:
+                continue
+            try:
+                await self.websocket.send_json(item)
+                self.sent += 1
+            except Exception as e:
+                # The socket is closed; later messages are discarded instead of retried
+                self._send_failed = True
+                logger.error(f"Error sending to client: {str(e)}")
@@ -0,0 +1,69 @@
+# benchmarks/audio_framing.py
+"""
+Bytes on the wire and server CPU per reply for JSON (base64) vs binary audio frames.
+
+A reply is SENTENCES clips of fake 24 kHz 16-bit mono WAV, streamed in CHUNK-sized pieces
+(as Murf delivers them) through AudioSender to a socket that discards what it is given.
+
+Run from the `day 28` folder:
+    python -m benchmarks.audio_framing
+"""
+import asyncio
+import io
+import os
+import wave
+
+from services.framing import AudioSender, MODE_BINARY, MODE_JSON
+
+SENTENCES = 6
+SECONDS_PER_SENTENCE = 3
+REPLIES = 50
+CHUNK = 4096
+
+
+class NullWebSocket:
+    async def send_json(self, data):
+        pass
+
+    async def send_text(self, data):
+        pass
+
+    async def send_bytes(self, data):
+        pass
+
+
+def fake_wav(seconds: float) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(24_000)
+        wav.writeframes(os.urandom(int(24_000 * 2 * seconds)))
+    return buffer.getvalue()
+
+
+async def measure(mode: str, clips) -> dict:
+    sender = AudioSender(NullWebSocket(), mode)
+    for _ in range(REPLIES):
+        for index, clip in enumerate(clips):
+            for start in range(0, len(clip), CHUNK):
+                await sender.send_chunk(clip[start:start + CHUNK], index)
+            await sender.end_sentence(index)
+    return sender.stats()
+
+
+def main():
+    clips = [fake_wav(SECONDS_PER_SENTENCE) for _ in range(SENTENCES)]
+    results = {mode: asyncio.run(measure(mode, clips)) for mode in (MODE_JSON, MODE_BINARY)}
+
+    print(f"reply: {SENTENCES} sentences, {sum(map(len, clips)) / 1024:.0f} KiB of audio")
+    print(f"{'mode':>7} {'KiB/reply':>10} {'overhead':>9} {'CPU ms/reply':>13}")
+    for mode, stats in results.items():
+        wire = stats["wire_bytes"] / REPLIES
+        overhead = 100 * (stats["wire_bytes"] / stats["audio_bytes"] - 1)
+        cpu = stats["encode_ms"] / REPLIES
+        print(f"{mode:>7} {wire / 1024:>10.0f} {overhead:>8.1f}% {cpu:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/audio_ingress.py
+"""
+Event loop lag and queue behaviour when the upstream STT socket is slower than the mic.
+
+The mic sends a 100 ms frame every 100 ms for SECONDS. The fake upstream needs SEND_MS per
+upload (a congested socket) and stalls once for STALL_MS, so it falls behind. "inline" calls
+it from the receive loop (the old /ws code); the other rows go through AudioIngressQueue
+with each overflow policy. A ticker task measures how late the event loop wakes it up.
+
+Run from the `day 28` folder:
+    python -m benchmarks.audio_ingress
+"""
+import asyncio
+import time
+
+from services.audio_ingress import AudioIngressQueue, POLICIES
+
+SECONDS = 5
+SEND_MS = 140
+STALL_MS = 3000
+TICK_MS = 10
+FRAME = b"\0" * 3200  # 100 ms of 16 kHz PCM16
+
+
+class SlowUpstream:
+    def __init__(self):
+        self.uploads = 0
+
+    def upload(self, chunk: bytes):
+        self.uploads += 1
+        if self.uploads == 5:
+            time.sleep(STALL_MS / 1000)
+        time.sleep(SEND_MS / 1000)
+
+
+async def run(policy: str = None):
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK_MS / 1000)
+            lags.append(1000 * (time.perf_counter() - start) - TICK_MS)
+
+    tick = asyncio.create_task(ticker())
+    upstream = SlowUpstream()
+    queue = None
+    if policy:
+        queue = AudioIngressQueue(upstream.upload, policy=policy)
+        queue.start()
+
+    for _ in range(SECONDS * 10):
+        if queue:
+            await queue.put(FRAME)
+        else:
+            upstream.upload(FRAME)
+        await asyncio.sleep(0.1)
+    if queue:
+        await queue.close(drain=False)
+    done.set()
+    await tick
+
+    lags.sort()
+    line = f"{policy or 'inline':<12} loop lag p50 {lags[len(lags) // 2]:6.1f} ms  max {lags[-1]:6.1f} ms"
+    if queue:
+        stats = queue.stats()
+        line += (f"  max depth {stats['max_depth_bytes'] / 32:5.0f} ms  dropped {stats['bytes_dropped'] / 32:5.0f} ms"
+                 f"  uploads {stats['sends']}  blocked {stats['blocked_ms']:6.0f} ms")
+    print(line)
+
+
+def main():
+    print(f"{SECONDS} s of mic audio, {SEND_MS} ms per upstream send, one {STALL_MS} ms stall")
+    asyncio.run(run())
+    for policy in POLICIES:
+        asyncio.run(run(policy))
+
+
+if __name__ == "__main__":
+    main()
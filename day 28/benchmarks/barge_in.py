@@ -0,0 +1,128 @@
+# benchmarks/barge_in.py
+"""
+Upstream work and audio sent for a reply the user talks over, with and without barge-in.
+
+A long reply is generated by a fake Gemini (TOKEN_MS per word) and spoken by a fake Murf
+(SENTENCE_MS per sentence, streamed in chunks). INTERRUPT_AFTER_MS into the reply the user
+starts a new turn. Without barge-in the old reply runs to the end; with it the turn is
+cancelled the way /ws does it, and the client is told to flush.
+
+Run from the `day 28` folder:
+    python -m benchmarks.barge_in
+"""
+import asyncio
+import io
+import time
+import wave
+
+from services import llm, tts, tts_pipeline
+from services.framing import AudioSender, MODE_BINARY
+from services.segmenter import SentenceSegmenter
+from services.tts_pipeline import TTSPipeline
+
+SENTENCES = 12
+TOKEN_MS = 25
+SENTENCE_MS = 400
+CHUNKS_PER_SENTENCE = 10
+INTERRUPT_AFTER_MS = 1500
+REPLY = " ".join(f"This is sentence number {n} of a very long story about the forest." for n in range(SENTENCES))
+
+
+def pcm_wav(seconds: float) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(24_000)
+        wav.writeframes(b"\0" * int(24_000 * 2 * seconds))
+    return buffer.getvalue()
+
+
+CLIP = pcm_wav(2.0)
+counters = {"llm_words": 0, "tts_chunks": 0}
+
+
+class FakeConversation(llm.Conversation):
+    def stream(self, user_query):
+        for word in REPLY.split(" "):
+            time.sleep(TOKEN_MS / 1000)
+            counters["llm_words"] += 1
+            yield word + " "
+        return llm.text_content("user", user_query), llm.text_content("model", REPLY)
+
+
+def fake_stream_speech(text, output_file=None, api_key=None):
+    step = len(CLIP) // CHUNKS_PER_SENTENCE
+    for start in range(0, len(CLIP), step):
+        time.sleep(SENTENCE_MS / 1000 / CHUNKS_PER_SENTENCE)
+        counters["tts_chunks"] += 1
+        yield CLIP[start:start + step]
+
+
+class CountingWebSocket:
+    def __init__(self):
+        self.bytes = 0
+        self.flushes = 0
+
+    async def send_json(self, data):
+        if data.get("type") == "flush":
+            self.flushes += 1
+
+    async def send_bytes(self, data):
+        self.bytes += len(data)
+
+    async def send_text(self, data):
+        self.bytes += len(data)
+
+
+async def reply(sender: AudioSender):
+    """The LLM -> sentence -> TTS path of handle_transcript."""
+    speaker = TTSPipeline(sender)
+    stream = llm.LLMStream("tell me a story", FakeConversation().open())
+    segmenter = SentenceSegmenter()
+
+    async def on_text(chunk):
+        for sentence in segmenter.feed(chunk):
+            await speaker.submit(sentence)
+
+    try:
+        await stream.consume(on_text)
+        for sentence in segmenter.flush():
+            await speaker.submit(sentence)
+        await speaker.close()
+    except asyncio.CancelledError:
+        stream.cancel()
+        speaker.cancel()
+        raise
+
+
+async def run(barge_in: bool):
+    for key in counters:
+        counters[key] = 0
+    websocket = CountingWebSocket()
+    sender = AudioSender(websocket, MODE_BINARY)
+    turn = asyncio.create_task(reply(sender))
+    await asyncio.sleep(INTERRUPT_AFTER_MS / 1000)
+    if barge_in:
+        turn.cancel()
+        await asyncio.gather(turn, return_exceptions=True)
+        await sender.flush()
+    else:
+        await turn
+    await asyncio.sleep(1.0)  # let worker threads notice the cancellation
+
+    label = "barge-in" if barge_in else "no barge-in"
+    print(f"{label:<12} LLM words {counters['llm_words']:4d}   Murf chunks {counters['tts_chunks']:4d}   "
+          f"audio sent {websocket.bytes / 1024:7.0f} KiB   flushes {websocket.flushes}")
+
+
+def main():
+    tts.stream_speech = fake_stream_speech
+    print(f"{SENTENCES} sentence reply, user talks over it after {INTERRUPT_AFTER_MS} ms")
+    asyncio.run(run(barge_in=False))
+    asyncio.run(run(barge_in=True))
+    tts_pipeline.shutdown()
+
+
+if __name__ == "__main__":
+    main()
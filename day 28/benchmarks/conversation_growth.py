@@ -0,0 +1,110 @@
+# benchmarks/conversation_growth.py
+"""
+Per-turn CPU and memory over a 100-turn conversation: history replayed into a new chat every
+turn (the old flow) versus the socket's persistent llm.Conversation.
+
+The model is the real GenerativeModel with the network call replaced: it still builds the
+full GenerateContentRequest (every request carries the whole history, in both flows) and then
+answers REPLY. "replay" is what the old code did per turn: `start_chat(history=history)`,
+`send_message()`, and copy `chat.history` back into the session. A second table leaves out
+the request building to show the bookkeeping alone. Needs the real google-generativeai package.
+
+Run from the `day 28` folder:
+    python -m benchmarks.conversation_growth
+"""
+import time
+import tracemalloc
+
+from google.generativeai import protos
+from google.generativeai.types import generation_types
+
+from services import llm
+
+TURNS = 100
+REPEAT = 5
+REPORT_AT = (1, 10, 25, 50, 100)
+QUESTION = "Masha, what do bees do in the winter when it is cold outside?"
+REPLY = ("Ooh Mishka, bees huddle together in a big fuzzy ball and wiggle their wings to keep warm. "
+         "They eat the honey they saved all summer!")
+
+
+class OfflineModel(llm.genai.GenerativeModel):
+    """Builds the real request (unless `build_request` is off), then answers from memory."""
+
+    build_request = True
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        if self.build_request:
+            self._prepare_request(contents=contents, tools=None, tool_config=None)
+        response = generation_types.GenerateContentResponse.from_response(protos.GenerateContentResponse(
+            candidates=[protos.Candidate(
+                content=protos.Content(role="model", parts=[protos.Part(text=REPLY)]),
+                finish_reason=protos.Candidate.FinishReason.STOP,
+            )]
+        ))
+        return [response] if stream else response
+
+
+MODEL = OfflineModel(llm.MODEL_NAME, system_instruction=llm.system_instructions)
+
+
+def replay_turn(history):
+    chat = MODEL.start_chat(history=history)
+    chat.send_message(QUESTION)
+    history[:] = chat.history
+
+
+def conversation_turn(conversation):
+    stream = conversation.stream(QUESTION)
+    while True:
+        try:
+            next(stream)
+        except StopIteration as stop:
+            conversation.append(stop.value)
+            return
+
+
+def measure(flow: str):
+    """Returns per-turn time (us) and retained memory (KiB) after each turn."""
+    times = [0.0] * TURNS
+    retained = [0.0] * TURNS
+    for _ in range(REPEAT):
+        history = []
+        # No token budget: this compares the bookkeeping of the two flows on the full history
+        conversation = llm.Conversation(token_budget=0).open()
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        for index in range(TURNS):
+            started = time.perf_counter()
+            if flow == "replay":
+                replay_turn(history)
+            else:
+                conversation_turn(conversation)
+            times[index] += 1e6 * (time.perf_counter() - started) / REPEAT
+            retained[index] += (tracemalloc.get_traced_memory()[0] - baseline) / 1024 / REPEAT
+        tracemalloc.stop()
+        conversation.close()
+    return times, retained
+
+
+def main():
+    llm.get_model = lambda *args, **kwargs: MODEL
+    llm.news.should_fetch_news = lambda query: False
+
+    print(f"{TURNS}-turn conversation, averaged over {REPEAT} runs (time under tracemalloc)")
+    for build_request in (True, False):
+        MODEL.build_request = build_request
+        results = {flow: measure(flow) for flow in ("replay", "conversation")}
+        print()
+        print("with request building" if build_request else "bookkeeping only")
+        print(f"{'turn':>5}  {'replay us':>10}  {'conversation us':>15}  {'replay KiB':>10}  {'conversation KiB':>16}")
+        for turn in REPORT_AT:
+            index = turn - 1
+            print(f"{turn:5d}  {results['replay'][0][index]:10.0f}  {results['conversation'][0][index]:15.0f}  "
+                  f"{results['replay'][1][index]:10.1f}  {results['conversation'][1][index]:16.1f}")
+        for flow, (times, _) in results.items():
+            print(f"{flow:<13} total CPU for {TURNS} turns {sum(times) / 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
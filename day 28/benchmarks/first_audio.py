@@ -0,0 +1,102 @@
+# benchmarks/first_audio.py
+"""
+Time-to-first-audio for the /ws reply pipeline, before and after LLM streaming.
+
+Gemini and Murf are replaced with fakes that sleep for a realistic amount of time,
+so the numbers show pipeline latency rather than network luck. Both flows go through a
+`llm.Conversation` with a session key, as /ws does; the fake model checks that key.
+Needs the real google-generativeai package (for its Content messages).
+
+Run from the `day 28` folder:
+    python -m benchmarks.first_audio
+"""
+import asyncio
+import time
+
+from services import llm, tts
+from services.segmenter import SentenceSegmenter, split_sentences
+
+REPLY = (
+    "Ooh, Mishka, that is a great question! Bees talk to each other by dancing. "
+    "The waggle dance tells friends where the yummy flowers are. "
+    "The longer they waggle, the farther away the flowers are! "
+    "Isn't that the coolest thing ever?"
+)
+TOKEN_DELAY = 0.02  # seconds per streamed word
+TTS_DELAY = 0.35    # seconds per synthesized sentence
+API_KEY = "bench-key"
+keys_used = []
+
+
+class FakeResponse:
+    def __init__(self, words):
+        self._words = words
+
+    def __iter__(self):
+        for word in self._words:
+            time.sleep(TOKEN_DELAY)
+            yield type("Chunk", (), {"text": word})()
+
+
+class FakeModel:
+    def generate_content(self, contents, stream=False):
+        return FakeResponse([word + " " for word in REPLY.split(" ")])
+
+
+def fake_get_model(api_key=None, *args, **kwargs):
+    keys_used.append(api_key)
+    return FakeModel()
+
+
+def fake_speak(text, *args, **kwargs):
+    time.sleep(TTS_DELAY)
+    return b"RIFF" + text.encode()
+
+
+async def blocking_pipeline() -> float:
+    """The original flow: whole reply first, then the first sentence to TTS."""
+    loop = asyncio.get_running_loop()
+    conversation = llm.Conversation(api_key=API_KEY).open()
+    start = time.perf_counter()
+    full_response = await loop.run_in_executor(None, lambda: "".join(conversation.stream("tell me about bees")))
+    first = split_sentences(full_response)[0]
+    await loop.run_in_executor(None, tts.speak, first)
+    return time.perf_counter() - start
+
+
+async def streaming_pipeline() -> float:
+    """The streaming flow: the first finished sentence goes to TTS while Gemini keeps generating."""
+    loop = asyncio.get_running_loop()
+    segmenter = SentenceSegmenter()
+    first_audio = []
+    start = time.perf_counter()
+
+    async def on_text(chunk):
+        for sentence in segmenter.feed(chunk):
+            if not first_audio:
+                await loop.run_in_executor(None, tts.speak, sentence)
+                first_audio.append(time.perf_counter() - start)
+
+    conversation = llm.Conversation(api_key=API_KEY).open()
+    await llm.LLMStream("tell me about bees", conversation).consume(on_text)
+    return first_audio[0]
+
+
+def main():
+    llm.get_model = fake_get_model
+    llm.news.should_fetch_news = lambda query: False
+    tts.speak = fake_speak
+
+    runs = 5
+    before = [asyncio.run(blocking_pipeline()) for _ in range(runs)]
+    after = [asyncio.run(streaming_pipeline()) for _ in range(runs)]
+    llm.executor.shutdown()
+    # Errors inside Conversation.stream become the fallback line, so check the key explicitly
+    assert set(keys_used) == {API_KEY}, f"Gemini was called with {set(keys_used)}, not the session key"
+    print(f"reply: {len(REPLY.split())} words, {len(split_sentences(REPLY))} sentences")
+    print(f"first audio, blocking LLM:  {1000 * sum(before) / runs:7.1f} ms")
+    print(f"first audio, streaming LLM: {1000 * sum(after) / runs:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
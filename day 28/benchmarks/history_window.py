@@ -0,0 +1,84 @@
+# benchmarks/history_window.py
+"""
+Prompt size and time to first token over a 100-turn conversation, with the whole history sent
+every turn versus the token-budgeted window with a background summary.
+
+The fake Gemini takes FIRST_TOKEN_MS plus PREFILL_US per prompt token before its first chunk
+(longer prompts are slower and cost more), and SUMMARY_MS to write a summary. Turns go through
+llm.LLMStream the way /ws runs them, so summaries are written on the LLM pool alongside
+replies. Needs the real google-generativeai package (for its Content messages).
+
+Run from the `day 28` folder:
+    python -m benchmarks.history_window
+"""
+import asyncio
+import time
+
+from services import llm
+from services.history import estimate_tokens
+
+TURNS = 100
+BUDGET = 2000
+FIRST_TOKEN_MS = 20
+PREFILL_US = 20
+SUMMARY_MS = 400
+REPORT_AT = (1, 25, 50, 100)
+QUESTION = "Masha, tell me something fun about the forest animals near your house, number {}?"
+REPLY = ("Ooh Mishka, the hedgehog next door snores so loudly that the squirrels wake up! "
+         "Yesterday a little fox tried to steal my jam, but I chased him all around the birch trees. "
+         "And the owl says the bear is the grumpiest neighbor in the whole forest!")
+SUMMARY = " ".join(["The user asks about the forest animals and Masha tells stories about them."] * 6)
+
+
+class Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    def generate_content(self, contents, stream=False):
+        if not stream:
+            time.sleep(SUMMARY_MS / 1000)
+            return Chunk(SUMMARY)
+        tokens = sum(estimate_tokens(llm.render_content(content)) for content in contents)
+        time.sleep(FIRST_TOKEN_MS / 1000 + PREFILL_US * tokens / 1e6)
+        return [Chunk(word + " ") for word in REPLY.split(" ")]
+
+
+async def run(budget: int):
+    conversation = llm.Conversation(token_budget=budget).open()
+    first_token_ms, prompt_tokens = [], []
+
+    async def on_text(chunk):
+        if len(first_token_ms) < len(prompt_tokens):
+            first_token_ms.append(1000 * (time.perf_counter() - started))
+
+    for turn in range(TURNS):
+        prompt_tokens.append(sum(estimate_tokens(llm.render_content(content)) for content in conversation.messages))
+        started = time.perf_counter()
+        await llm.LLMStream(QUESTION.format(turn), conversation).consume(on_text)
+        # The user listens to the reply before the next turn
+        await asyncio.sleep(0.05)
+
+    label = f"budget {budget}" if budget else "whole history"
+    stats = conversation.stats()
+    for turn in REPORT_AT:
+        print(f"{label:<14} turn {turn:3d}   history sent {prompt_tokens[turn - 1]:5d} tokens   "
+              f"first token {first_token_ms[turn - 1]:5.0f} ms")
+    print(f"{label:<14} total prompt tokens {sum(prompt_tokens):7d}   summaries {stats['summaries']}   "
+          f"messages folded {stats['folded']}")
+    conversation.close()
+
+
+def main():
+    llm.get_model = lambda *args, **kwargs: FakeModel()
+    llm.news.should_fetch_news = lambda query: False
+    print(f"{TURNS} turns, fake Gemini: {FIRST_TOKEN_MS} ms + {PREFILL_US} us per prompt token, "
+          f"summary {SUMMARY_MS} ms")
+    asyncio.run(run(budget=0))
+    asyncio.run(run(budget=BUDGET))
+    llm.executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/llm_concurrency.py
+"""
+50 sessions asking Gemini at the same time: event loop lag and queue wait per LLM call.
+
+The fake Gemini blocks for FIRST_TOKEN_MS and then streams WORDS words, TOKEN_MS apart, like
+the real blocking SDK. "on the loop" calls it directly from the coroutine, the way the
+original blocking reply was awaited; the other rows stream through llm.LLMStream on the
+dedicated pool with different worker counts. A ticker task measures event loop lag.
+
+Run from the `day 28` folder:
+    python -m benchmarks.llm_concurrency
+"""
+import asyncio
+import time
+
+from services import llm
+from services.timed_executor import TimedExecutor
+
+SESSIONS = 50
+FIRST_TOKEN_MS = 400
+WORDS = 20
+TOKEN_MS = 20
+TICK_MS = 10
+
+
+def fake_stream(user_query):
+    time.sleep(FIRST_TOKEN_MS / 1000)
+    for _ in range(WORDS):
+        time.sleep(TOKEN_MS / 1000)
+        yield "word "
+    return llm.text_content("user", user_query), llm.text_content("model", "word " * WORDS)
+
+
+class FakeConversation(llm.Conversation):
+    def stream(self, user_query):
+        return fake_stream(user_query)
+
+
+async def session(workers: int):
+    if workers == 0:
+        "".join(fake_stream("hi"))
+        return
+
+    async def on_text(chunk):
+        pass
+
+    await llm.LLMStream("hi", FakeConversation().open()).consume(on_text)
+
+
+async def run(workers: int):
+    llm.executor = TimedExecutor(max_workers=max(workers, 1), thread_name_prefix="llm")
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK_MS / 1000)
+            lags.append(1000 * (time.perf_counter() - start) - TICK_MS)
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    await asyncio.gather(*(session(workers) for _ in range(SESSIONS)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await tick
+    llm.executor.shutdown()
+
+    lags.sort()
+    label = "on the loop" if workers == 0 else f"pool of {workers}"
+    line = f"{label:<12} all replies {elapsed:6.2f} s   loop lag max {lags[-1]:7.1f} ms"
+    if workers:
+        stats = llm.executor.stats()
+        line += f"   queue wait p50 {stats['queue_wait_p50_ms']:6.0f} ms  p95 {stats['queue_wait_p95_ms']:6.0f} ms"
+    print(line)
+
+
+def main():
+    reply_ms = FIRST_TOKEN_MS + WORDS * TOKEN_MS
+    print(f"{SESSIONS} sessions, {reply_ms} ms per fake Gemini reply")
+    for workers in (0, 8, 16, 50):
+        asyncio.run(run(workers))
+
+
+if __name__ == "__main__":
+    main()
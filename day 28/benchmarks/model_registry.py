@@ -0,0 +1,65 @@
+# benchmarks/model_registry.py
+"""
+Per-turn cost of building a GenerativeModel (and its chat) versus reusing a cached one.
+
+Only object construction is measured: no request is sent, so any key works. "rebuilt" is
+the old per-turn `genai.GenerativeModel(..., system_instruction=...)`; "cached" is
+`llm.get_model()`. Each is timed alone and followed by `start_chat()` on a HISTORY-message
+history, as every turn does. Needs the real google-generativeai package.
+
+Run from the `day 28` folder:
+    python -m benchmarks.model_registry
+"""
+import time
+import tracemalloc
+
+from services import llm
+
+TURNS = 2000
+HISTORY = 20
+
+
+def history():
+    return [{"role": "user" if i % 2 == 0 else "model", "parts": [f"message {i}"]} for i in range(HISTORY)]
+
+
+def rebuilt(messages):
+    return llm.genai.GenerativeModel(llm.MODEL_NAME, system_instruction=llm.system_instructions)
+
+
+def cached(messages):
+    return llm.get_model(api_key="bench-key")
+
+
+def with_chat(get):
+    return lambda messages: get(messages).start_chat(history=messages)
+
+
+def measure(build) -> tuple:
+    messages = history()
+    build(messages)  # warm up imports and the cache
+    tracemalloc.start()
+    started = time.perf_counter()
+    for _ in range(TURNS):
+        build(messages)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return 1e6 * elapsed / TURNS, peak
+
+
+def main():
+    print(f"{TURNS} turns, {HISTORY}-message history, system instruction {len(llm.system_instructions)} chars")
+    for label, build in (
+            ("rebuilt", rebuilt),
+            ("cached", cached),
+            ("rebuilt + chat", with_chat(rebuilt)),
+            ("cached + chat", with_chat(cached)),
+    ):
+        per_turn_us, peak = measure(build)
+        print(f"{label:<15} {per_turn_us:8.1f} us per turn   peak traced memory {peak / 1024:7.1f} KiB")
+    print(f"registry: {llm.model_stats}")
+
+
+if __name__ == "__main__":
+    main()
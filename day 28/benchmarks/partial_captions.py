@@ -0,0 +1,76 @@
+# benchmarks/partial_captions.py
+"""
+Caption messages per second sent to the browser under continuous speech.
+
+A fake reader thread plays AssemblyAI during SECONDS of non-stop talking: a new word every
+WORD_MS, an interim Turn event every EVENT_MS, and an end of turn every WORDS_PER_TURN words.
+Like the real service, the word being spoken is revised as more of it is heard, and events
+also repeat text that didn't change. The same events go to several PartialTranscriptThrottle
+instances at once; "unthrottled" forwards every event, as a plain on_partial_callback would.
+
+Run from the `day 28` folder:
+    python -m benchmarks.partial_captions
+"""
+import asyncio
+import threading
+import time
+
+from services.partials import PartialTranscriptThrottle
+
+SECONDS = 8
+WORD_MS = 350
+EVENT_MS = 60
+WORDS_PER_TURN = 12
+INTERVALS_MS = (0, 100, 200, 400)
+
+
+def speaker(throttles, on_event):
+    words = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < SECONDS:
+        time.sleep(EVENT_MS / 1000)
+        words_now = int(1000 * (time.perf_counter() - started) / WORD_MS)
+        if words_now // WORDS_PER_TURN > words // WORDS_PER_TURN:
+            for throttle in throttles:
+                throttle.reset()
+        words = words_now
+        spoken = words % WORDS_PER_TURN
+        if spoken:
+            # Half-heard word at the end, revised a couple of times before it settles
+            heard = (1000 * (time.perf_counter() - started) % WORD_MS) / WORD_MS
+            text = " ".join(f"word{i}" for i in range(spoken)) + " " + "speaking"[:2 + int(heard * 3)]
+            on_event()
+            for throttle in throttles:
+                throttle.offer(text)
+
+
+async def run():
+    loop = asyncio.get_running_loop()
+    messages = {interval: [] for interval in INTERVALS_MS}
+
+    def sender(interval):
+        async def send(text):
+            messages[interval].append(text)
+        return send
+
+    throttles = [PartialTranscriptThrottle(sender(interval), loop, interval) for interval in INTERVALS_MS]
+    events = []
+    thread = threading.Thread(target=speaker, args=(throttles, lambda: events.append(1)))
+    thread.start()
+    await loop.run_in_executor(None, thread.join)
+    await asyncio.sleep(0.5)  # let trailing partials go out
+
+    print(f"{SECONDS} s of speech, a word every {WORD_MS} ms, an interim event every {EVENT_MS} ms")
+    print(f"{'unthrottled':<22} {len(events) / SECONDS:6.1f} msg/s")
+    for interval, throttle in zip(INTERVALS_MS, throttles):
+        label = "dedup only" if interval == 0 else f"dedup + {interval} ms"
+        print(f"{label:<22} {len(messages[interval]) / SECONDS:6.1f} msg/s   "
+              f"duplicates {throttle.duplicates:4d}   superseded {throttle.superseded:3d}")
+
+
+def main():
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# benchmarks/speculation.py
+"""
+Time from end of turn to the first LLM text, with and without speculative prefetch.
+
+Each turn plays AssemblyAI: a word every WORD_MS as interim transcripts, then silence, and the
+final transcript END_OF_TURN_MS after the last word (the end-of-turn silence it waits for).
+In one turn out of MISS_EVERY the user pauses and then adds more words, so the speculated
+question is wrong. Gemini is a fake that takes FIRST_TOKEN_MS before streaming its reply.
+
+Run from the `day 28` folder:
+    python -m benchmarks.speculation
+"""
+import asyncio
+import time
+
+from services import llm
+from services.speculation import SpeculativePrefetcher
+
+TURNS = 8
+WORD_MS = 200
+END_OF_TURN_MS = 900
+FIRST_TOKEN_MS = 700
+TOKEN_MS = 10
+MISS_EVERY = 4
+QUESTION = "masha can you tell me how bees make honey".split()
+REPLY = ("Ooh Mishka, bees sip nectar from flowers and carry it home in their tummies. "
+         "Then they fan it with their wings until it turns into sticky sweet honey!").split()
+
+
+class FakeConversation(llm.Conversation):
+    def stream(self, user_query):
+        time.sleep(FIRST_TOKEN_MS / 1000)
+        for word in REPLY:
+            yield word + " "
+            time.sleep(TOKEN_MS / 1000)
+        return llm.text_content("user", user_query), llm.text_content("model", " ".join(REPLY))
+
+
+async def turn(conversation, speculator, words, pause_then_more):
+    for count in range(1, len(words) + 1):
+        if speculator:
+            speculator.offer(" ".join(words[:count]))
+        await asyncio.sleep(WORD_MS / 1000)
+    if pause_then_more:
+        # A thinking pause long enough to look finished, then the sentence goes on
+        await asyncio.sleep(1.5)
+        words = words + "in the winter".split()
+        for count in range(len(words) - 3, len(words) + 1):
+            if speculator:
+                speculator.offer(" ".join(words[:count]))
+            await asyncio.sleep(WORD_MS / 1000)
+    await asyncio.sleep(END_OF_TURN_MS / 1000)
+
+    final_at = time.perf_counter()
+    first_text = asyncio.get_running_loop().create_future()
+
+    async def on_text(chunk):
+        if not first_text.done():
+            first_text.set_result(time.perf_counter())
+
+    stream = (await speculator.take(" ".join(words) + "?") if speculator else None) or llm.LLMStream(" ".join(words), conversation)
+    await stream.consume(on_text)
+    if speculator:
+        speculator.end_turn()
+    return 1000 * (first_text.result() - final_at)
+
+
+async def run(speculate: bool):
+    conversation = FakeConversation().open()
+    loop = asyncio.get_running_loop()
+    speculator = SpeculativePrefetcher(conversation, loop, stable_ms=500, min_words=3) if speculate else None
+    latencies = [await turn(conversation, speculator, QUESTION, index % MISS_EVERY == MISS_EVERY - 1) for index in range(TURNS)]
+
+    latencies.sort()
+    label = "speculative" if speculate else "on final only"
+    line = f"{label:<14} end of turn -> first text p50 {latencies[len(latencies) // 2]:5.0f} ms  max {latencies[-1]:5.0f} ms"
+    if speculator:
+        stats = speculator.stats()
+        line += (f"   started {stats['started']}  hits {stats['hits']}  hit rate {stats['hit_rate']:.0%}"
+                 f"  wasted ~{stats['wasted_tokens_est']} tokens")
+    print(line)
+
+
+def main():
+    print(f"{TURNS} turns, final {END_OF_TURN_MS} ms after the last word, Gemini first token {FIRST_TOKEN_MS} ms")
+    asyncio.run(run(speculate=False))
+    asyncio.run(run(speculate=True))
+
+
+if __name__ == "__main__":
+    main()
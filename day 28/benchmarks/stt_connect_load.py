@@ -0,0 +1,106 @@
+# benchmarks/stt_connect_load.py
+"""
+Event loop latency while many sessions open their AssemblyAI stream at once.
+
+A local TCP server plays the STT service: it answers each new connection only after
+HANDSHAKE_MS, like the real WebSocket + auth handshake. StreamingClient is swapped for a
+fake whose blocking connect() waits for that answer. A ticker task measures how late the
+event loop wakes it up while SESSIONS sessions connect and stream audio.
+
+"blocking" builds the transcriber inline (the old /ws code), "background" uses
+stt.open_transcriber.
+
+Run from the `day 28` folder:
+    python -m benchmarks.stt_connect_load
+"""
+import asyncio
+import socket
+import socketserver
+import threading
+import time
+
+from services import stt
+
+HANDSHAKE_MS = 300
+SESSIONS = 20
+TICK_MS = 10
+FRAME = b"\0" * 3200  # 100 ms of 16 kHz PCM16
+
+
+class SlowHandshakeHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        time.sleep(HANDSHAKE_MS / 1000)
+        self.request.sendall(b"ok")
+        self.request.recv(1)  # hold the connection until the client disconnects
+
+
+class FakeStreamingClient:
+    address = None
+
+    def __init__(self, options=None):
+        self.sock = None
+        self.frames = 0
+
+    def on(self, event, handler):
+        pass
+
+    def connect(self, params):
+        self.sock = socket.create_connection(self.address)
+        self.sock.recv(2)
+
+    def stream(self, data):
+        self.frames += 1
+
+    def disconnect(self, terminate=False):
+        if self.sock:
+            self.sock.close()
+
+
+async def session(background: bool):
+    if background:
+        transcriber = stt.open_transcriber(api_key="bench-key")
+    else:
+        transcriber = stt.AssemblyAIStreamingTranscriber(api_key="bench-key")
+    for _ in range(5):
+        transcriber.stream_audio(FRAME)
+        await asyncio.sleep(0.1)
+    if transcriber.connecting is not None:
+        await transcriber.connecting
+    await asyncio.get_running_loop().run_in_executor(None, transcriber.close)
+
+
+async def run(background: bool):
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK_MS / 1000)
+            lags.append(1000 * (time.perf_counter() - start) - TICK_MS)
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.gather(*(session(background) for _ in range(SESSIONS)))
+    done.set()
+    await tick
+
+    lags.sort()
+    label = "background connect" if background else "blocking connect"
+    print(f"{label:<20} loop lag p50 {lags[len(lags) // 2]:7.1f} ms   max {lags[-1]:7.1f} ms")
+
+
+def main():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), SlowHandshakeHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    FakeStreamingClient.address = server.server_address
+    stt.StreamingClient = FakeStreamingClient
+
+    print(f"{SESSIONS} sessions, {HANDSHAKE_MS} ms handshake each")
+    asyncio.run(run(background=False))
+    asyncio.run(run(background=True))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/stt_pool.py
+"""
+Time to first partial transcript for a new session, with and without the warm STT pool.
+
+StreamingClient is swapped for a fake whose connect() takes HANDSHAKE_MS and which emits a
+partial Turn event PARTIAL_MS after the first audio frame it receives. A "session" is the
+/ws flow: get a transcriber for the key, then stream 100 ms frames as the mic produces them.
+The clock starts when the transcriber is requested and stops at the first partial callback.
+
+Run from the `day 28` folder:
+    python -m benchmarks.stt_pool
+"""
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from services import stt
+from services.stt_pool import TranscriberPool
+
+HANDSHAKE_MS = 400
+PARTIAL_MS = 150
+SESSIONS = 10
+FRAME = b"\0" * 3200  # 100 ms of 16 kHz PCM16
+
+
+class FakeStreamingClient:
+    def __init__(self, options=None):
+        self.handlers = {}
+        self.partial_sent = False
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def connect(self, params):
+        time.sleep(HANDSHAKE_MS / 1000)
+
+    def stream(self, data):
+        if not self.partial_sent:
+            self.partial_sent = True
+            event = SimpleNamespace(transcript="hello", end_of_turn=False, turn_is_formatted=False)
+            handler = self.handlers[stt.StreamingEvents.Turn]
+            threading.Timer(PARTIAL_MS / 1000, handler, (self, event)).start()
+
+    def disconnect(self, terminate=False):
+        pass
+
+
+async def session(pool: TranscriberPool) -> float:
+    loop = asyncio.get_running_loop()
+    first_partial = loop.create_future()
+
+    def on_partial(text):
+        loop.call_soon_threadsafe(lambda: first_partial.done() or first_partial.set_result(time.perf_counter()))
+
+    start = time.perf_counter()
+    transcriber = pool.acquire("bench-key", on_partial_callback=on_partial)
+    while not first_partial.done():
+        transcriber.stream_audio(FRAME)
+        await asyncio.wait([first_partial], timeout=0.1)
+    await loop.run_in_executor(None, transcriber.close)
+    return 1000 * (first_partial.result() - start)
+
+
+async def run(size: int):
+    pool = TranscriberPool(size=size, max_size=SESSIONS, idle_timeout=60)
+    pool.start(warm_key="bench-key")
+    await asyncio.sleep(2 * HANDSHAKE_MS / 1000)  # let the pool fill, as it would at startup
+
+    times = []
+    for _ in range(SESSIONS):
+        times.append(await session(pool))
+        await asyncio.sleep(0.5)  # clients arrive a little apart, giving the pool time to refill
+    await pool.close()
+
+    times.sort()
+    label = f"pool size {size}" if size else "no pool"
+    print(f"{label:<12} first partial p50 {times[len(times) // 2]:6.0f} ms   max {times[-1]:6.0f} ms   "
+          f"(hits {pool.hits}, misses {pool.misses})")
+
+
+def main():
+    stt.StreamingClient = FakeStreamingClient
+    print(f"{SESSIONS} sessions, {HANDSHAKE_MS} ms handshake, first partial {PARTIAL_MS} ms after audio")
+    asyncio.run(run(size=0))
+    asyncio.run(run(size=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/tts_chunks.py
+"""
+Cost of collecting a streamed Murf clip made of hundreds of chunks.
+
+"before" is the original loop: `audio_bytes += chunk` plus reopening the shared
+uploads/stream_output.wav for every chunk. "after" is `tts.speak`, which joins the
+chunks once and only touches the disk when asked to.
+
+Run from the `day 28` folder:
+    python -m benchmarks.tts_chunks
+"""
+import tempfile
+import time
+from pathlib import Path
+
+import config
+from services import tts
+from services.tts_cache import AudioCache
+
+CHUNK = b"\1" * 4096
+
+
+class FakeTextToSpeech:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def stream(self, **kwargs):
+        for _ in range(self.chunks):
+            yield CHUNK
+
+
+class FakeMurf:
+    def __init__(self, chunks):
+        self.text_to_speech = FakeTextToSpeech(chunks)
+
+
+def speak_before(client, file_path: Path) -> bytes:
+    open(file_path, "wb").close()
+    audio_bytes = b""
+    for audio_chunk in client.text_to_speech.stream():
+        audio_bytes += audio_chunk
+        with open(file_path, "ab") as f:
+            f.write(audio_chunk)
+    return audio_bytes
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return 1000 * (time.perf_counter() - start)
+
+
+def main():
+    config.MURF_API_KEY = "bench-key"
+    tts.audio_cache = AudioCache(max_memory_bytes=0)  # measure synthesis, not cache hits
+    shared_file = Path(tempfile.mkdtemp()) / "stream_output.wav"
+
+    print(f"{'chunks':>7} {'before':>10} {'after':>10} {'after+file':>11}")
+    for chunks in (100, 300, 600, 1000):
+        client = FakeMurf(chunks)
+        tts.get_client = lambda api_key: client
+        before = timed(speak_before, client, shared_file)
+        after = timed(tts.speak, f"reply with {chunks} chunks")
+        after_file = timed(tts.speak, f"reply with {chunks} chunks", f"bench_{chunks}.wav")
+        (tts.UPLOADS_DIR / f"bench_{chunks}.wav").unlink(missing_ok=True)
+        print(f"{chunks:>7} {before:>8.1f}ms {after:>8.1f}ms {after_file:>9.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
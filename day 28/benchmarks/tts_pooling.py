@@ -0,0 +1,74 @@
+# benchmarks/tts_pooling.py
+"""
+Per-sentence TTS overhead with a fresh Murf client per call vs the pooled keep-alive client.
+
+A local HTTP server stands in for api.murf.ai and streams back fake audio. Plain local TCP
+is almost free, so the server sleeps HANDSHAKE_MS whenever a *new* connection is opened
+to stand in for the TLS handshake + round trip a real Murf connection costs.
+
+Run from the `day 28` folder:
+    python -m benchmarks.tts_pooling
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from murf import Murf
+
+import config
+from services import tts
+
+HANDSHAKE_MS = 60
+AUDIO_BYTES = b"\0" * 32_000
+SENTENCES = 20
+API_KEY = "bench-key"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+    def setup(self):
+        super().setup()
+        time.sleep(HANDSHAKE_MS / 1000)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/wav")
+        self.send_header("Content-Length", str(len(AUDIO_BYTES)))
+        self.end_headers()
+        self.wfile.write(AUDIO_BYTES)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(label: str) -> float:
+    start = time.perf_counter()
+    for i in range(SENTENCES):
+        assert tts.speak(f"Sentence number {i}.")
+    per_sentence = 1000 * (time.perf_counter() - start) / SENTENCES
+    print(f"{label:<28} {per_sentence:7.1f} ms/sentence")
+    return per_sentence
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    config.MURF_BASE_URL = f"http://127.0.0.1:{server.server_address[1]}"
+    config.MURF_API_KEY = API_KEY
+
+    pooled_get_client = tts.get_client
+    tts.get_client = lambda api_key: Murf(api_key=api_key, base_url=config.MURF_BASE_URL)
+    fresh = run("new client per sentence")
+
+    tts.get_client = pooled_get_client
+    pooled = run("pooled keep-alive client")
+    print(f"overhead saved per sentence:  {fresh - pooled:7.1f} ms")
+
+    tts.close_clients()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
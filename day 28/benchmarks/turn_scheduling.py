@@ -0,0 +1,86 @@
+# benchmarks/turn_scheduling.py
+"""
+What happens to one session when final transcripts arrive back to back.
+
+BURST finals arrive GAP_MS apart (AssemblyAI splitting a sentence on pauses, or a fast talker)
+while the fake Gemini needs LLM_MS per reply. "unscheduled" starts a reply per final, like
+the old run_coroutine_threadsafe(handle_transcript(...)); the other rows use TurnScheduler
+with and without barge-in. We count LLM calls, the most that ran at once, and whether the
+chat history kept every exchange that was answered.
+
+Run from the `day 28` folder:
+    python -m benchmarks.turn_scheduling
+"""
+import asyncio
+import time
+
+from services.turns import TurnScheduler
+
+BURST = 3
+GAP_MS = 300
+LLM_MS = 1000
+ROUNDS = 3
+
+
+def fake_llm(text, history):
+    time.sleep(LLM_MS / 1000)
+    return history + [("user", text), ("model", f"answer to {text}")]
+
+
+async def run(mode: str):
+    loop = asyncio.get_running_loop()
+    chat_history = []
+    calls = {"started": 0, "running": 0, "max_running": 0, "answered": 0}
+
+    async def handle_transcript(text):
+        calls["started"] += 1
+        calls["running"] += 1
+        calls["max_running"] = max(calls["max_running"], calls["running"])
+        try:
+            updated = await loop.run_in_executor(None, fake_llm, text, list(chat_history))
+            chat_history.clear()
+            await asyncio.sleep(0)  # the old code could be interrupted between clear and extend
+            chat_history.extend(updated)
+            calls["answered"] += 1
+        finally:
+            calls["running"] -= 1
+
+    async def flush():
+        pass
+
+    scheduler = None
+    if mode != "unscheduled":
+        scheduler = TurnScheduler(handle_transcript, loop, on_interrupt=flush,
+                                  barge_in=mode == "barge-in", coalesce_ms=0, merge_window_ms=3000)
+        scheduler.start()
+
+    tasks = []
+    for round_number in range(ROUNDS):
+        for part in range(BURST):
+            text = f"q{round_number}.{part}"
+            if scheduler:
+                scheduler.submit(text)
+            else:
+                tasks.append(asyncio.create_task(handle_transcript(text)))
+            await asyncio.sleep(GAP_MS / 1000)
+        await asyncio.sleep(3 * LLM_MS / 1000)
+    await asyncio.gather(*tasks)
+    if scheduler:
+        await scheduler.close()
+
+    kept = len(chat_history) // 2
+    line = (f"{mode:<12} LLM calls {calls['started']:2d}   max in flight {calls['max_running']}   "
+            f"answered {calls['answered']:2d}   exchanges kept in history {kept:2d}")
+    if scheduler:
+        line += f"   coalesced {scheduler.coalesced}"
+    print(line)
+
+
+def main():
+    print(f"{ROUNDS} rounds of {BURST} finals {GAP_MS} ms apart, {LLM_MS} ms per LLM reply")
+    for mode in ("unscheduled", "queued", "barge-in"):
+        asyncio.run(run(mode))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# benchmarks/workers.py
+"""
+Reply throughput with 1 to N worker processes, sharing the TTS cache through SQLite.
+
+Each worker process is what `uvicorn main:app --workers N` would run: its own event loop, LLM
+pool and TTS pool, serving its share of SESSIONS concurrent sessions. A turn runs the /ws
+reply path with fakes at the edges: the user's audio goes through the voice activity gate,
+a fake Gemini streams one of a few canned replies (TOKEN_MS per word), and sentences are
+synthesized by a fake Murf (MURF_MS each) through the shared cache and sent as base64 JSON.
+Replies repeat across sessions, so a sentence synthesized by one worker is a cache hit in
+the others. The total work is the same in every row.
+
+Run from the `day 28` folder:
+    python -m benchmarks.workers
+"""
+import asyncio
+import io
+import multiprocessing
+import os
+import tempfile
+import time
+import wave
+
+SESSIONS = 16
+TURNS = 6
+TOKEN_MS = 15
+MURF_MS = 300
+USER_AUDIO_SECONDS = 3
+REPLIES = [
+    f"Ooh Mishka, story number {n} is about a hedgehog. He found a shiny red apple in the forest. "
+    f"Then he rolled it all the way home to share with the bear!"
+    for n in range(4)
+]
+
+
+def pcm_wav(seconds: float) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(24_000)
+        wav.writeframes(os.urandom(int(24_000 * 2 * seconds)))
+    return buffer.getvalue()
+
+
+def worker(index: int, sessions: int, start, results):
+    # Imported here so each process reads SHARED_CACHE from the environment set by main()
+    import config
+    from services import llm, tts, tts_pipeline
+    from services.framing import AudioSender
+    from services.segmenter import SentenceSegmenter
+    from services.tts_pipeline import TTSPipeline
+    from services.vad import VoiceActivityGate
+
+    clip = pcm_wav(1.5)
+    user_audio = os.urandom(16_000 * 2 * USER_AUDIO_SECONDS)
+    murf_calls = [0]
+
+    class FakeSpeech:
+        def stream(self, **kwargs):
+            murf_calls[0] += 1
+            time.sleep(MURF_MS / 1000)
+            for offset in range(0, len(clip), 8192):
+                yield clip[offset:offset + 8192]
+
+    class FakeMurf:
+        text_to_speech = FakeSpeech()
+
+    class FakeConversation(llm.Conversation):
+        def stream(self, user_query):
+            reply = REPLIES[hash(user_query) % len(REPLIES)]
+            for word in reply.split(" "):
+                time.sleep(TOKEN_MS / 1000)
+                yield word + " "
+            return llm.text_content("user", user_query), llm.text_content("model", reply)
+
+    class NullWebSocket:
+        async def send_json(self, data):
+            pass
+
+        async def send_text(self, data):
+            pass
+
+        async def send_bytes(self, data):
+            pass
+
+    config.MURF_API_KEY = "bench-key"
+    tts.get_client = lambda api_key: FakeMurf()
+
+    async def session(number: int):
+        gate = VoiceActivityGate()
+        conversation = FakeConversation(token_budget=0).open()
+        sender = AudioSender(NullWebSocket())
+        for turn in range(TURNS):
+            for offset in range(0, len(user_audio), 3200):
+                gate.process(user_audio[offset:offset + 3200])
+            speaker = TTSPipeline(sender)
+            segmenter = SentenceSegmenter()
+
+            async def on_text(chunk):
+                for sentence in segmenter.feed(chunk):
+                    await speaker.submit(sentence)
+
+            await llm.LLMStream(f"session {number} turn {turn}", conversation).consume(on_text)
+            for sentence in segmenter.flush():
+                await speaker.submit(sentence)
+            await speaker.close()
+
+    async def run():
+        await asyncio.gather(*(session(index * sessions + number) for number in range(sessions)))
+
+    start.wait()
+    started = time.perf_counter()
+    asyncio.run(run())
+    results.put((time.perf_counter() - started, sessions * TURNS, murf_calls[0]))
+    llm.executor.shutdown()
+    tts_pipeline.shutdown()
+
+
+def run(workers: int):
+    os.environ["SHARED_CACHE"] = "sqlite"
+    os.environ["SHARED_CACHE_DIR"] = tempfile.mkdtemp(prefix="bench_shared_cache_")
+    context = multiprocessing.get_context("spawn")
+    start = context.Barrier(workers)
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(index, SESSIONS // workers, start, results))
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    elapsed = max(seconds for seconds, _, _ in outcomes)
+    turns = sum(count for _, count, _ in outcomes)
+    murf_calls = sum(calls for _, _, calls in outcomes)
+    print(f"{workers} worker(s)  {turns / elapsed:6.2f} turns/s   all turns {elapsed:6.2f} s   "
+          f"Murf calls {murf_calls:3d} (one per distinct sentence would be {3 * len(REPLIES)})")
+
+
+def main():
+    print(f"{SESSIONS} sessions x {TURNS} turns, {os.cpu_count()} CPU(s) available")
+    for workers in (1, 2, 4):
+        run(workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,52 +1,140 @@
 # config.py
 import os
 from dotenv import load_dotenv
-import assemblyai as aai
-import google.generativeai as genai
 import logging
-import murf
-
-# Global variables for keys
-MURF_API_KEY = None
-ASSEMBLYAI_API_KEY = None
-GEMINI_API_KEY = None
-TAVILY_API_KEY = None
-NEWS_API_KEY = None
+from typing import Optional
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Default keys from .env, used by sessions that don't send their own. They are never changed
+# at runtime: keys sent from the UI live in that session's Credentials only.
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+ASSEMBLYAI_API_KEY = os.getenv("ASSEMBLYAI_API_KEY")
+MURF_API_KEY = os.getenv("MURF_API_KEY")
+
+# Load other non-user-configurable keys from .env
+TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
+NEWS_API_KEY = os.getenv("NEWS_API_KEY")
+
+for _name, _key in (
+        ("GEMINI_API_KEY", GEMINI_API_KEY), ("ASSEMBLYAI_API_KEY", ASSEMBLYAI_API_KEY), ("MURF_API_KEY", MURF_API_KEY)
+):
+    if not _key:
+        logging.warning(f"{_name} not found in .env. Sessions will need to provide it via the UI.")
+
 
-# --- Functions to manage API keys ---
-def set_api_keys(gemini_key=None, assemblyai_key=None, murf_key=None):
+class Credentials:
     """
-    Sets global API keys. Prioritizes provided keys, falls back to .env file.
+    The API keys one WebSocket session uses for AssemblyAI, Gemini and Murf.
+
+    Keys the UI didn't send fall back to the .env defaults. A Credentials object is never
+    changed; an api_keys message gives the session a new one, so a turn that is already
+    running finishes with the keys it started with.
     """
-    global GEMINI_API_KEY, ASSEMBLYAI_API_KEY, MURF_API_KEY
 
-    # Use provided keys if available, otherwise fall back to .env
-    GEMINI_API_KEY = gemini_key or os.getenv("GEMINI_API_KEY")
-    ASSEMBLYAI_API_KEY = assemblyai_key or os.getenv("ASSEMBLYAI_API_KEY")
-    MURF_API_KEY = murf_key or os.getenv("MURF_API_KEY")
+    __slots__ = ("gemini", "assemblyai", "murf")
 
-    # Configure APIs and log warnings
-    if ASSEMBLYAI_API_KEY:
-        aai.settings.api_key = ASSEMBLYAI_API_KEY
-    else:
-        logging.warning("ASSEMBLYAI_API_KEY not found. Please provide it via the UI or .env file.")
+    def __init__(self, gemini: Optional[str] = None, assemblyai: Optional[str] = None, murf: Optional[str] = None):
+        self.gemini = gemini or GEMINI_API_KEY
+        self.assemblyai = assemblyai or ASSEMBLYAI_API_KEY
+        self.murf = murf or MURF_API_KEY
 
-    if GEMINI_API_KEY:
-        genai.configure(api_key=GEMINI_API_KEY)
-    else:
-        logging.warning("GEMINI_API_KEY not found. Please provide it via the UI or .env file.")
+    @classmethod
+    def from_message(cls, message: dict) -> "Credentials":
+        """Reads the keys of an `{"type": "api_keys"}` message from the UI."""
+        return cls(gemini=message.get("gemini"), assemblyai=message.get("assemblyai"), murf=message.get("murf"))
 
-    if not MURF_API_KEY:
-        logging.warning("MURF_API_KEY not found. Please provide it via the UI or .env file.")
+    def __repr__(self):
+        # Only says which keys are set, so credentials can be logged safely
+        present = [name for name in self.__slots__ if getattr(self, name)]
+        return f"Credentials({', '.join(present) or 'none'})"
 
 
-# Set initial keys from .env on startup
-set_api_keys()
+# --- TTS pipeline tuning ---
+# Murf API host; override to point the TTS client at a local stand-in server
+MURF_BASE_URL = os.getenv("MURF_BASE_URL") or None
+# Worker threads shared by every session for Murf synthesis (kept off the default executor)
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "8"))
+# Sentences one reply may have synthesizing or waiting to be sent at the same time
+TTS_MAX_IN_FLIGHT = int(os.getenv("TTS_MAX_IN_FLIGHT", "3"))
 
-# Load other non-user-configurable keys from .env
-TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
-NEWS_API_KEY = os.getenv("NEWS_API_KEY")
\ No newline at end of file
+# Keep a copy of every synthesized sentence in uploads/ (one file per session and sentence)
+TTS_SAVE_AUDIO = os.getenv("TTS_SAVE_AUDIO", "").lower() in ("1", "true", "yes")
+
+# --- Caches shared by all worker processes on the host ---
+# "files" keeps one file per entry in a folder; "sqlite" keeps each cache in a SQLite database,
+# which holds its size budget across workers (recommended with uvicorn --workers N)
+SHARED_CACHE = os.getenv("SHARED_CACHE", "files").lower()
+SHARED_CACHE_DIR = os.getenv("SHARED_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "shared_cache"))
+
+# --- TTS audio cache ---
+TTS_CACHE_MEMORY_MB = int(os.getenv("TTS_CACHE_MEMORY_MB", "32"))
+# Size of the shared tier; set TTS_CACHE_DISK_MB=0 to keep the cache in memory only
+TTS_CACHE_DISK_MB = int(os.getenv("TTS_CACHE_DISK_MB", "256"))
+# Folder of the shared tier when SHARED_CACHE is "files"
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "audio_cache"))
+
+# --- News lookups ---
+# NewsAPI results are reused for this long, by every worker (0 disables the cache)
+NEWS_CACHE_SECONDS = int(os.getenv("NEWS_CACHE_SECONDS", "300"))
+
+# --- Pre-rendered roast audio ---
+# "load" uses an existing pack, "build" also renders a missing one at startup, "off" disables it
+ROAST_PACK = os.getenv("ROAST_PACK", "load").lower()
+ROAST_PACK_DIR = os.getenv("ROAST_PACK_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "audio_packs"))
+
+# --- Voice activity gate in front of AssemblyAI ---
+VAD_ENABLED = os.getenv("VAD_ENABLED", "1").lower() in ("1", "true", "yes")
+# Minimum RMS (0-1 full scale) counted as speech, and how far above the noise floor speech must be
+VAD_ENERGY_THRESHOLD = float(os.getenv("VAD_ENERGY_THRESHOLD", "0.01"))
+VAD_NOISE_RATIO = float(os.getenv("VAD_NOISE_RATIO", "3.0"))
+# Zero-crossing rate above which a quieter frame still counts as speech (fricatives)
+VAD_ZCR_THRESHOLD = float(os.getenv("VAD_ZCR_THRESHOLD", "0.25"))
+# Speech this long is an onset; shorter bursts (clicks, bumps) are treated as noise
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", "150"))
+# Pauses shorter than this are part of the same utterance; a longer one ends it
+VAD_HANGOVER_MS = int(os.getenv("VAD_HANGOVER_MS", "300"))
+# Silence still forwarded after speech; keep it above AssemblyAI's max turn silence (2.4 s) so turns still end
+VAD_TAIL_MS = int(os.getenv("VAD_TAIL_MS", "2600"))
+# Suppressed audio replayed when speech starts; keep it above VAD_MIN_SPEECH_MS
+VAD_PRE_ROLL_MS = int(os.getenv("VAD_PRE_ROLL_MS", "300"))
+# During long silences one frame is still forwarded this often to keep the session alive
+VAD_KEEPALIVE_MS = int(os.getenv("VAD_KEEPALIVE_MS", "1000"))
+
+# --- Speech to text ---
+# Audio kept while the AssemblyAI session is still connecting (default: 5 s of 16 kHz PCM16)
+STT_CONNECT_BUFFER_BYTES = int(os.getenv("STT_CONNECT_BUFFER_BYTES", str(16000 * 2 * 5)))
+# Live captions: interim transcripts are sent at most once per interval, and only when changed
+PARTIAL_TRANSCRIPTS = os.getenv("PARTIAL_TRANSCRIPTS", "1") == "1"
+PARTIAL_MIN_INTERVAL_MS = int(os.getenv("PARTIAL_MIN_INTERVAL_MS", "200"))
+# Threads for Gemini calls; a streamed reply holds one for its whole duration
+LLM_WORKERS = int(os.getenv("LLM_WORKERS", "16"))
+# History sent to Gemini is kept under this many (estimated) tokens; older turns are folded into
+# a running summary of at most LLM_SUMMARY_WORDS words, written in the background (0: no limit)
+LLM_HISTORY_TOKENS = int(os.getenv("LLM_HISTORY_TOKENS", "2000"))
+LLM_SUMMARY_WORDS = int(os.getenv("LLM_SUMMARY_WORDS", "150"))
+# Speculative LLM prefetch (opt-in): start the reply once the interim transcript has been stable
+# this long, and keep it if the final transcript says the same thing
+LLM_SPECULATION = os.getenv("LLM_SPECULATION", "0") == "1"
+LLM_SPECULATION_STABLE_MS = int(os.getenv("LLM_SPECULATION_STABLE_MS", "500"))
+LLM_SPECULATION_MIN_WORDS = int(os.getenv("LLM_SPECULATION_MIN_WORDS", "3"))
+# Barge-in: a new user turn cancels the reply in progress and flushes the client's audio;
+# with BARGE_IN_ON_SPEECH, so does the voice activity gate detecting speech mid-reply
+BARGE_IN = os.getenv("BARGE_IN", "1") == "1"
+BARGE_IN_ON_SPEECH = os.getenv("BARGE_IN_ON_SPEECH", "1") == "1"
+# Turn scheduling: final transcripts waiting together are answered as one turn; optionally wait
+# this long for more before answering. A reply cut off by a turn arriving within the merge
+# window is answered together with it.
+TURN_COALESCE_MS = int(os.getenv("TURN_COALESCE_MS", "0"))
+TURN_MERGE_WINDOW_MS = int(os.getenv("TURN_MERGE_WINDOW_MS", "3000"))
+# Per-session queue between the browser socket and AssemblyAI (default cap: 2 s of 16 kHz PCM16).
+# Overflow policy: drop_oldest, drop_newest or block (stop reading the socket until there is room).
+AUDIO_INGRESS_MAX_BYTES = int(os.getenv("AUDIO_INGRESS_MAX_BYTES", str(16000 * 2 * 2)))
+AUDIO_INGRESS_POLICY = os.getenv("AUDIO_INGRESS_POLICY", "drop_oldest").lower()
+# Queued frames are merged into uploads of up to this size (0 disables coalescing)
+AUDIO_INGRESS_COALESCE_BYTES = int(os.getenv("AUDIO_INGRESS_COALESCE_BYTES", str(16000 * 2 // 2)))
+# Warm pool of pre-connected sessions per API key (0 disables it; open sessions are billed)
+STT_POOL_SIZE = int(os.getenv("STT_POOL_SIZE", "0"))
+STT_POOL_MAX = int(os.getenv("STT_POOL_MAX", "20"))
+STT_POOL_IDLE_SECONDS = float(os.getenv("STT_POOL_IDLE_SECONDS", "60"))
@@ -2,22 +2,57 @@
 from fastapi import FastAPI, Request, WebSocket
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from contextlib import asynccontextmanager
 import logging
 import asyncio
-import base64
-import re
 import json
+import os
+from uuid import uuid4
 
 # Import services and config
 import config
-from services import stt, llm, tts
+from services import llm, tts, tts_pipeline, roast_pack
+from services.stt_pool import pool as stt_pool
+from services.segmenter import SentenceSegmenter, split_sentences
+from services.tts_pipeline import TTSPipeline
+from services.framing import AudioSender
+from services.vad import VoiceActivityGate
+from services.audio_ingress import AudioIngressQueue
+from services.partials import PartialTranscriptThrottle
+from services.speculation import SpeculativePrefetcher
+from services.turns import TurnScheduler
 # Import the roast-related functions
-from services.roast import should_roast_user, format_roast_response
+from services.roast import should_roast_user, compose_roast_response
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-app = FastAPI()
+
+def _log_warm_up_error(future):
+    # Nobody awaits the warm-up, so a failure would otherwise go unnoticed
+    if not future.cancelled() and future.exception():
+        logging.error(f"Roast pack warm-up failed: {future.exception()}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Loads the roast audio pack and warms STT sessions on startup; releases pooled resources on shutdown."""
+    if config.ROAST_PACK != "off":
+        # Runs in the background so a pack build never delays startup
+        warm_up = asyncio.get_running_loop().run_in_executor(None, roast_pack.warm_up, config.ROAST_PACK == "build")
+        warm_up.add_done_callback(_log_warm_up_error)
+    stt_pool.start(warm_key=config.ASSEMBLYAI_API_KEY)
+    yield
+    await stt_pool.close()
+    llm.executor.shutdown()
+    tts_pipeline.shutdown()
+    tts.close_clients()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Audio ingress queues of the connected sessions, by session id, for /stats
+ingress_queues = {}
 
 # Mount static files for CSS/JS
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -30,6 +65,20 @@ async def home(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 
+@app.get("/stats")
+async def stats():
+    """Reports cache, pool and per-session queue counters so they can be checked on a running server."""
+    return {
+        # Each uvicorn worker has its own counters; the pid tells them apart
+        "worker": os.getpid(),
+        "tts_cache": tts.audio_cache.stats(),
+        "stt_pool": stt_pool.stats(),
+        "llm_executor": llm.executor.stats(),
+        "llm_models": llm.model_stats,
+        "audio_ingress": {session_id: queue.stats() for session_id, queue in ingress_queues.items()},
+    }
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """Handles WebSocket connection for real-time transcription and voice response."""
@@ -37,52 +86,158 @@ async def websocket_endpoint(websocket: WebSocket):
     logging.info("WebSocket client connected.")
 
     loop = asyncio.get_event_loop()
-    chat_history = []
+    session_id = uuid4().hex
+    # This socket's API keys (the .env defaults until the UI sends its own); never shared with other sockets
+    credentials = config.Credentials()
+    # The Gemini chat for this socket, kept across turns and dropped when the socket closes
+    conversation = llm.Conversation(api_key=credentials.gemini).open()
     transcriber = None # Initialize transcriber as None
+    # Tells the client if the AssemblyAI handshake of the current transcriber fails
+    stt_watch = None
+    # Audio goes out as base64 JSON unless the client negotiates binary frames
+    audio_sender = AudioSender(websocket)
+    # Long silences are thinned out before they reach AssemblyAI
+    vad_gate = VoiceActivityGate() if config.VAD_ENABLED else None
+    # Opt-in: the LLM request may start on a stable partial transcript, before end of turn
+    speculator = SpeculativePrefetcher(
+        conversation, loop, should_speculate=lambda text: not should_roast_user(text)["is_roast_request"]
+    ) if config.LLM_SPECULATION else None
+
+    def forward_audio(chunk: bytes):
+        # Runs in a worker thread; the transcriber may have been swapped by an api_keys message
+        if transcriber:
+            transcriber.stream_audio(chunk)
+
+    # Uploads to AssemblyAI happen off the receive loop, from a bounded queue
+    ingress = AudioIngressQueue(forward_audio)
+    ingress.start()
+    ingress_queues[session_id] = ingress
 
     async def handle_transcript(text: str):
-        """Processes the final transcript, gets LLM and TTS responses, and streams audio."""
-        await websocket.send_json({"type": "final", "text": text})
+        """Processes the final transcript, streams the LLM reply into TTS sentence by sentence."""
+        # TTS runs alongside generation: sentences synthesize in parallel and play in order
+        save_prefix = f"{session_id}_{uuid4().hex[:8]}" if config.TTS_SAVE_AUDIO else None
+        speaker = TTSPipeline(audio_sender, save_prefix=save_prefix, api_key=credentials.murf)
+        stream = None
         try:
+            # A reply prefetched from the partial transcript is used if it answers this exact text.
+            # Taken inside the try, so a barge-in during the send below still cancels it.
+            stream = await speculator.take(text) if speculator else None
+            await websocket.send_json({"type": "final", "text": text})
+
             # Check if the user's query is a roast request
             roast_info = should_roast_user(text)
 
             if roast_info["is_roast_request"]:
                 # If it's a roast request, get the response from the roast module
-                full_response = format_roast_response(roast_info)
+                full_response, segments = compose_roast_response(roast_info)
                 # The chat history is not updated for roasts as they are a special, one-off response
-            else:
-                # If not a roast, proceed with the normal LLM logic
-                full_response, updated_history = llm.get_llm_response(text, chat_history)
-                # Update history for the next turn
-                chat_history.clear()
-                chat_history.extend(updated_history)
-
-            # Send the full text response to the UI
-            await websocket.send_json({"type": "assistant", "text": full_response})
-
-            # 2. Split the response into sentences
-            sentences = re.split(r'(?<=[.?!])\s+', full_response.strip())
-
-            # 3. Process each sentence for TTS and stream audio back
-            for sentence in sentences:
-                if sentence.strip():
-                    # Run the blocking TTS function in a separate thread
-                    audio_bytes = await loop.run_in_executor(
-                        None, tts.speak, sentence.strip()
-                    )
+                await websocket.send_json({"type": "assistant", "text": full_response})
+                # Shown in full, so a barge-in from here on doesn't ask for the roast again
+                turns.mark_answered()
+                for segment in segments:
+                    # Canned segments are pre-rendered; only synthesize what the pack doesn't have
+                    audio_bytes = roast_pack.lookup(segment)
                     if audio_bytes:
-                        b64_audio = base64.b64encode(audio_bytes).decode('utf-8')
-                        await websocket.send_json({"type": "audio", "b64": b64_audio})
+                        await speaker.submit_audio(audio_bytes)
+                    else:
+                        for sentence in split_sentences(segment):
+                            await speaker.submit(sentence)
+            else:
+                # If not a roast, stream the LLM reply and hand each sentence to TTS as it completes
+                segmenter = SentenceSegmenter()
+                spoken = []
+
+                async def on_text(chunk: str):
+                    for sentence in segmenter.feed(chunk):
+                        spoken.append(sentence)
+                        await speaker.submit(sentence)
+                        # Show the reply growing in the UI while it is being generated
+                        await websocket.send_json({"type": "assistant", "text": " ".join(spoken)})
+
+                stream = stream or llm.LLMStream(text, conversation)
+                # The finished exchange is appended to the conversation; nothing is copied
+                full_response = await stream.consume(on_text)
+                if stream.committed:
+                    # The exchange is in the history; a barge-in during TTS must not ask it again
+                    turns.mark_answered()
+                for sentence in segmenter.flush():
+                    await speaker.submit(sentence)
+
+                # Send the full text response to the UI
+                await websocket.send_json({"type": "assistant", "text": full_response})
 
+        except asyncio.CancelledError:
+            # Barge-in: stop paying for a reply nobody will hear
+            if stream:
+                stream.cancel()
+            speaker.cancel()
+            raise
         except Exception as e:
             logging.error(f"Error in LLM/TTS pipeline: {e}")
+            if stream:
+                # E.g. the socket closed mid-reply: stop reading a reply nobody will get
+                stream.cancel()
             # The error message should also be in character now
             await websocket.send_json({"type": "llm", "text": "Oh honey, my brain's a bit fried. What were you saying?"})
+        finally:
+            if speculator:
+                speculator.end_turn(stream)
+            if not speaker.cancelled:
+                try:
+                    await speaker.close()
+                except asyncio.CancelledError:
+                    # Barge-in while the last sentences are still being spoken
+                    speaker.cancel()
+                    raise
+                except Exception as e:
+                    logging.error(f"Error while streaming TTS audio: {e}")
+
+    # Final transcripts are answered one at a time, in order; a new one cuts off the current reply
+    turns = TurnScheduler(
+        handle_transcript, loop, on_interrupt=audio_sender.flush, is_playing=lambda: audio_sender.is_playing
+    )
+    turns.start()
+
+    async def report_stt_failure(stt_session):
+        nonlocal transcriber
+        try:
+            await stt_session.connecting
+            return
+        except Exception:
+            pass
+        if stt_session is not transcriber:
+            # Replaced by a newer api_keys message meanwhile
+            return
+        # Audio is not worth queueing until the client sends working keys
+        transcriber = None
+        try:
+            await websocket.send_json({
+                "type": "error",
+                "source": "stt",
+                "text": "Could not connect to AssemblyAI. Check your AssemblyAI API key and try again.",
+            })
+        except Exception as e:
+            logging.info(f"Could not report the STT failure, the socket is gone: {e}")
+
+    async def send_partial(text: str):
+        await websocket.send_json({"type": "partial", "text": text})
+
+    # Live captions, throttled and deduplicated; None turns them off
+    partials = PartialTranscriptThrottle(send_partial, loop) if config.PARTIAL_TRANSCRIPTS else None
+
+    def on_partial_transcript(text: str):
+        if partials:
+            partials.offer(text)
+        if speculator:
+            speculator.offer(text)
 
     def on_final_transcript(text: str):
         logging.info(f"Final transcript received: {text}")
-        asyncio.run_coroutine_threadsafe(handle_transcript(text), loop)
+        if partials:
+            # Queued ahead of the final message, so no stale caption can follow it
+            partials.reset()
+        turns.submit(text)
 
     try:
         while True:
@@ -90,20 +245,29 @@ async def websocket_endpoint(websocket: WebSocket):
             if data["type"] == "websocket.receive" and "text" in data:
                 message = json.loads(data["text"])
                 if message.get("type") == "api_keys":
-                    logging.info("Received API keys from frontend, updating configuration.")
-                    config.set_api_keys(
-                        gemini_key=message.get("gemini"),
-                        assemblyai_key=message.get("assemblyai"),
-                        murf_key=message.get("murf")
-                    )
+                    # Only this session's keys change; a reply already running keeps the ones it started with
+                    credentials = config.Credentials.from_message(message)
+                    conversation.api_key = credentials.gemini
+                    logging.info(f"Received API keys from frontend for this session: {credentials}")
                     # Re-initialize transcriber with new key
                     if transcriber:
-                        transcriber.close()
+                        # Closing waits for AssemblyAI to confirm, so keep it off the event loop
+                        await loop.run_in_executor(None, transcriber.close)
                     # CRITICAL FIX: The transcriber is now created only after the API key is received.
-                    transcriber = stt.AssemblyAIStreamingTranscriber(
-                        api_key=config.ASSEMBLYAI_API_KEY,
+                    # A pre-connected session is used if one is ready; otherwise the handshake runs
+                    # in the background and audio that arrives meanwhile is buffered.
+                    transcriber = stt_pool.acquire(
+                        api_key=credentials.assemblyai,
+                        on_partial_callback=on_partial_transcript,
                         on_final_callback=on_final_transcript
                     )
+                    if transcriber.connecting:
+                        # A failed handshake closes the transcriber, which then drops all audio
+                        stt_watch = asyncio.create_task(report_stt_failure(transcriber))
+                elif message.get("type") == "audio_mode":
+                    if audio_sender.set_mode(message.get("mode")):
+                        logging.info(f"Audio delivery mode set to {audio_sender.mode}.")
+                        await websocket.send_json({"type": "audio_mode", "mode": audio_sender.mode})
                 else:
                     # This case handles a text message that is not an API key update,
                     # which is not expected but good to have.
@@ -112,10 +276,37 @@ async def websocket_endpoint(websocket: WebSocket):
             else:
                 # Assume it's audio data if transcriber is ready
                 if transcriber:
-                    transcriber.stream_audio(data["bytes"])
+                    if vad_gate:
+                        onsets = vad_gate.speech_onsets
+                        for frame in vad_gate.process(data["bytes"]):
+                            await ingress.put(frame)
+                        if turns.barge_in and config.BARGE_IN_ON_SPEECH and vad_gate.speech_onsets > onsets:
+                            # The user started talking over the reply
+                            await turns.interrupt("speech")
+                    else:
+                        await ingress.put(data["bytes"])
     except Exception as e:
         logging.info(f"WebSocket connection closed: {e}")
     finally:
+        await turns.close()
+        if stt_watch:
+            stt_watch.cancel()
+        ingress_queues.pop(session_id, None)
+        # The client is gone, so audio still queued is not worth uploading
+        await ingress.close(drain=False)
         if transcriber:
-            transcriber.close()
+            await loop.run_in_executor(None, transcriber.close)
+        logging.info(f"Audio ingress stats: {ingress.stats()}")
+        logging.info(f"Audio delivery stats: {audio_sender.stats()}")
+        logging.info(f"Turn stats: {turns.stats()}")
+        if vad_gate:
+            logging.info(f"Voice activity gate stats: {vad_gate.stats()}")
+        if partials:
+            partials.close()
+            logging.info(f"Partial transcript stats: {partials.stats()}")
+        if speculator:
+            speculator.close()
+            logging.info(f"LLM speculation stats: {speculator.stats()}")
+        logging.info(f"Conversation stats: {conversation.stats()}")
+        conversation.close()
         logging.info("Transcription resources released.")
\ No newline at end of file
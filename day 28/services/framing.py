@@ -0,0 +1,254 @@
+# services/framing.py
+"""
+Audio delivery over the /ws socket.
+
+Two modes, picked per connection:
+- "json":   {"type": "audio", "b64": "<base64 WAV>"}  (default, what older clients expect)
+- "binary": binary WebSocket messages, an 8 byte header followed by the raw audio
+
+Binary header (network byte order):
+    version      1 byte
+    codec        1 byte   (1 = WAV clip, 2 = raw PCM16 little endian)
+    sentence     2 bytes  index of the sentence within its reply
+    sequence     4 bytes  running frame counter for the connection
+
+In binary mode WAV streams from Murf are unwrapped and forwarded as PCM16 frames the moment
+they arrive, so the client can start playing before the sentence has finished synthesizing.
+Before the first PCM frame of a sentence the server sends
+{"type": "audio_format", "sentence": n, "codec": "pcm16", "sample_rate": ..., "channels": ...}.
+Audio that isn't a PCM WAV is sent whole as a single WAV frame instead.
+
+A client opts in by sending {"type": "audio_mode", "mode": "binary"}; the server answers with
+the same message once the switch is made.
+
+{"type": "flush"} tells the client to drop everything it has queued or is playing (barge-in).
+"""
+import base64
+import json
+import logging
+import struct
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct("!BBHI")
+FRAME_VERSION = 1
+CODEC_WAV = 1
+CODEC_PCM16 = 2
+
+MODE_JSON = "json"
+MODE_BINARY = "binary"
+MODES = (MODE_JSON, MODE_BINARY)
+
+
+def encode_audio_frame(sequence: int, sentence_index: int, audio: bytes, codec: int = CODEC_WAV) -> bytes:
+    return HEADER.pack(FRAME_VERSION, codec, sentence_index & 0xFFFF, sequence & 0xFFFFFFFF) + audio
+
+
+def decode_audio_frame(frame: bytes) -> Tuple[int, int, int, bytes]:
+    """Returns (sequence, sentence_index, codec, audio)."""
+    version, codec, sentence_index, sequence = HEADER.unpack_from(frame)
+    if version != FRAME_VERSION:
+        raise ValueError(f"Unsupported audio frame version {version}")
+    return sequence, sentence_index, codec, frame[HEADER.size:]
+
+
+def encode_audio_json(audio: bytes) -> str:
+    # Same compact encoding starlette's send_json uses
+    return json.dumps({"type": "audio", "b64": base64.b64encode(audio).decode("utf-8")}, separators=(",", ":"))
+
+
+class WavStream:
+    """
+    Unwraps a streamed WAV clip into raw PCM as the bytes come in.
+
+    Chunks are buffered until the "data" chunk starts; after that every feed returns the new
+    samples, cut on whole-frame boundaries. Anything that isn't 16-bit PCM WAV is flagged as
+    `passthrough` and simply collected, so it can be sent as one clip at the end.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._in_data = False
+        self.passthrough = False
+        self.sample_rate: Optional[int] = None
+        self.channels: Optional[int] = None
+        self._block_align = 2
+
+    @property
+    def has_format(self) -> bool:
+        return self._in_data
+
+    def feed(self, chunk: bytes) -> bytes:
+        self._buffer += chunk
+        if self.passthrough:
+            return b""
+        if not self._in_data and not self._parse_header():
+            return b""
+        usable = len(self._buffer) - len(self._buffer) % self._block_align
+        pcm = bytes(self._buffer[:usable])
+        del self._buffer[:usable]
+        return pcm
+
+    def remaining(self) -> bytes:
+        """Whatever was collected but not returned (the whole clip in passthrough mode)."""
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+    def _parse_header(self) -> bool:
+        buffer = self._buffer
+        if len(buffer) < 12:
+            return False
+        if buffer[:4] != b"RIFF" or buffer[8:12] != b"WAVE":
+            self.passthrough = True
+            return False
+
+        offset = 12
+        while len(buffer) >= offset + 8:
+            chunk_id = bytes(buffer[offset:offset + 4])
+            (chunk_size,) = struct.unpack_from("<I", buffer, offset + 4)
+            if chunk_id == b"data":
+                if self.sample_rate is None:
+                    self.passthrough = True
+                    return False
+                # Streamed WAVs often carry a placeholder data size, so everything after this is audio
+                del buffer[:offset + 8]
+                self._in_data = True
+                return True
+            if len(buffer) < offset + 8 + chunk_size:
+                return False
+            if chunk_id == b"fmt ":
+                audio_format, channels, sample_rate, _, block_align, bits = struct.unpack_from("<HHIIHH", buffer, offset + 8)
+                if audio_format != 1 or bits != 16:
+                    self.passthrough = True
+                    return False
+                self.channels = channels
+                self.sample_rate = sample_rate
+                self._block_align = block_align
+            offset += 8 + chunk_size + (chunk_size & 1)
+        return False
+
+
+def wav_duration(audio: bytes) -> float:
+    """Playing time of a PCM16 WAV clip in seconds (0 for anything else)."""
+    stream = WavStream()
+    pcm = stream.feed(audio)
+    if not stream.sample_rate:
+        return 0.0
+    return len(pcm) / (stream.sample_rate * 2 * stream.channels)
+
+
+class AudioSender:
+    """Sends synthesized audio to one client in its negotiated mode and counts what it costs."""
+
+    def __init__(self, websocket, mode: str = MODE_JSON):
+        self.websocket = websocket
+        self.mode = mode
+        self.sequence = 0
+        self.frames = 0
+        self.audio_bytes = 0
+        self.wire_bytes = 0
+        self.encode_seconds = 0.0
+        self.flushes = 0
+        # When the client should run out of audio, assuming it plays everything as it arrives
+        self._playback_ends_at = 0.0
+        # Per sentence: collected chunks (JSON mode) or the WAV being unwrapped (binary mode)
+        self._clips: Dict[int, List[bytes]] = {}
+        self._streams: Dict[int, WavStream] = {}
+
+    def set_mode(self, mode: str) -> bool:
+        if mode not in MODES:
+            logger.warning(f"Ignoring unknown audio mode: {mode}")
+            return False
+        self.mode = mode
+        return True
+
+    async def send(self, audio: bytes, sentence_index: int = 0):
+        """Sends a complete clip."""
+        await self.send_chunk(audio, sentence_index)
+        await self.end_sentence(sentence_index)
+
+    async def send_chunk(self, chunk: bytes, sentence_index: int):
+        """Forwards part of a sentence's audio (binary mode) or holds it until the sentence ends (JSON mode)."""
+        if self.mode != MODE_BINARY:
+            self._clips.setdefault(sentence_index, []).append(chunk)
+            return
+
+        stream = self._streams.get(sentence_index)
+        if stream is None:
+            stream = self._streams[sentence_index] = WavStream()
+        announced = stream.has_format
+        pcm = stream.feed(chunk)
+        if stream.has_format and not announced:
+            await self.websocket.send_json({
+                "type": "audio_format",
+                "sentence": sentence_index,
+                "codec": "pcm16",
+                "sample_rate": stream.sample_rate,
+                "channels": stream.channels,
+            })
+        if pcm:
+            self._add_playback(len(pcm) / (stream.sample_rate * 2 * stream.channels))
+            await self._send_frame(pcm, sentence_index, CODEC_PCM16)
+
+    async def end_sentence(self, sentence_index: int):
+        if self.mode != MODE_BINARY:
+            audio = b"".join(self._clips.pop(sentence_index, []))
+            if audio:
+                await self._send_json_clip(audio)
+            return
+
+        stream = self._streams.pop(sentence_index, None)
+        if stream is not None and stream.passthrough:
+            audio = stream.remaining()
+            if audio:
+                self._add_playback(wav_duration(audio))
+                await self._send_frame(audio, sentence_index, CODEC_WAV)
+
+    @property
+    def is_playing(self) -> bool:
+        """Best guess whether the client is still playing audio we sent."""
+        return time.monotonic() < self._playback_ends_at
+
+    async def flush(self):
+        """Forgets partly sent sentences and tells the client to stop and drop queued audio."""
+        self._clips.clear()
+        self._streams.clear()
+        self._playback_ends_at = 0.0
+        self.flushes += 1
+        await self.websocket.send_json({"type": "flush"})
+
+    def _add_playback(self, seconds: float):
+        self._playback_ends_at = max(self._playback_ends_at, time.monotonic()) + seconds
+
+    async def _send_json_clip(self, audio: bytes):
+        self._add_playback(wav_duration(audio))
+        started = time.process_time()
+        payload = encode_audio_json(audio)
+        self._count(audio, payload, started)
+        await self.websocket.send_text(payload)
+
+    async def _send_frame(self, audio: bytes, sentence_index: int, codec: int):
+        started = time.process_time()
+        payload = encode_audio_frame(self.sequence, sentence_index, audio, codec)
+        self._count(audio, payload, started)
+        await self.websocket.send_bytes(payload)
+
+    def _count(self, audio: bytes, payload, started: float):
+        self.encode_seconds += time.process_time() - started
+        self.sequence += 1
+        self.frames += 1
+        self.audio_bytes += len(audio)
+        self.wire_bytes += len(payload)
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "frames": self.frames,
+            "audio_bytes": self.audio_bytes,
+            "wire_bytes": self.wire_bytes,
+            "encode_ms": round(1000 * self.encode_seconds, 2),
+            "flushes": self.flushes,
+        }
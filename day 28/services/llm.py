@@ -1,22 +1,22 @@
 # services/llm.py
 
 import google.generativeai as genai
-import os
-from typing import List, Dict, Any, Tuple
+from google.ai import generativelanguage as glm
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Tuple, Generator, Callable, Awaitable, Optional
+import config
 from . import news  # Import the news service
+from .history import HistoryWindow, estimate_tokens
+from .timed_executor import TimedExecutor
 
 # Configure logging
 import logging
 
 logger = logging.getLogger(__name__)
 
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-else:
-    print("Warning: GEMINI_API_KEY not found in .env file.")
-
 system_instructions = """
 You are Masha from the cartoon 'Masha and the Bear'. You are a very curious, energetic, and playful little girl.
 
@@ -37,57 +37,336 @@ Goal: Help the user with their questions while staying in character as Masha.
 """
 
 
-def get_llm_response(user_query: str, history: List[Dict[str, Any]]) -> Tuple[str, List[Dict[str, Any]]]:
-    """Gets a response from the Gemini LLM and updates chat history."""
-    try:
-        # Check if user is asking for news
-        enhanced_query = user_query
-
-        if news.should_fetch_news(user_query):
-            logger.info("User query detected as news-related, fetching latest news...")
-
-            # Try to fetch relevant news
-            if "technology" in user_query.lower() or "tech" in user_query.lower():
-                articles = news.fetch_top_headlines(category="technology")
-            elif "sports" in user_query.lower():
-                articles = news.fetch_top_headlines(category="sports")
-            elif "health" in user_query.lower():
-                articles = news.fetch_top_headlines(category="health")
-            elif "business" in user_query.lower():
-                articles = news.fetch_top_headlines(category="business")
-            elif "science" in user_query.lower():
-                articles = news.fetch_top_headlines(category="science")
-            else:
-                # Search for specific keywords or get general headlines
-                search_terms = extract_search_terms(user_query)
-                if search_terms:
-                    articles = news.search_news(search_terms)
-                else:
-                    articles = news.fetch_top_headlines()
-
-            if articles:
-                news_context = news.format_news_for_llm(articles)
-                enhanced_query = f"""
-                User asked: {user_query}
-
-                Here's some current news information that might be relevant:
-                {news_context}
-
-                Please respond to the user's question using this news information if relevant, 
-                but stay in character as Masha and make it sound exciting and fun!
-                """
-                logger.info(f"Enhanced query with {len(articles)} news articles")
+# Gemini calls block a thread for the whole reply; a dedicated, bounded pool keeps them from
+# starving the event loop's default executor and shows (via stats) when sessions queue for it
+executor = TimedExecutor(max_workers=config.LLM_WORKERS, thread_name_prefix="llm")
+
+MODEL_NAME = "gemini-1.5-flash"
+
+# GenerativeModel objects, reused across turns and sessions, least recently used first.
+# Keyed by (model name, system instruction, API key) and bound to that key's client, so a
+# model is never shared between keys.
+MAX_MODELS = 16
+_models: "OrderedDict[Tuple[str, str, str], genai.GenerativeModel]" = OrderedDict()
+# Gemini clients, one per API key. genai.configure() would switch the key for the whole
+# process, so each session's key gets its own client instead.
+MAX_CLIENTS = 8
+_clients: "OrderedDict[str, glm.GenerativeServiceClient]" = OrderedDict()
+_models_lock = threading.Lock()
+model_stats = {"hits": 0, "builds": 0, "clients": 0}
+
+
+def get_model(
+        api_key: Optional[str] = None,
+        model_name: str = MODEL_NAME,
+        system_instruction: str = system_instructions,
+) -> genai.GenerativeModel:
+    """Returns the shared GenerativeModel for this model, persona and key, building it on first use."""
+    api_key = api_key or config.GEMINI_API_KEY
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY is not configured.")
+    key = (model_name, system_instruction, api_key)
+    with _models_lock:
+        model = _models.get(key)
+        if model is not None:
+            _models.move_to_end(key)
+            model_stats["hits"] += 1
+            return model
+
+        model = genai.GenerativeModel(model_name, system_instruction=system_instruction)
+        _bind_client(model, _get_client(api_key))
+        _models[key] = model
+        model_stats["builds"] += 1
+        if len(_models) > MAX_MODELS:
+            _models.popitem(last=False)
+        return model
+
+
+def _bind_client(model: genai.GenerativeModel, client: glm.GenerativeServiceClient):
+    """
+    Makes `model` send its requests through `client`. The SDK has no public way to do that,
+    so this sets its `_client` attribute, which the pinned version in requirements.txt reads.
+    A version without it fails here, instead of quietly using the process-wide default key.
+    """
+    if getattr(model, "_client", False) is not None:
+        raise RuntimeError(
+            f"google-generativeai {genai.__version__} can't be bound to a per-key client; "
+            "install the version pinned in requirements.txt"
+        )
+    model._client = client
+
+
+def _get_client(api_key: str) -> glm.GenerativeServiceClient:
+    # Caller holds _models_lock
+    client = _clients.get(api_key)
+    if client is not None:
+        _clients.move_to_end(api_key)
+        return client
+
+    client = glm.GenerativeServiceClient(client_options={"api_key": api_key})
+    _clients[api_key] = client
+    model_stats["clients"] += 1
+    if len(_clients) > MAX_CLIENTS:
+        # Models still holding the evicted client keep working until they are evicted too
+        _clients.popitem(last=False)
+    return client
+
+
+SUMMARY_INSTRUCTIONS = f"""
+You keep short notes about a conversation between a user and Masha, a playful voice assistant.
+Merge the new messages into the existing notes. Keep names, facts the user shared about
+themselves, open questions and anything Masha promised; drop greetings and small talk.
+Write plain sentences in the third person, at most {config.LLM_SUMMARY_WORDS} words.
+"""
+
+
+def summarize_history(api_key: Optional[str], summary: str, lines: List[str]) -> str:
+    """Folds `lines` (rendered old messages) into the running conversation summary. Blocking."""
+    prompt = f"Notes so far:\n{summary or '(none)'}\n\nNew messages:\n" + "\n".join(lines)
+    response = get_model(api_key, system_instruction=SUMMARY_INSTRUCTIONS).generate_content(prompt)
+    return response.text
+
+
+def text_content(role: str, text: str) -> "genai.protos.Content":
+    """A one-part text message from `role` ("user" or "model")."""
+    return genai.protos.Content(role=role, parts=[genai.protos.Part(text=text)])
+
+
+def render_content(content: "genai.protos.Content") -> str:
+    return f"{content.role}: " + "".join(part.text for part in content.parts)
+
+
+# A user message and the model's reply to it, as the SDK's Content messages
+Exchange = Tuple["genai.protos.Content", "genai.protos.Content"]
+
+FALLBACK_RESPONSE = "Oh no! I got a bit confused there, Mishka! Can you ask me again?"
+
+
+def build_enhanced_query(user_query: str) -> str:
+    """Adds the latest news to the user's query when they are asking about current events."""
+    enhanced_query = user_query
+
+    if news.should_fetch_news(user_query):
+        logger.info("User query detected as news-related, fetching latest news...")
+
+        # Try to fetch relevant news
+        if "technology" in user_query.lower() or "tech" in user_query.lower():
+            articles = news.fetch_top_headlines(category="technology")
+        elif "sports" in user_query.lower():
+            articles = news.fetch_top_headlines(category="sports")
+        elif "health" in user_query.lower():
+            articles = news.fetch_top_headlines(category="health")
+        elif "business" in user_query.lower():
+            articles = news.fetch_top_headlines(category="business")
+        elif "science" in user_query.lower():
+            articles = news.fetch_top_headlines(category="science")
+        else:
+            # Search for specific keywords or get general headlines
+            search_terms = extract_search_terms(user_query)
+            if search_terms:
+                articles = news.search_news(search_terms)
             else:
-                logger.warning("Failed to fetch news articles")
+                articles = news.fetch_top_headlines()
+
+        if articles:
+            news_context = news.format_news_for_llm(articles)
+            enhanced_query = f"""
+            User asked: {user_query}
+
+            Here's some current news information that might be relevant:
+            {news_context}
+
+            Please respond to the user's question using this news information if relevant, 
+            but stay in character as Masha and make it sound exciting and fun!
+            """
+            logger.info(f"Enhanced query with {len(articles)} news articles")
+        else:
+            logger.warning("Failed to fetch news articles")
+
+    return enhanced_query
+
+
+class Conversation:
+    """
+    One WebSocket's chat with Gemini, kept for as long as the socket is open.
+
+    The history is stored as the SDK's `Content` messages, converted once when they are added;
+    each turn only appends its user message and the finished reply. A reply that is cancelled,
+    fails or is never used (a missed speculation) leaves the history untouched, because the
+    exchange is only appended by `append()` once the caller accepts it.
+
+    Gemini's API is stateless, so every request carries the history. It is kept under
+    `token_budget` by a `HistoryWindow`: older turns are folded into a running summary in the
+    background and sent as one short exchange ahead of the recent messages.
+
+    `open()` and `close()` bracket the socket's lifetime. `api_key` is this session's Gemini key
+    (None uses the .env default); the model is looked up per turn, so when the session sends
+    new keys the next turn uses them without losing the conversation.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, token_budget: int = config.LLM_HISTORY_TOKENS):
+        self.api_key = api_key
+        self.token_budget = token_budget
+        self.history: Optional[HistoryWindow] = None
+        self.closed = True
+        self.turns = 0
+        self.discarded = 0
+        self.requests = 0
+        self.request_tokens = 0
+
+    def open(self) -> "Conversation":
+        self.history = HistoryWindow(self._summarize, render_content, self.token_budget)
+        self.closed = False
+        return self
+
+    def close(self):
+        """Drops the history; streams still running finish without touching it."""
+        self.closed = True
+        if self.history:
+            self.history.close()
+
+    @property
+    def messages(self) -> List["genai.protos.Content"]:
+        """The messages sent with the next request, summary first."""
+        summary, messages = self.history.snapshot
+        if not summary:
+            return messages
+        return [
+            text_content("user", f"What we talked about earlier: {summary}"),
+            text_content("model", "Okay, I remember!"),
+        ] + messages
+
+    async def _summarize(self, summary: str, lines: List[str]) -> str:
+        return await executor.run(summarize_history, self.api_key, summary, lines)
+
+    def stream(self, user_query: str) -> Generator[str, None, Optional[Exchange]]:
+        """
+        Streams a reply to `user_query` on top of the current history, in a worker thread.
+
+        Yields text chunks and returns the (user, model) exchange to `append()` once the reply
+        is complete, or None if it failed, in which case the fallback line is yielded.
+        """
+        try:
+            question = text_content("user", build_enhanced_query(user_query))
+            # A snapshot of references: appending to the conversation meanwhile can't affect the request
+            contents = self.messages + [question]
+            self.requests += 1
+            self.request_tokens += sum(estimate_tokens(render_content(content)) for content in contents)
+            response = get_model(self.api_key).generate_content(contents, stream=True)
+            parts = []
+            for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunks without text parts (e.g. a bare finish reason) are skipped
+                    continue
+                if text:
+                    parts.append(text)
+                    yield text
+            return question, text_content("model", "".join(parts))
+
+        except Exception as e:
+            logger.error(f"Error streaming LLM response: {e}")
+            yield FALLBACK_RESPONSE
+            return None
+
+    def append(self, exchange: Optional[Exchange]) -> bool:
+        """
+        Adds a finished exchange to the history and returns True; None (a failed reply) is
+        counted and dropped.
+        """
+        if exchange is None or self.closed:
+            self.discarded += 1
+            return False
+        self.history.add(*exchange)
+        self.turns += 1
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "turns": self.turns,
+            "discarded": self.discarded,
+            "avg_request_tokens": round(self.request_tokens / self.requests) if self.requests else 0,
+            **(self.history.stats() if self.history else {}),
+        }
+
+
+class LLMStream:
+    """
+    A Gemini reply streaming in a worker thread, started as soon as the object is created.
+
+    Chunks are collected on the event loop until `consume()` is awaited, which replays them
+    to `on_text` and then follows the live stream. `cancel()` stops reading the reply; the
+    worker drops out at the next chunk. Only a consumed, uncancelled reply is added to the
+    conversation.
+    """
+
+    def __init__(self, user_query: str, conversation: Conversation):
+        self.user_query = user_query
+        self.conversation = conversation
+        self.chunks: List[str] = []
+        # Set once the exchange is in the conversation's history
+        self.committed = False
+        self.started_at = time.perf_counter()
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._cancelled = threading.Event()
+        self._producer = executor.submit(self._produce)
+
+    @property
+    def text_so_far(self) -> str:
+        return "".join(self.chunks)
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def finished(self) -> bool:
+        """True once the worker has returned, and with it the Gemini request."""
+        return self._producer.done()
+
+    async def wait_finished(self):
+        """Waits for the worker to return, e.g. after `cancel()`; cancelling the wait leaves it running."""
+        await asyncio.wait({self._producer})
+
+    def _produce(self):
+        stream = self.conversation.stream(self.user_query)
+        try:
+            while not self._cancelled.is_set():
+                chunk = next(stream)
+                self._loop.call_soon_threadsafe(self._push, "text", chunk)
+            stream.close()
+            self._loop.call_soon_threadsafe(self._push, "done", None)
+        except StopIteration as stop:
+            self._loop.call_soon_threadsafe(self._push, "done", stop.value)
+        except Exception as e:
+            logger.error(f"LLM stream worker failed: {e}")
+            self._loop.call_soon_threadsafe(self._push, "done", None)
+
+    def _push(self, kind: str, value):
+        if kind == "text":
+            self.chunks.append(value)
+        self._queue.put_nowait((kind, value))
 
-        model = genai.GenerativeModel('gemini-1.5-flash', system_instruction=system_instructions)
-        chat = model.start_chat(history=history)
-        response = chat.send_message(enhanced_query)
-        return response.text, chat.history
+    async def consume(self, on_text: Callable[[str], Awaitable[None]]) -> str:
+        """Awaits `on_text` for every chunk, buffered ones first; returns the full reply."""
+        parts = []
+        while True:
+            kind, value = await self._queue.get()
+            if kind == "done":
+                exchange = value
+                break
+            parts.append(value)
+            await on_text(value)
 
-    except Exception as e:
-        logger.error(f"Error getting LLM response: {e}")
-        return "Oh no! I got a bit confused there, Mishka! Can you ask me again?", history
+        await self._producer
+        if not self.cancelled:
+            self.committed = self.conversation.append(exchange)
+        return "".join(parts)
 
 
 def extract_search_terms(query: str) -> str:
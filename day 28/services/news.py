@@ -1,14 +1,51 @@
 # services/news.py
 import requests
 import os
+import hashlib
+import json
+import time
 from typing import List, Dict, Any, Optional
 import logging
 import config
+from .shared_cache import create_shared_cache
 
 logger = logging.getLogger(__name__)
 
 NEWS_API_BASE_URL = "https://newsapi.org/v2"
 
+# Headlines change slowly and NewsAPI's free plan allows few requests a day, so results are
+# cached for NEWS_CACHE_SECONDS in a cache all workers share
+NEWS_CACHE_BYTES = 8 * 1024 * 1024
+news_cache = create_shared_cache("news", NEWS_CACHE_BYTES, suffix=".json") if config.NEWS_CACHE_SECONDS > 0 else None
+
+
+def _cache_key(url: str, params: Dict[str, Any]) -> str:
+    # The API key is left out: every key gets the same articles
+    public = {name: value for name, value in params.items() if name != "apiKey"}
+    raw = json.dumps([url, public], sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _get_articles(url: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Articles for one NewsAPI request, from the shared cache when fresh. Raises on API errors."""
+    key = _cache_key(url, params)
+    if news_cache:
+        cached = news_cache.get(key)
+        if cached:
+            entry = json.loads(cached)
+            if time.time() - entry["fetched_at"] < config.NEWS_CACHE_SECONDS:
+                return entry["articles"]
+
+    response = requests.get(url, params=params, timeout=10)
+    response.raise_for_status()
+    data = response.json()
+    if data["status"] != "ok":
+        raise ValueError(data.get("message", "Unknown error"))
+
+    if news_cache:
+        news_cache.put(key, json.dumps({"fetched_at": time.time(), "articles": data["articles"]}).encode("utf-8"))
+    return data["articles"]
+
 
 def fetch_top_headlines(country: str = "us", category: str = None, page_size: int = 5, news_key: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
     """
@@ -30,16 +67,10 @@ def fetch_top_headlines(country: str = "us", category: str = None, page_size: in
         params["category"] = category
 
     try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        if data["status"] == "ok":
-            return data["articles"]
-        else:
-            logger.error(f"NewsAPI error: {data.get('message', 'Unknown error')}")
-            return None
-
+        return _get_articles(url, params)
+    except ValueError as e:
+        logger.error(f"NewsAPI error: {e}")
+        return None
     except requests.exceptions.RequestException as e:
         logger.error(f"Error fetching news: {e}")
         return None
@@ -64,16 +95,10 @@ def search_news(query: str, sort_by: str = "relevancy", page_size: int = 5, news
     }
 
     try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        if data["status"] == "ok":
-            return data["articles"]
-        else:
-            logger.error(f"NewsAPI error: {data.get('message', 'Unknown error')}")
-            return None
-
+        return _get_articles(url, params)
+    except ValueError as e:
+        logger.error(f"NewsAPI error: {e}")
+        return None
     except requests.exceptions.RequestException as e:
         logger.error(f"Error searching news: {e}")
         return None
@@ -0,0 +1,120 @@
+# services/partials.py
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class PartialTranscriptThrottle:
+    """
+    Forwards AssemblyAI's interim transcripts to the UI as live captions without flooding it.
+
+    A partial is sent only when its text changed since the last one sent, and at most once every
+    `min_interval_ms`. Partials arriving faster replace each other; the newest is sent when the
+    interval is up, so the caption always ends on the latest text.
+
+    `offer()` is called from the SDK's reader thread and only hands the text to the event loop.
+    `reset()` is called on the final transcript so a late partial can't overwrite it. `close()`
+    cancels the sends still in flight when the socket goes away.
+    """
+
+    def __init__(
+            self,
+            send: Callable[[str], Awaitable[None]],
+            loop: asyncio.AbstractEventLoop,
+            min_interval_ms: int = config.PARTIAL_MIN_INTERVAL_MS,
+    ):
+        self.send = send
+        self.loop = loop
+        self.min_interval = min_interval_ms / 1000
+        self._last_text = ""
+        self._last_sent_at = 0.0
+        self._pending: Optional[str] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Sends in flight; a task the loop holds no reference to can be garbage-collected mid-send
+        self._sends: Set[asyncio.Task] = set()
+        self._closed = False
+
+        self.received = 0
+        self.sent = 0
+        self.duplicates = 0
+        self.superseded = 0
+        self._started_at = time.monotonic()
+
+    def offer(self, text: str):
+        """Thread-safe entry point for `on_partial_callback`."""
+        self.loop.call_soon_threadsafe(self._offer, text)
+
+    def reset(self):
+        """Thread-safe: drops any pending partial and starts the next turn with an empty caption."""
+        self.loop.call_soon_threadsafe(self._reset)
+
+    def close(self):
+        """Called on the event loop when the session ends; partials offered afterwards are dropped."""
+        self._closed = True
+        self._reset()
+        for task in self._sends:
+            task.cancel()
+
+    def _offer(self, text: str):
+        if self._closed:
+            return
+        self.received += 1
+        text = text.strip()
+        # Compare with what the UI is about to show: the pending text if any, else the last one sent
+        latest = self._pending if self._pending is not None else self._last_text
+        if not text or text == latest:
+            self.duplicates += 1
+            return
+        if self._pending is not None:
+            self.superseded += 1
+        if text == self._last_text:
+            # Back to what is already on screen; nothing left to send
+            self._pending = None
+            return
+        self._pending = text
+
+        wait = self._last_sent_at + self.min_interval - time.monotonic()
+        if wait <= 0:
+            self._flush()
+        elif self._timer is None:
+            self._timer = self.loop.call_later(wait, self._flush)
+
+    def _flush(self):
+        self._timer = None
+        if self._pending is None:
+            return
+        text, self._pending = self._pending, None
+        self._last_text = text
+        self._last_sent_at = time.monotonic()
+        self.sent += 1
+        task = self.loop.create_task(self._send(text))
+        self._sends.add(task)
+        task.add_done_callback(self._sends.discard)
+
+    async def _send(self, text: str):
+        try:
+            await self.send(text)
+        except Exception as e:
+            logger.debug(f"Could not send partial transcript: {e}")
+
+    def _reset(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._pending = None
+        self._last_text = ""
+
+    def stats(self) -> Dict[str, float]:
+        elapsed = max(time.monotonic() - self._started_at, 1e-9)
+        return {
+            "received": self.received,
+            "sent": self.sent,
+            "duplicates": self.duplicates,
+            "superseded": self.superseded,
+            "sent_per_second": round(self.sent / elapsed, 2),
+        }
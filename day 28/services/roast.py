@@ -1,7 +1,7 @@
 # services/roast.py
 
 import random
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 import logging
 import re
 
@@ -78,6 +78,15 @@ SELF_ROASTS = [
     "Darling, I'm a voice in your device judging your life choices. We're both questionable here.",
 ]
 
+# Every roast reply ends with one of these
+ROAST_ENDINGS = [
+    " But I still love you, sweetie! 😉",
+    " Now, was there anything else you needed, honey?",
+    " Don't worry, we've all been there, darling!",
+    " You know I'm just keeping it real with you! ✨",
+    " That's what friends are for, right? 😘"
+]
+
 
 def should_roast_user(user_query: str) -> Dict[str, Any]:
     """
@@ -198,6 +207,24 @@ def generate_roast(roast_info: Dict[str, Any]) -> str:
         return random.choice(ROAST_CATEGORIES[category])
 
 
+def compose_roast_response(roast_info: Dict[str, Any]) -> Tuple[str, List[str]]:
+    """
+    Build a roast reply and the canned segments it is made of
+
+    Args:
+        roast_info: Roast request information
+
+    Returns:
+        The full reply text and its segments (the roast line, then the ending)
+    """
+    if not roast_info["is_roast_request"]:
+        return "", []
+
+    roast = generate_roast(roast_info)
+    ending = random.choice(ROAST_ENDINGS)
+    return roast + ending, [roast, ending.strip()]
+
+
 def format_roast_response(roast_info: Dict[str, Any]) -> str:
     """
     Format the roast response with Marsha's personality
@@ -208,16 +235,22 @@ def format_roast_response(roast_info: Dict[str, Any]) -> str:
     Returns:
         Formatted roast response
     """
-    if not roast_info["is_roast_request"]:
-        return ""
+    full_response, _ = compose_roast_response(roast_info)
+    return full_response
 
-    roast = generate_roast(roast_info)
 
-    endings = [
-        " But I still love you, sweetie! 😉",
-        " Now, was there anything else you needed, honey?",
-        " Don't worry, we've all been there, darling!",
-        " You know I'm just keeping it real with you! ✨",
-        " That's what friends are for, right? 😘"
-    ]
-    return roast + random.choice(endings)
\ No newline at end of file
+def roast_corpus() -> List[str]:
+    """
+    List every canned segment a roast reply can be built from
+
+    Returns:
+        Unique segments, in a stable order
+    """
+    segments = []
+    for templates in ROAST_CATEGORIES.values():
+        segments.extend(templates)
+    for templates in COMEBACK_TEMPLATES.values():
+        segments.extend(templates)
+    segments.extend(SELF_ROASTS)
+    segments.extend(ending.strip() for ending in ROAST_ENDINGS)
+    return list(dict.fromkeys(segments))
@@ -0,0 +1,175 @@
+# services/roast_pack.py
+"""
+Pre-rendered audio for every canned roast segment.
+
+Roast replies are a template plus one of a few endings, so all the audio they can need is
+known ahead of time. The pack stores one clip per segment in a single file:
+
+    b"RPK1" | header length (4 bytes, big endian) | JSON header | audio blob
+
+The header maps each segment's text to its (offset, length) in the blob. The pack version
+hashes the voice settings used by `tts.speak` together with the corpus, so changing the
+voice or editing a template produces a new pack instead of stale audio.
+
+Build it offline from the `day 28` folder:
+    python -m services.roast_pack
+"""
+import hashlib
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+import config
+from . import tts
+from .roast import roast_corpus
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"RPK1"
+PACK_DIR = Path(config.ROAST_PACK_DIR)
+
+# With several workers only one renders a missing pack; the rest wait this long for it
+BUILD_WAIT_SECONDS = 600
+
+_clips: Dict[str, bytes] = {}
+_lock = threading.Lock()
+
+
+def pack_version() -> str:
+    """Hash of the voice settings and the corpus the pack was rendered from."""
+    voice = [tts.VOICE_ID, tts.VOICE_RATE, tts.VOICE_PITCH, tts.VOICE_STYLE]
+    raw = json.dumps([voice, roast_corpus()], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def pack_path(version: Optional[str] = None) -> Path:
+    return PACK_DIR / f"roast_pack_{version or pack_version()}.bin"
+
+
+def build_pack() -> Optional[Path]:
+    """Synthesizes every roast segment and writes the pack. Returns None if any segment failed."""
+    segments = roast_corpus()
+    with ThreadPoolExecutor(max_workers=config.TTS_WORKERS, thread_name_prefix="roast-pack") as pool:
+        clips = list(pool.map(tts.speak, segments))
+
+    missing = [segment for segment, audio in zip(segments, clips) if not audio]
+    if missing:
+        logger.warning(f"Roast pack not written: {len(missing)} of {len(segments)} segments failed to render.")
+        return None
+
+    entries = {}
+    offset = 0
+    for segment, audio in zip(segments, clips):
+        entries[segment] = [offset, len(audio)]
+        offset += len(audio)
+
+    version = pack_version()
+    header = json.dumps({
+        "version": version,
+        "voice": {
+            "voice_id": tts.VOICE_ID,
+            "rate": tts.VOICE_RATE,
+            "pitch": tts.VOICE_PITCH,
+            "style": tts.VOICE_STYLE,
+        },
+        "entries": entries,
+    }, ensure_ascii=False).encode("utf-8")
+
+    PACK_DIR.mkdir(parents=True, exist_ok=True)
+    path = pack_path(version)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack(">I", len(header)))
+        f.write(header)
+        for audio in clips:
+            f.write(audio)
+    tmp_path.replace(path)
+    logger.info(f"Roast pack {version} written: {len(segments)} clips, {offset} bytes of audio.")
+    return path
+
+
+def load_pack(path: Optional[Path] = None) -> bool:
+    """Loads the pack for the current voice settings into memory. Returns False if there is none."""
+    path = path or pack_path()
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return False
+
+    if data[:4] != MAGIC:
+        logger.warning(f"{path.name} is not a roast pack, ignoring it.")
+        return False
+    (header_length,) = struct.unpack(">I", data[4:8])
+    header = json.loads(data[8:8 + header_length].decode("utf-8"))
+    if header.get("version") != pack_version():
+        logger.warning(f"{path.name} was rendered with different voice settings, ignoring it.")
+        return False
+
+    blob = memoryview(data)[8 + header_length:]
+    clips = {text: bytes(blob[offset:offset + length]) for text, (offset, length) in header["entries"].items()}
+    with _lock:
+        _clips.clear()
+        _clips.update(clips)
+    logger.info(f"Roast pack {header['version']} loaded: {len(clips)} clips.")
+    return True
+
+
+def _claim_build(lock_path: Path) -> bool:
+    """Creates the build lock file; False if another process holds a fresh one."""
+    PACK_DIR.mkdir(parents=True, exist_ok=True)
+    try:
+        os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except FileExistsError:
+        try:
+            stale = time.time() - lock_path.stat().st_mtime > BUILD_WAIT_SECONDS
+        except FileNotFoundError:
+            stale = True
+        if stale:
+            # Left behind by a worker that died mid-build
+            lock_path.unlink(missing_ok=True)
+            return _claim_build(lock_path)
+        return False
+
+
+def warm_up(build_missing: bool = False):
+    """
+    Loads the pack, rendering it first when `build_missing` is set and none exists yet.
+    Under `uvicorn --workers N` one worker renders it and the others load it when it is written.
+    """
+    if load_pack() or not build_missing:
+        return
+    lock_path = pack_path().with_suffix(".lock")
+    if _claim_build(lock_path):
+        try:
+            if build_pack():
+                load_pack()
+        finally:
+            lock_path.unlink(missing_ok=True)
+        return
+
+    logger.info("Another worker is rendering the roast pack; waiting for it.")
+    deadline = time.monotonic() + BUILD_WAIT_SECONDS
+    while lock_path.exists() and time.monotonic() < deadline:
+        time.sleep(1)
+    load_pack()
+
+
+def lookup(segment: str) -> Optional[bytes]:
+    """Pre-rendered audio for a roast segment, or None if the pack doesn't have it."""
+    with _lock:
+        return _clips.get(segment.strip())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    built = build_pack()
+    if built:
+        print(f"Wrote {built}")
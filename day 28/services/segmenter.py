@@ -0,0 +1,36 @@
+# services/segmenter.py
+import re
+from typing import List
+
+# A sentence ends at . ? or ! followed by whitespace (same rule the pipeline always used)
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.?!])\s+')
+
+
+class SentenceSegmenter:
+    """
+    Buffers streamed LLM text and hands back each sentence as soon as it is complete,
+    so TTS can start on sentence one while the rest of the reply is still generating.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        """Adds a chunk of text and returns any sentences it completed."""
+        self._buffer += text
+        parts = SENTENCE_BOUNDARY.split(self._buffer)
+        # The last part has no boundary after it yet, keep it for the next chunk
+        self._buffer = parts.pop()
+        return [part.strip() for part in parts if part.strip()]
+
+    def flush(self) -> List[str]:
+        """Returns whatever is left in the buffer once the stream has ended."""
+        remainder = self._buffer.strip()
+        self._buffer = ""
+        return [remainder] if remainder else []
+
+
+def split_sentences(text: str) -> List[str]:
+    """Splits a complete reply into sentences."""
+    segmenter = SentenceSegmenter()
+    return segmenter.feed(text) + segmenter.flush()
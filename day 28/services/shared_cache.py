@@ -0,0 +1,224 @@
+# services/shared_cache.py
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Optional
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class SharedCache(ABC):
+    """
+    A byte cache that every worker process on the host sees, least recently used out first.
+
+    Values are opaque bytes under string keys (already hashed by the caller). Implementations
+    are thread- and process-safe; a failed read or write is logged and treated as a miss.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """The cached value, or None."""
+
+    @abstractmethod
+    def put(self, key: str, value: bytes):
+        """Stores `value`, evicting the least recently used entries when over budget."""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """Counters for /stats."""
+
+
+class DirectoryCache(SharedCache):
+    """
+    One file per key in a folder, written atomically. The least recently read files are deleted
+    once the folder passes `max_bytes`. Each process only counts its own writes between scans,
+    so with several workers the folder can go over budget until the next eviction scan.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, suffix: str = ".bin"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._bytes = sum(path.stat().st_size for path in self.directory.glob(f"*{suffix}"))
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            value = path.read_bytes()
+            # Bump the modification time so eviction treats it as recently used
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Could not read cached entry {path.name}: {e}")
+            return None
+
+    def put(self, key: str, value: bytes):
+        path = self._path(key)
+        try:
+            previous_size = path.stat().st_size
+        except OSError:
+            previous_size = 0
+        # Replaces an existing entry too (e.g. one its reader found expired), atomically
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            tmp_path.write_bytes(value)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write cached entry {path.name}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        with self._lock:
+            self._bytes += len(value) - previous_size
+            over_budget = self._bytes > self.max_bytes
+        if over_budget:
+            self._evict()
+
+    def _evict(self):
+        """Deletes least recently used files until the folder is back under 90% of its budget."""
+        files = []
+        for path in self.directory.glob(f"*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+
+        total = sum(size for _, size, _ in files)
+        target = int(self.max_bytes * 0.9)
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except FileNotFoundError:
+                total -= size
+            except OSError as e:
+                logger.warning(f"Could not evict cached entry {path.name}: {e}")
+
+        with self._lock:
+            self._bytes = total
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"backend": "files", "bytes": self._bytes}
+
+
+class SQLiteCache(SharedCache):
+    """
+    Entries in one SQLite table, shared by every worker on the host. WAL mode lets workers read
+    while one writes; the total size is kept in the database, so the budget holds across workers.
+    """
+
+    # Last-use times are only rewritten when older than this, so hot reads don't all turn into writes
+    TOUCH_INTERVAL = 60
+
+    def __init__(self, path: Path, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        db = self._connection()
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS cache_used ON cache (used)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared between threads, so each thread opens its own
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            db = self._connection()
+            row = db.execute("SELECT value, used FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[1] > self.TOUCH_INTERVAL:
+                db.execute("UPDATE cache SET used = ? WHERE key = ?", (now, key))
+            return bytes(row[0])
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read the shared cache: {e}")
+            return None
+
+    def put(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        try:
+            db = self._connection()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, size, used) VALUES (?, ?, ?, ?)",
+                    (key, value, len(value), time.time()),
+                )
+                (total,) = db.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()
+                if total > self.max_bytes:
+                    self._evict(db, total)
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            logger.warning(f"Could not write the shared cache: {e}")
+
+    def _evict(self, db: sqlite3.Connection, total: int):
+        """Deletes least recently used rows until the table is back under 90% of its budget."""
+        target = int(self.max_bytes * 0.9)
+        doomed = []
+        for key, size in db.execute("SELECT key, size FROM cache ORDER BY used"):
+            if total <= target:
+                break
+            doomed.append((key,))
+            total -= size
+        db.executemany("DELETE FROM cache WHERE key = ?", doomed)
+
+    def stats(self) -> Dict[str, int]:
+        try:
+            entries, size = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+            ).fetchone()
+        except sqlite3.Error:
+            entries, size = -1, -1
+        return {"backend": "sqlite", "entries": entries, "bytes": size}
+
+
+def create_shared_cache(
+        name: str, max_bytes: int, directory: Optional[Path] = None, suffix: str = ".bin"
+) -> SharedCache:
+    """
+    The cache called `name` in the backend chosen by SHARED_CACHE: "files" (a folder, `directory`
+    or one named after the cache) or "sqlite" (one database file per cache).
+    """
+    base = Path(config.SHARED_CACHE_DIR)
+    if config.SHARED_CACHE == "sqlite":
+        return SQLiteCache(base / f"{name}.sqlite3", max_bytes)
+    if config.SHARED_CACHE != "files":
+        logger.warning(f"Unknown SHARED_CACHE '{config.SHARED_CACHE}', using files")
+    return DirectoryCache(directory or base / name, max_bytes, suffix)
@@ -0,0 +1,163 @@
+# services/speculation.py
+import asyncio
+import logging
+import re
+import time
+from typing import Callable, Dict, List, Optional
+
+import config
+from .llm import Conversation, LLMStream
+
+logger = logging.getLogger(__name__)
+
+_NOT_WORD = re.compile(r"[^\w\s']+")
+
+
+def normalize(text: str) -> str:
+    """Case, punctuation and spacing don't count: formatted and raw transcripts compare equal."""
+    return " ".join(_NOT_WORD.sub(" ", text.lower()).split())
+
+
+class SpeculativePrefetcher:
+    """
+    Starts the Gemini request before AssemblyAI declares the end of the turn.
+
+    When the interim transcript hasn't changed for `stable_ms`, an `LLMStream` is started on it
+    on the conversation as it stands. Its chunks are only buffered; nothing is spoken or shown. When the
+    final transcript arrives, `take()` hands the stream over if the final says the same thing
+    and no other turn was added to the conversation meanwhile. Otherwise the speculation is cancelled and the caller
+    starts a normal request. A partial that diverges from the speculated text cancels it early.
+
+    A session never has two Gemini requests at once. A cancelled stream's worker only drops out
+    at its next chunk, so `take()` waits for that before the caller starts its own request, and
+    nothing is speculated while one is still running or while a turn is being answered (from
+    `take()` to `end_turn()`).
+
+    `offer()` is called from the SDK's reader thread; everything else runs on the event loop.
+    `should_speculate(text)` can veto a text, e.g. roast requests, which never reach the LLM.
+    """
+
+    def __init__(
+            self,
+            conversation: Conversation,
+            loop: asyncio.AbstractEventLoop,
+            should_speculate: Callable[[str], bool] = lambda text: True,
+            stable_ms: int = config.LLM_SPECULATION_STABLE_MS,
+            min_words: int = config.LLM_SPECULATION_MIN_WORDS,
+    ):
+        self.conversation = conversation
+        self.loop = loop
+        self.should_speculate = should_speculate
+        self.stable = stable_ms / 1000
+        self.min_words = min_words
+
+        self._last_partial = ""
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._stream: Optional[LLMStream] = None
+        self._stream_key = ""
+        self._turns = 0
+        # Cancelled streams whose workers may still be waiting on Gemini
+        self._draining: List[LLMStream] = []
+        self._in_turn = False
+
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.cancelled_early = 0
+        self.wasted_chars = 0
+        self.head_start_ms = 0.0
+
+    def offer(self, text: str):
+        """Thread-safe entry point for `on_partial_callback`."""
+        self.loop.call_soon_threadsafe(self._offer, text)
+
+    def _offer(self, text: str):
+        key = normalize(text)
+        if not key or key == self._last_partial:
+            return
+        self._last_partial = key
+        if self._stream is not None and key != self._stream_key:
+            # The user kept talking, so the speculated question is already out of date
+            self.cancelled_early += 1
+            self._discard()
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = self.loop.call_later(self.stable, self._start, text, key)
+
+    def _start(self, text: str, key: str):
+        self._timer = None
+        if self._stream is not None or self._in_turn or self._busy():
+            return
+        if len(key.split()) < self.min_words or not self.should_speculate(text):
+            return
+        self.started += 1
+        self._stream = LLMStream(text, self.conversation)
+        self._stream_key = key
+        self._turns = self.conversation.turns
+        logger.info(f"Speculatively prefetching a reply to: {text}")
+
+    async def take(self, final_text: str) -> Optional[LLMStream]:
+        """
+        Returns the running stream if it answers `final_text`. Otherwise discards it, waits until
+        no speculative request is left running and returns None. Call `end_turn()` once the turn
+        is over.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._last_partial = ""
+        self._in_turn = True
+
+        stream = self._stream
+        if stream is not None:
+            if normalize(final_text) == self._stream_key and self.conversation.turns == self._turns:
+                self.hits += 1
+                self.head_start_ms += 1000 * (time.perf_counter() - stream.started_at)
+                self._stream = None
+                return stream
+            self.misses += 1
+            self._discard()
+        while self._busy():
+            await self._draining[0].wait_finished()
+        return None
+
+    def end_turn(self, stream: Optional[LLMStream] = None):
+        """
+        Speculation may start again, on the next utterance's partials, once `stream` (the turn's
+        own reply, possibly cancelled by a barge-in) has finished.
+        """
+        self._in_turn = False
+        if stream is not None and not stream.finished:
+            self._draining.append(stream)
+
+    def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._discard()
+
+    def _discard(self):
+        if self._stream is None:
+            return
+        self._stream.cancel()
+        # Whatever was generated so far was paid for and thrown away
+        self.wasted_chars += len(self._stream.text_so_far)
+        self._draining.append(self._stream)
+        self._stream = None
+
+    def _busy(self) -> bool:
+        self._draining = [stream for stream in self._draining if not stream.finished]
+        return bool(self._draining)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "started": self.started,
+            "hits": self.hits,
+            "misses": self.misses,
+            "cancelled_early": self.cancelled_early,
+            "hit_rate": round(self.hits / self.started, 2) if self.started else 0.0,
+            "avg_head_start_ms": round(self.head_start_ms / self.hits) if self.hits else 0,
+            "wasted_chars": self.wasted_chars,
+            # Gemini averages roughly four characters per token for English text
+            "wasted_tokens_est": self.wasted_chars // 4,
+        }
@@ -1,7 +1,11 @@
 # services/stt.py
 import assemblyai as aai
 from fastapi import UploadFile
+import asyncio
+import logging
 import os
+import threading
+from collections import deque
 from dotenv import load_dotenv
 from assemblyai.streaming.v3 import (
     StreamingClient,
@@ -20,6 +24,8 @@ import config
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # expects ASSEMBLYAI_API_KEY in env
 aai.settings.api_key = os.getenv("ASSEMBLYAI_API_KEY") or ""
 
@@ -29,6 +35,10 @@ class AssemblyAIStreamingTranscriber:
     Wrapper around AAI StreamingClient that exposes:
       - on_partial_callback(text) for interim results
       - on_final_callback(text)   when end_of_turn=True
+
+    With connect=False the upstream session is opened later by `connect()` (see
+    `open_transcriber`). Audio streamed before then is buffered, up to `max_buffer_bytes`,
+    and flushed in order once the session is up.
     """
 
     def __init__(
@@ -37,9 +47,24 @@ class AssemblyAIStreamingTranscriber:
             sample_rate: int = 16000,
             on_partial_callback=None,
             on_final_callback=None,
+            connect: bool = True,
+            max_buffer_bytes: int = config.STT_CONNECT_BUFFER_BYTES,
     ):
         self.on_partial_callback = on_partial_callback
         self.on_final_callback = on_final_callback
+        self.sample_rate = sample_rate
+
+        self._lock = threading.Lock()
+        self._connected = False
+        self._closed = False
+        self._ended = False
+        self._buffer = deque()
+        self._buffer_bytes = 0
+        self.max_buffer_bytes = max_buffer_bytes
+        self.dropped_bytes = 0
+        self.connecting = None
+        # turn_order of the last turn passed to on_final_callback
+        self._last_final_turn = None
 
         options = StreamingClientOptions(
             token_auth=False,
@@ -58,12 +83,39 @@ class AssemblyAIStreamingTranscriber:
             lambda client, event: self._on_turn(client, event),
         )
 
-        self.client.connect(
-            StreamingParameters(
-                sample_rate=sample_rate,
-                format_turns=False,
+        if connect:
+            self.connect()
+
+    def connect(self):
+        """Opens the upstream session (blocking) and flushes any audio buffered meanwhile."""
+        try:
+            self.client.connect(
+                StreamingParameters(
+                    sample_rate=self.sample_rate,
+                    format_turns=False,
+                )
             )
-        )
+        except Exception as e:
+            logger.error(f"AAI connect failed: {e}")
+            with self._lock:
+                self._closed = True
+                self._buffer.clear()
+                self._buffer_bytes = 0
+            raise
+
+        with self._lock:
+            if self._closed:
+                # close() was called while we were connecting
+                close_now = True
+            else:
+                close_now = False
+                # Flush under the lock so new audio can't overtake the buffered audio
+                while self._buffer:
+                    self.client.stream(self._buffer.popleft())
+                self._buffer_bytes = 0
+                self._connected = True
+        if close_now:
+            self.client.disconnect(terminate=True)
 
     # Corrected method signatures to include 'self'
     def _on_begin(self, client: StreamingClient, event: BeginEvent):
@@ -72,10 +124,17 @@ class AssemblyAIStreamingTranscriber:
     # Corrected method signatures to include 'self'
     def _on_termination(self, client: StreamingClient, event: TerminationEvent):
         print(f"AAI session terminated after {event.audio_duration_seconds} s")
+        self._ended = True
 
     # Corrected method signatures to include 'self'
     def _on_error(self, client: StreamingClient, error: StreamingError):
         print("AAI error:", error)
+        self._ended = True
+
+    @property
+    def is_connected(self) -> bool:
+        """True while the upstream session is open and usable."""
+        return self._connected and not self._closed and not self._ended
 
     def _on_turn(self, client: StreamingClient, event: TurnEvent):
         text = (event.transcript or "").strip()
@@ -83,7 +142,10 @@ class AssemblyAIStreamingTranscriber:
             return
 
         if event.end_of_turn:
-            if self.on_final_callback:
+            # Once format_turns is on, AssemblyAI ends each turn twice: unformatted, then formatted.
+            # Only the first is passed on, so the same question never reaches the turn queue twice.
+            if self.on_final_callback and event.turn_order != self._last_final_turn:
+                self._last_final_turn = event.turn_order
                 self.on_final_callback(text)
 
             if not event.turn_is_formatted:
@@ -96,10 +158,49 @@ class AssemblyAIStreamingTranscriber:
                 self.on_partial_callback(text)
 
     def stream_audio(self, audio_chunk: bytes):
+        with self._lock:
+            if self._closed:
+                return
+            if not self._connected:
+                # Still connecting: keep the most recent audio, drop the oldest past the cap
+                self._buffer.append(audio_chunk)
+                self._buffer_bytes += len(audio_chunk)
+                while self._buffer_bytes > self.max_buffer_bytes:
+                    dropped = self._buffer.popleft()
+                    self._buffer_bytes -= len(dropped)
+                    self.dropped_bytes += len(dropped)
+                return
         self.client.stream(audio_chunk)
 
     def close(self):
-        self.client.disconnect(terminate=True)
+        with self._lock:
+            was_connected = self._connected
+            self._closed = True
+            self._connected = False
+            self._buffer.clear()
+            self._buffer_bytes = 0
+        if was_connected:
+            self.client.disconnect(terminate=True)
+
+
+def open_transcriber(api_key: str, **kwargs) -> AssemblyAIStreamingTranscriber:
+    """
+    Creates a transcriber without blocking the event loop.
+
+    The AssemblyAI handshake runs in a worker thread; audio streamed before it completes is
+    buffered by the transcriber. `transcriber.connecting` is the future of that handshake.
+    """
+    transcriber = AssemblyAIStreamingTranscriber(api_key=api_key, connect=False, **kwargs)
+    loop = asyncio.get_running_loop()
+    transcriber.connecting = loop.run_in_executor(None, transcriber.connect)
+    transcriber.connecting.add_done_callback(_ignore_connect_error)
+    return transcriber
+
+
+def _ignore_connect_error(future):
+    # Failures are already logged by connect(); retrieving them keeps asyncio from warning
+    if not future.cancelled():
+        future.exception()
 
 
 def transcribe_audio(audio_file: UploadFile) -> str:
@@ -0,0 +1,165 @@
+# services/stt_pool.py
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional, Tuple
+
+import config
+from . import stt
+from .stt import AssemblyAIStreamingTranscriber
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriberPool:
+    """
+    Keeps a few AssemblyAI streaming sessions already connected, per API key, so a new /ws
+    client can start transcribing without waiting for the handshake.
+
+    - up to `size` ready sessions per key, and `max_size` across all keys
+    - sessions idle for longer than `idle_timeout` seconds are closed (AssemblyAI bills
+      open session time, and idle sessions may be dropped upstream anyway)
+    - every hand-out triggers a background refill for that key
+
+    Only keys that have been used (plus the .env key at startup) are kept warm.
+    All bookkeeping happens on the event loop; only connect/close run in worker threads.
+    """
+
+    def __init__(
+            self,
+            size: int = config.STT_POOL_SIZE,
+            max_size: int = config.STT_POOL_MAX,
+            idle_timeout: float = config.STT_POOL_IDLE_SECONDS,
+    ):
+        self.size = size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._ready: Dict[str, Deque[Tuple[float, AssemblyAIStreamingTranscriber]]] = defaultdict(deque)
+        self._opening: Dict[str, int] = defaultdict(int)
+        self._refills: Dict[str, asyncio.Task] = {}
+        self._reaper: Optional[asyncio.Task] = None
+        self._closed = False
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0 and self.max_size > 0
+
+    def start(self, warm_key: Optional[str] = None):
+        """Starts the idle reaper and, if given, warms sessions for the default key."""
+        if not self.enabled:
+            return
+        self._reaper = asyncio.create_task(self._reap())
+        if warm_key:
+            self._schedule_refill(warm_key)
+
+    def acquire(self, api_key: str, **callbacks) -> AssemblyAIStreamingTranscriber:
+        """
+        Hands out a connected transcriber for this key with the given callbacks attached.
+        Falls back to `stt.open_transcriber` when none is ready.
+        """
+        if not self.enabled:
+            return stt.open_transcriber(api_key=api_key, **callbacks)
+
+        transcriber = self._pop_ready(api_key)
+        self._schedule_refill(api_key)
+        if transcriber is None:
+            self.misses += 1
+            return stt.open_transcriber(api_key=api_key, **callbacks)
+
+        self.hits += 1
+        for name, callback in callbacks.items():
+            setattr(transcriber, name, callback)
+        return transcriber
+
+    async def close(self):
+        """Closes every pooled session. Called on app shutdown."""
+        self._closed = True
+        if self._reaper:
+            self._reaper.cancel()
+        for task in self._refills.values():
+            task.cancel()
+        loop = asyncio.get_running_loop()
+        pooled = [transcriber for ready in self._ready.values() for _, transcriber in ready]
+        self._ready.clear()
+        await asyncio.gather(
+            *(loop.run_in_executor(None, transcriber.close) for transcriber in pooled),
+            return_exceptions=True,
+        )
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "ready": sum(len(ready) for ready in self._ready.values()),
+            "opening": sum(self._opening.values()),
+            "keys": len([key for key, ready in self._ready.items() if ready]),
+        }
+
+    def _total(self) -> int:
+        return sum(len(ready) for ready in self._ready.values()) + sum(self._opening.values())
+
+    def _pop_ready(self, api_key: str) -> Optional[AssemblyAIStreamingTranscriber]:
+        ready = self._ready.get(api_key)
+        while ready:
+            opened_at, transcriber = ready.popleft()
+            if transcriber.is_connected and time.monotonic() - opened_at < self.idle_timeout:
+                return transcriber
+            self._close_in_background(transcriber)
+        return None
+
+    def _schedule_refill(self, api_key: str):
+        if self._closed or not api_key:
+            return
+        task = self._refills.get(api_key)
+        if task is None or task.done():
+            self._refills[api_key] = asyncio.create_task(self._refill(api_key))
+
+    async def _refill(self, api_key: str):
+        loop = asyncio.get_running_loop()
+        while (not self._closed
+               and len(self._ready[api_key]) + self._opening[api_key] < self.size
+               and self._total() < self.max_size):
+            self._opening[api_key] += 1
+            try:
+                transcriber = await loop.run_in_executor(None, _open_connected, api_key)
+            except Exception as e:
+                logger.warning(f"Could not pre-connect an AssemblyAI session: {e}")
+                return
+            finally:
+                self._opening[api_key] -= 1
+
+            if self._closed:
+                self._close_in_background(transcriber)
+                return
+            self._ready[api_key].append((time.monotonic(), transcriber))
+
+    async def _reap(self):
+        while True:
+            await asyncio.sleep(max(self.idle_timeout / 2, 1.0))
+            now = time.monotonic()
+            for api_key, ready in list(self._ready.items()):
+                keep = deque()
+                for opened_at, transcriber in ready:
+                    if transcriber.is_connected and now - opened_at < self.idle_timeout:
+                        keep.append((opened_at, transcriber))
+                    else:
+                        self._close_in_background(transcriber)
+                if keep:
+                    self._ready[api_key] = keep
+                else:
+                    # Keys nobody has used for a whole idle period stop being kept warm
+                    del self._ready[api_key]
+
+    def _close_in_background(self, transcriber: AssemblyAIStreamingTranscriber):
+        asyncio.get_running_loop().run_in_executor(None, transcriber.close)
+
+
+def _open_connected(api_key: str) -> AssemblyAIStreamingTranscriber:
+    return AssemblyAIStreamingTranscriber(api_key=api_key, connect=True)
+
+
+pool = TranscriberPool()
@@ -0,0 +1,68 @@
+# services/timed_executor.py
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+
+class TimedExecutor:
+    """
+    A fixed-size thread pool for one kind of blocking call, recording how long each call
+    waited for a free worker. Waits are kept for the last `window` calls, so `stats()`
+    shows whether the pool is too small for the current load.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str, window: int = 1000):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._waits: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.started = 0
+        self.running = 0
+
+    def submit(self, fn: Callable, *args) -> asyncio.Future:
+        """Schedules `fn(*args)` on the pool and returns an awaitable future for the event loop."""
+        queued_at = time.perf_counter()
+        self.submitted += 1
+
+        def call():
+            with self._lock:
+                self._waits.append(time.perf_counter() - queued_at)
+                self.started += 1
+                self.running += 1
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+
+        return asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    async def run(self, fn: Callable, *args):
+        return await self.submit(fn, *args)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            waits = sorted(self._waits)
+            started, running = self.started, self.running
+
+        def percentile(fraction: float) -> float:
+            if not waits:
+                return 0.0
+            return round(1000 * waits[min(len(waits) - 1, int(fraction * len(waits)))], 1)
+
+        return {
+            "workers": self.max_workers,
+            "submitted": self.submitted,
+            "running": running,
+            "queued": self.submitted - started,
+            "queue_wait_p50_ms": percentile(0.5),
+            "queue_wait_p95_ms": percentile(0.95),
+            "queue_wait_max_ms": percentile(1.0),
+        }
@@ -1,70 +1,161 @@
 # services/tts.py
 import requests
-from typing import List, Dict, Any
+import httpx
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Iterator, Optional
 from murf import Murf
 from pathlib import Path
 import logging
 import os
 import config
+from .shared_cache import create_shared_cache
+from .tts_cache import AudioCache, make_key
 
 logger = logging.getLogger(__name__)
 
 MURF_API_URL = "https://api.murf.ai/v1/speech"
 
+# Masha's voice, used for every streamed sentence
+VOICE_ID = "en-US-ariana"
+VOICE_PITCH = 0
+VOICE_RATE = 49
+VOICE_STYLE = "Conversational"
+
+# Canned lines (roasts, error messages) repeat a lot, so synthesized audio is cached by content,
+# in this process and in a cache shared by all workers on the host
+audio_cache = AudioCache(
+    max_memory_bytes=config.TTS_CACHE_MEMORY_MB * 1024 * 1024,
+    shared=create_shared_cache(
+        "tts", config.TTS_CACHE_DISK_MB * 1024 * 1024, directory=Path(config.TTS_CACHE_DIR), suffix=".wav"
+    ) if config.TTS_CACHE_DISK_MB > 0 else None,
+)
+
+# Keep-alive clients, one per API key (each session may bring its own), least recently used first
+MAX_CLIENTS = 32
+_clients: "OrderedDict[str, Murf]" = OrderedDict()
+_http_clients: Dict[str, httpx.Client] = {}
+_clients_lock = threading.Lock()
+
+# Shared session so convert_text_to_speech reuses its connection too
+_session = requests.Session()
+
 # Ensure uploads folder exists
 UPLOADS_DIR = Path(__file__).resolve().parent.parent / "uploads"
 UPLOADS_DIR.mkdir(exist_ok=True)
 
 
-def speak(text: str, output_file: str = "stream_output.wav"):
+def get_client(api_key: str) -> Murf:
+    """Returns the pooled Murf client for this API key, creating it on first use."""
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is not None:
+            _clients.move_to_end(api_key)
+            return client
+
+        http_client = httpx.Client(
+            timeout=httpx.Timeout(30.0, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=config.TTS_WORKERS,
+                max_keepalive_connections=config.TTS_WORKERS,
+                keepalive_expiry=60.0,
+            ),
+        )
+        client = Murf(api_key=api_key, base_url=config.MURF_BASE_URL, httpx_client=http_client)
+        _clients[api_key] = client
+        _http_clients[api_key] = http_client
+
+        if len(_clients) > MAX_CLIENTS:
+            # Not closed here: another session's synthesis thread may still be streaming on it.
+            # Its connections close once nothing references it anymore.
+            stale_key, _ = _clients.popitem(last=False)
+            _http_clients.pop(stale_key)
+        return client
+
+
+def close_clients():
+    """Closes every pooled connection. Called on app shutdown."""
+    with _clients_lock:
+        for http_client in _http_clients.values():
+            http_client.close()
+        _http_clients.clear()
+        _clients.clear()
+    _session.close()
+
+
+def stream_speech(text: str, output_file: Optional[str] = None, api_key: Optional[str] = None) -> Iterator[bytes]:
     """
-    Convert text to speech using Murf AI and save audio in uploads folder.
+    Stream Murf audio for `text`, yielding chunks as they arrive.
+
+    Cached clips come back as a single chunk. When `output_file` is given, the audio is also
+    written to that file in the uploads folder (opened once, not per chunk). `api_key` is the
+    session's Murf key; None uses the one from .env. Errors are raised; `speak` is the
+    forgiving wrapper.
     """
-    if not config.MURF_API_KEY:
+    cache_key = make_key(text, VOICE_ID, VOICE_RATE, VOICE_PITCH, VOICE_STYLE)
+    cached_audio = audio_cache.get(cache_key)
+    if cached_audio is not None:
+        if output_file:
+            (UPLOADS_DIR / output_file).write_bytes(cached_audio)
+        yield cached_audio
+        return
+
+    api_key = api_key or config.MURF_API_KEY
+    if not api_key:
         logger.error("MURF_API_KEY is not configured.")
-        return b""
+        return
 
-    try:
-        client = Murf(api_key=config.MURF_API_KEY)
+    client = get_client(api_key)
+    res = client.text_to_speech.stream(
+        text=text,
+        voice_id=VOICE_ID,
+        pitch=VOICE_PITCH,
+        rate=VOICE_RATE,
+        style=VOICE_STYLE
+    )
 
-        file_path = UPLOADS_DIR / output_file
+    # Chunks are collected in a list and joined once, so a long clip is copied once, not per chunk
+    chunks = []
+    audio_file = open(UPLOADS_DIR / output_file, "wb") if output_file else None
+    try:
+        for audio_chunk in res:
+            chunks.append(audio_chunk)
+            if audio_file:
+                audio_file.write(audio_chunk)
+            yield audio_chunk
+    finally:
+        if audio_file:
+            audio_file.close()
 
-        # Start with a clean file
-        open(file_path, "wb").close()
+    audio_cache.put(cache_key, b"".join(chunks))
 
-        res = client.text_to_speech.stream(
-            text=text,
-            voice_id="en-US-ariana",
-            pitch=0,
-            rate=49,
-            style="Conversational"
-        )
 
-        audio_bytes = b""
-        for audio_chunk in res:
-            audio_bytes += audio_chunk
-            with open(file_path, "ab") as f:
-                f.write(audio_chunk)
-
-        return audio_bytes
+def speak(text: str, output_file: Optional[str] = None, api_key: Optional[str] = None) -> bytes:
+    """
+    Convert text to speech using Murf AI and return the whole clip.
+    Pass a unique `output_file` to also keep a copy in the uploads folder.
+    """
+    try:
+        return b"".join(stream_speech(text, output_file, api_key))
     except Exception as e:
         logger.error(f"Error converting text to speech: {e}")
         return b""
 
 
-def convert_text_to_speech(text: str, voice_id: str = "en-US-natalie") -> str:
+def convert_text_to_speech(text: str, voice_id: str = "en-US-natalie", api_key: Optional[str] = None) -> str:
     """Converts text to speech using Murf AI."""
-    if not config.MURF_API_KEY:
+    api_key = api_key or config.MURF_API_KEY
+    if not api_key:
         raise Exception("MURF_API_KEY not configured.")
 
-    headers = {"Content-Type": "application/json", "api-key": config.MURF_API_KEY}
+    headers = {"Content-Type": "application/json", "api-key": api_key}
     payload = {
         "text": text,
         "voiceId": voice_id,
         "format": "MP3",
         "volume": "100%"
     }
-    response = requests.post(f"{MURF_API_URL}/generate", json=payload, headers=headers)
+    response = _session.post(f"{MURF_API_URL}/generate", json=payload, headers=headers)
     response.raise_for_status()
     response_data = response.json()
     return response_data.get("audioUrl")
\ No newline at end of file
@@ -0,0 +1,88 @@
+# services/tts_cache.py
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from .shared_cache import SharedCache
+
+
+def make_key(text: str, voice_id: str, rate: int, pitch: int, style: str) -> str:
+    """Content address for a synthesized clip: same text and voice settings, same audio."""
+    raw = json.dumps([text.strip(), voice_id, rate, pitch, style], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """
+    Two-tier cache for synthesized audio.
+
+    - memory: LRU limited by total bytes, private to this process
+    - shared: a `SharedCache` (folder or SQLite) that every worker on the host reads and fills
+
+    Safe to call from the TTS worker threads.
+    """
+
+    def __init__(self, max_memory_bytes: int, shared: Optional[SharedCache] = None):
+        self.max_memory_bytes = max_memory_bytes
+        self.shared = shared
+
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return audio
+
+        audio = self.shared.get(key) if self.shared else None
+        with self._lock:
+            if audio is None:
+                self.misses += 1
+                return None
+            self.shared_hits += 1
+            self._remember(key, audio)
+        return audio
+
+    def put(self, key: str, audio: bytes):
+        if not audio:
+            return
+        with self._lock:
+            self._remember(key, audio)
+        if self.shared:
+            self.shared.put(key, audio)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = {
+                "memory_hits": self.memory_hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+            }
+        if self.shared:
+            stats["shared"] = self.shared.stats()
+        return stats
+
+    # --- memory tier (caller holds the lock) ---
+    def _remember(self, key: str, audio: bytes):
+        if len(audio) > self.max_memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
@@ -0,0 +1,133 @@
+# services/tts_pipeline.py
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import config
+from . import tts
+from .framing import AudioSender
+
+logger = logging.getLogger(__name__)
+
+# Dedicated pool so long replies can't starve the event loop's default executor
+_executor = ThreadPoolExecutor(max_workers=config.TTS_WORKERS, thread_name_prefix="tts")
+
+
+class TTSPipeline:
+    """
+    Synthesizes the sentences of one reply concurrently but delivers the audio in sentence order.
+
+    Audio is forwarded chunk by chunk as Murf streams it: the sentence at the head of the line
+    plays as it arrives, later sentences buffer until it is their turn.
+
+    At most `max_in_flight` sentences are synthesizing or waiting to be sent at once;
+    `submit` waits for a free slot, which pushes back on whoever is producing sentences.
+
+    `cancel()` abandons the reply (barge-in): nothing more is sent, queued sentences are never
+    synthesized and running ones stop reading from Murf at their next chunk.
+    """
+
+    def __init__(
+            self,
+            sender: AudioSender,
+            max_in_flight: int = config.TTS_MAX_IN_FLIGHT,
+            save_prefix: Optional[str] = None,
+            api_key: Optional[str] = None,
+    ):
+        self._sender = sender
+        # The session's Murf key; None uses the one from .env
+        self._api_key = api_key
+        # When set, each sentence is also saved as uploads/<save_prefix>_<n>.wav
+        self._save_prefix = save_prefix
+        self._submitted = 0
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._pending: asyncio.Queue = asyncio.Queue()
+        self._cancelled = threading.Event()
+        self._delivery = asyncio.create_task(self._deliver())
+
+    async def submit(self, sentence: str):
+        """Starts synthesizing a sentence, waiting first if the in-flight limit is reached."""
+        await self._slots.acquire()
+        index = self._next_index()
+        output_file = f"{self._save_prefix}_{index:03d}.wav" if self._save_prefix else None
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+
+        def put(chunk):
+            try:
+                loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+            except RuntimeError:
+                # The event loop is gone (server shutting down), nobody is listening anymore
+                pass
+
+        def synthesize():
+            if self._cancelled.is_set():
+                put(None)
+                return
+            stream = tts.stream_speech(sentence, output_file, self._api_key)
+            try:
+                for chunk in stream:
+                    if self._cancelled.is_set():
+                        break
+                    put(chunk)
+            except Exception as e:
+                logger.error(f"Error converting text to speech: {e}")
+            finally:
+                # Closing early skips caching the partial clip
+                stream.close()
+                put(None)
+
+        loop.run_in_executor(_executor, synthesize)
+        self._pending.put_nowait((index, chunks))
+
+    async def submit_audio(self, audio_bytes: bytes):
+        """Queues audio that is already rendered, so it still plays in sentence order."""
+        await self._slots.acquire()
+        chunks: asyncio.Queue = asyncio.Queue()
+        chunks.put_nowait(audio_bytes)
+        chunks.put_nowait(None)
+        self._pending.put_nowait((self._next_index(), chunks))
+
+    async def close(self):
+        """Waits until every submitted sentence has been delivered."""
+        self._pending.put_nowait(None)
+        await self._delivery
+
+    def cancel(self):
+        """Stops delivery at once and tells the synthesis workers to give up."""
+        self._cancelled.set()
+        self._delivery.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def _next_index(self) -> int:
+        index = self._submitted
+        self._submitted += 1
+        return index
+
+    async def _deliver(self):
+        while True:
+            item = await self._pending.get()
+            if item is None:
+                break
+            index, chunks = item
+            try:
+                while True:
+                    chunk = await chunks.get()
+                    if chunk is None:
+                        break
+                    await self._sender.send_chunk(chunk, index)
+                await self._sender.end_sentence(index)
+            except Exception as e:
+                logger.error(f"Error delivering TTS audio: {e}")
+            finally:
+                self._slots.release()
+
+
+def shutdown():
+    """Stops the TTS worker threads. Called on app shutdown."""
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,155 @@
+# services/turns.py
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class TurnScheduler:
+    """
+    Runs one session's replies strictly one at a time, in the order the user spoke.
+
+    Final transcripts go into a mailbox; a single worker takes them out and awaits
+    `handle_turn(text)`, so there is never more than one LLM call in flight per session and
+    nothing else touches the chat history while a reply is being produced.
+
+    Rapid back-to-back turns are coalesced into one: everything waiting in the mailbox (after
+    an optional `coalesce_ms` pause) is joined, and a turn that was cut off before it finished
+    is prepended to the next one if that arrives within `merge_window_ms`, so a sentence split
+    by a pause still gets a single answer. A turn whose reply was already recorded (see
+    `mark_answered()`) is not carried over, even if its audio is cut off.
+
+    With `barge_in`, a new turn or `interrupt()` cancels the reply in progress, and
+    `on_interrupt()` is awaited (to flush the client) whenever a reply is cut off or the
+    client is still playing one (`is_playing()`).
+    """
+
+    def __init__(
+            self,
+            handle_turn: Callable[[str], Awaitable[None]],
+            loop: asyncio.AbstractEventLoop,
+            on_interrupt: Callable[[], Awaitable[None]],
+            is_playing: Callable[[], bool] = lambda: False,
+            barge_in: bool = config.BARGE_IN,
+            coalesce_ms: int = config.TURN_COALESCE_MS,
+            merge_window_ms: int = config.TURN_MERGE_WINDOW_MS,
+    ):
+        self.handle_turn = handle_turn
+        self.loop = loop
+        self.on_interrupt = on_interrupt
+        self.is_playing = is_playing
+        self.barge_in = barge_in
+        self.coalesce = coalesce_ms / 1000
+        self.merge_window = merge_window_ms / 1000
+
+        self._mailbox: deque = deque()
+        self._mail = asyncio.Event()
+        self._current: Optional[asyncio.Task] = None
+        self._interrupt_reason = ""
+        # Text and start time of the last turn that was cancelled before it finished
+        self._unanswered: Optional[Tuple[str, float]] = None
+        self._answered = False
+        self._worker: Optional[asyncio.Task] = None
+
+        self.turns = 0
+        self.completed = 0
+        self.interrupted = 0
+        self.coalesced = 0
+        self.max_mailbox = 0
+
+    def start(self):
+        self._worker = self.loop.create_task(self._run())
+
+    def submit(self, text: str):
+        """Thread-safe: queues a final transcript."""
+        self.loop.call_soon_threadsafe(self._post, text)
+
+    def mark_answered(self):
+        """Called by `handle_turn` once the reply is recorded; cutting it off later won't re-ask the turn."""
+        self._answered = True
+
+    async def interrupt(self, reason: str):
+        """Cuts off the reply in progress, or flushes the client if it is still playing one."""
+        if self._busy:
+            self._cancel_current(reason)
+        elif self.is_playing():
+            await self._flush(reason)
+
+    async def close(self):
+        for task in (self._worker, self._current):
+            if task and not task.done():
+                task.cancel()
+        await asyncio.gather(*(task for task in (self._worker, self._current) if task), return_exceptions=True)
+
+    @property
+    def _busy(self) -> bool:
+        return self._current is not None and not self._current.done()
+
+    def _post(self, text: str):
+        self._mailbox.append(text)
+        self.max_mailbox = max(self.max_mailbox, len(self._mailbox))
+        self._mail.set()
+        if self.barge_in and self._busy:
+            self._cancel_current("new turn")
+
+    def _cancel_current(self, reason: str):
+        self._interrupt_reason = reason
+        self._current.cancel()
+
+    def _take_mail(self) -> str:
+        texts = list(self._mailbox)
+        self._mailbox.clear()
+        if self._unanswered is not None:
+            text, started = self._unanswered
+            self._unanswered = None
+            if time.monotonic() - started <= self.merge_window:
+                texts.insert(0, text)
+        self.coalesced += len(texts) - 1
+        return " ".join(texts)
+
+    async def _flush(self, reason: str):
+        self.interrupted += 1
+        logger.info(f"Barge-in ({reason}): dropped the rest of the previous reply.")
+        await self.on_interrupt()
+
+    async def _run(self):
+        while True:
+            while not self._mailbox:
+                self._mail.clear()
+                await self._mail.wait()
+            if self.coalesce:
+                # Give a turn that is split by a short pause the chance to arrive
+                await asyncio.sleep(self.coalesce)
+            text = self._take_mail()
+            if self.barge_in and self.is_playing():
+                await self._flush("new turn")
+
+            self.turns += 1
+            started = time.monotonic()
+            self._answered = False
+            turn = self._current = self.loop.create_task(self.handle_turn(text))
+            await asyncio.wait([turn])
+            self._current = None
+
+            if turn.cancelled():
+                self._unanswered = None if self._answered else (text, started)
+                await self._flush(self._interrupt_reason)
+            else:
+                self._unanswered = None
+                self.completed += 1
+                if turn.exception():
+                    logger.error(f"Turn failed: {turn.exception()}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "turns": self.turns,
+            "completed": self.completed,
+            "interrupted": self.interrupted,
+            "coalesced": self.coalesced,
+            "max_mailbox": self.max_mailbox,
+        }
@@ -0,0 +1,139 @@
+# services/vad.py
+from collections import deque
+from typing import Dict, List
+
+import numpy as np
+
+import config
+
+
+class VoiceActivityGate:
+    """
+    Energy / zero-crossing voice activity detection on 16 kHz PCM16 frames from the browser.
+
+    Speech starts once `min_speech_ms` of it has been heard in a row, so a click or a bump
+    doesn't count as an onset, and ends after `hangover_ms` of silence. Speech, and the `tail_ms`
+    of silence after it, is forwarded to AssemblyAI untouched, so its end-of-turn detection still
+    hears the pause it needs. Longer silences are thinned to one frame every `keepalive_ms` to keep
+    the session alive. The last `pre_roll_ms` of suppressed audio, which includes the frames that
+    confirm an onset, is replayed when speech starts, so word onsets aren't clipped.
+    """
+
+    def __init__(
+            self,
+            sample_rate: int = 16000,
+            energy_threshold: float = config.VAD_ENERGY_THRESHOLD,
+            noise_ratio: float = config.VAD_NOISE_RATIO,
+            zcr_threshold: float = config.VAD_ZCR_THRESHOLD,
+            min_speech_ms: int = config.VAD_MIN_SPEECH_MS,
+            hangover_ms: int = config.VAD_HANGOVER_MS,
+            tail_ms: int = config.VAD_TAIL_MS,
+            pre_roll_ms: int = config.VAD_PRE_ROLL_MS,
+            keepalive_ms: int = config.VAD_KEEPALIVE_MS,
+    ):
+        self.bytes_per_ms = sample_rate * 2 / 1000
+        self.energy_threshold = energy_threshold
+        self.noise_ratio = noise_ratio
+        self.zcr_threshold = zcr_threshold
+        self.min_speech_ms = min_speech_ms
+        self.hangover_ms = hangover_ms
+        self.tail_ms = tail_ms
+        self.pre_roll_ms = pre_roll_ms
+        self.keepalive_ms = keepalive_ms
+
+        # Running estimate of the background level, only updated while nobody is talking
+        self.noise_floor = energy_threshold / noise_ratio
+        # Silence since the last frame of speech; start as if a long silence just happened
+        self.silence_ms = float(max(hangover_ms, tail_ms))
+        # Speech-like audio heard in a row while not in speech, not yet enough for an onset
+        self.candidate_ms = 0.0
+        self.since_keepalive_ms = 0.0
+        self.in_speech = False
+        self._pre_roll: deque = deque()
+        self._pre_roll_ms = 0.0
+
+        self.bytes_in = 0
+        self.bytes_forwarded = 0
+        self.speech_onsets = 0
+
+    def is_speech(self, frame: bytes) -> bool:
+        """Vectorized check of one frame: loud enough, or a quieter hiss-like sound (s, f, sh)."""
+        samples = np.frombuffer(frame, dtype="<i2", count=len(frame) // 2).astype(np.float32)
+        if samples.size == 0:
+            return False
+        samples /= 32768.0
+        rms = float(np.sqrt(np.mean(samples * samples)))
+        zero_crossing_rate = float(np.count_nonzero(np.diff(np.signbit(samples)))) / samples.size
+
+        threshold = max(self.energy_threshold, self.noise_floor * self.noise_ratio)
+        speech = rms >= threshold or (rms >= threshold / 2 and zero_crossing_rate >= self.zcr_threshold)
+        if not speech:
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * rms
+        return speech
+
+    def process(self, frame: bytes) -> List[bytes]:
+        """Returns the frames to forward upstream for this incoming frame (possibly none)."""
+        duration_ms = len(frame) / self.bytes_per_ms
+        self.bytes_in += len(frame)
+
+        speech = self.is_speech(frame)
+        if speech and not self.in_speech:
+            self.candidate_ms += duration_ms
+            if self.candidate_ms >= self.min_speech_ms:
+                self.in_speech = True
+                self.speech_onsets += 1
+        elif not speech:
+            self.candidate_ms = 0.0
+
+        if speech and self.in_speech:
+            self.candidate_ms = 0.0
+            self.silence_ms = 0.0
+            # The pre-roll holds the frames that confirmed the onset, so it always goes first
+            forwarded = list(self._pre_roll) + [frame]
+            self._pre_roll.clear()
+            self._pre_roll_ms = 0.0
+            return self._forward(forwarded)
+
+        # A burst too short to be an onset counts as silence; it stays in the pre-roll
+        self.silence_ms += duration_ms
+        if self.silence_ms > self.hangover_ms:
+            self.in_speech = False
+        if self.silence_ms <= self.tail_ms:
+            return self._forward([frame])
+
+        self.since_keepalive_ms += duration_ms
+        if self.since_keepalive_ms >= self.keepalive_ms and not self.candidate_ms:
+            self.since_keepalive_ms = 0.0
+            # Older pre-roll would now play out of order, so it is dropped for good
+            self._pre_roll.clear()
+            self._pre_roll_ms = 0.0
+            return self._forward([frame])
+
+        self._remember(frame, duration_ms)
+        return []
+
+    def _forward(self, frames: List[bytes]) -> List[bytes]:
+        self.bytes_forwarded += sum(len(frame) for frame in frames)
+        return frames
+
+    def _remember(self, frame: bytes, duration_ms: float):
+        """Keeps a suppressed frame in the pre-roll, dropping the oldest once it is full."""
+        self._pre_roll.append(frame)
+        self._pre_roll_ms += duration_ms
+        while self._pre_roll and self._pre_roll_ms - len(self._pre_roll[0]) / self.bytes_per_ms >= self.pre_roll_ms:
+            self._pre_roll_ms -= len(self._pre_roll.popleft()) / self.bytes_per_ms
+
+    @property
+    def bytes_suppressed(self) -> int:
+        # Audio still sitting in the pre-roll counts as suppressed until speech replays it
+        return self.bytes_in - self.bytes_forwarded
+
+    def stats(self) -> Dict[str, float]:
+        suppressed = self.bytes_suppressed
+        return {
+            "bytes_in": self.bytes_in,
+            "bytes_forwarded": self.bytes_forwarded,
+            "bytes_suppressed": suppressed,
+            "suppressed_pct": round(100 * suppressed / self.bytes_in, 1) if self.bytes_in else 0.0,
+            "speech_onsets": self.speech_onsets,
+        }
@@ -0,0 +1,43 @@
+// static/pcm-capture-worklet.js
+// Runs on the audio rendering thread: converts mic samples to 16-bit PCM and posts them
+// to the page in frames of `frameSamples`, so the main thread only forwards ready buffers.
+class PcmCaptureProcessor extends AudioWorkletProcessor {
+    constructor(options) {
+        super();
+        this.frameSamples = options.processorOptions.frameSamples;
+        this.frame = new Int16Array(this.frameSamples);
+        this.filled = 0;
+
+        this.port.onmessage = (event) => {
+            if (event.data === "flush") {
+                this.postFrame();
+            }
+        };
+    }
+
+    postFrame() {
+        if (this.filled === 0) return;
+        const frame = this.filled === this.frameSamples ? this.frame : this.frame.slice(0, this.filled);
+        // Transfer instead of copy; a fresh buffer is allocated for the next frame
+        this.port.postMessage(frame.buffer, [frame.buffer]);
+        this.frame = new Int16Array(this.frameSamples);
+        this.filled = 0;
+    }
+
+    process(inputs) {
+        const input = inputs[0];
+        if (!input || input.length === 0) return true;
+
+        const samples = input[0];
+        for (let i = 0; i < samples.length; i++) {
+            const sample = Math.max(-1, Math.min(1, samples[i]));
+            this.frame[this.filled++] = sample * 0x7FFF;
+            if (this.filled === this.frameSamples) {
+                this.postFrame();
+            }
+        }
+        return true;
+    }
+}
+
+registerProcessor("pcm-capture", PcmCaptureProcessor);
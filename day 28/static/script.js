@@ -21,10 +21,19 @@ document.addEventListener("DOMContentLoaded", () => {
     let ws = null;
     let audioContext;
     let mediaStream;
-    let processor;
-    let audioQueue = [];
-    let isPlaying = false;
+    let captureNode;
     let assistantMessageDiv = null;
+    // Live caption of what the user is saying; becomes their message when the final transcript arrives
+    let partialMessageDiv = null;
+
+    // Playback: every clip is decoded into an AudioBuffer and scheduled back-to-back on one context
+    let playbackContext = null;
+    let nextPlayTime = 0;
+    let playbackChain = Promise.resolve();
+    let scheduledSources = [];
+    // Bumped on every flush, so clips still being decoded from an interrupted reply are dropped
+    let playbackGeneration = 0;
+    let pcmFormat = { sampleRate: 24000, channels: 1 };
 
     // API Key State Management
     let keys = {
@@ -45,42 +54,158 @@ document.addEventListener("DOMContentLoaded", () => {
             }
         } else {
             assistantMessageDiv = null;
-            const messageDiv = document.createElement('div');
+            let messageDiv = partialMessageDiv;
+            partialMessageDiv = null;
+            if (!messageDiv || !chatLog.contains(messageDiv)) {
+                messageDiv = document.createElement('div');
+                chatLog.appendChild(messageDiv);
+            }
             messageDiv.className = 'message user';
             messageDiv.textContent = text;
-            chatLog.appendChild(messageDiv);
         }
         chatLog.scrollTop = chatLog.scrollHeight;
     };
 
-    const playNextInQueue = () => {
-        if (audioQueue.length > 0) {
-            isPlaying = true;
-            const base64Audio = audioQueue.shift();
-            // Create an Audio element
-            const audio = new Audio("data:audio/wav;base64," + base64Audio);
+    const showPartialTranscript = (text) => {
+        if (!partialMessageDiv || !chatLog.contains(partialMessageDiv)) {
+            partialMessageDiv = document.createElement('div');
+            partialMessageDiv.className = 'message user partial';
+            chatLog.appendChild(partialMessageDiv);
+        }
+        partialMessageDiv.textContent = text;
+        chatLog.scrollTop = chatLog.scrollHeight;
+    };
 
-            audio.onended = () => {
-                isPlaying = false;
-                playNextInQueue();
-            };
-            audio.play().catch(e => console.error("Error playing audio:", e));
+    // Mic audio is sent as 16 kHz PCM16 in frames of this length (AssemblyAI accepts 50-1000 ms)
+    const CAPTURE_SAMPLE_RATE = 16000;
+    const CAPTURE_FRAME_MS = 100;
+
+    // Binary audio frames: 8 byte header (version, codec, sentence, sequence) + raw audio
+    const AUDIO_HEADER_BYTES = 8;
+    const CODEC_WAV = 1;
+    const CODEC_PCM16 = 2;
+    // Small head start when playback (re)starts, so the next chunk arrives before the first ends
+    const PLAYBACK_LEAD_SECONDS = 0.08;
+
+    const ensurePlaybackContext = () => {
+        if (!playbackContext) {
+            playbackContext = new (window.AudioContext || window.webkitAudioContext)();
+        }
+        if (playbackContext.state === "suspended") {
+            playbackContext.resume();
+        }
+        return playbackContext;
+    };
+
+    const scheduleBuffer = (audioBuffer) => {
+        const ctx = ensurePlaybackContext();
+        const source = ctx.createBufferSource();
+        source.buffer = audioBuffer;
+        source.connect(ctx.destination);
+
+        const startAt = Math.max(nextPlayTime, ctx.currentTime + PLAYBACK_LEAD_SECONDS);
+        source.start(startAt);
+        nextPlayTime = startAt + audioBuffer.duration;
+
+        scheduledSources.push(source);
+        source.onended = () => {
+            scheduledSources = scheduledSources.filter(s => s !== source);
+        };
+    };
+
+    const pcm16ToAudioBuffer = (arrayBuffer, format) => {
+        const ctx = ensurePlaybackContext();
+        const samples = new Int16Array(arrayBuffer);
+        const frames = samples.length / format.channels;
+        const audioBuffer = ctx.createBuffer(format.channels, frames, format.sampleRate);
+        for (let channel = 0; channel < format.channels; channel++) {
+            const output = audioBuffer.getChannelData(channel);
+            for (let i = 0; i < frames; i++) {
+                output[i] = samples[i * format.channels + channel] / 0x8000;
+            }
+        }
+        return audioBuffer;
+    };
+
+    // Decoding is async, so every clip goes through one promise chain to keep arrival order
+    const enqueueEncoded = (arrayBuffer) => {
+        const generation = playbackGeneration;
+        playbackChain = playbackChain
+            .then(() => ensurePlaybackContext().decodeAudioData(arrayBuffer))
+            .then(audioBuffer => {
+                if (generation === playbackGeneration) scheduleBuffer(audioBuffer);
+            })
+            .catch(e => console.error("Error decoding audio:", e));
+    };
+
+    const enqueuePcm16 = (arrayBuffer, format) => {
+        const generation = playbackGeneration;
+        playbackChain = playbackChain
+            .then(() => {
+                if (generation === playbackGeneration) scheduleBuffer(pcm16ToAudioBuffer(arrayBuffer, format));
+            })
+            .catch(e => console.error("Error playing audio:", e));
+    };
+
+    // Barge-in: stop what is playing and forget everything queued behind it
+    const flushPlayback = () => {
+        playbackGeneration++;
+        scheduledSources.forEach(source => {
+            try {
+                source.stop();
+            } catch (e) {
+                // Already stopped
+            }
+        });
+        scheduledSources = [];
+        nextPlayTime = 0;
+        playbackChain = Promise.resolve();
+    };
+
+    const base64ToArrayBuffer = (b64) => {
+        const binary = atob(b64);
+        const bytes = new Uint8Array(binary.length);
+        for (let i = 0; i < binary.length; i++) {
+            bytes[i] = binary.charCodeAt(i);
+        }
+        return bytes.buffer;
+    };
+
+    const handleAudioFrame = (buffer) => {
+        const codec = new DataView(buffer, 0, AUDIO_HEADER_BYTES).getUint8(1);
+        const audio = buffer.slice(AUDIO_HEADER_BYTES);
+        if (codec === CODEC_PCM16) {
+            enqueuePcm16(audio, pcmFormat);
+        } else if (codec === CODEC_WAV) {
+            enqueueEncoded(audio);
+        } else {
+            console.warn("Skipping audio frame with unknown codec:", codec);
         }
     };
 
     const startRecording = async () => {
         try {
-            mediaStream = await navigator.mediaDevices.getUserMedia({ audio: true });
-            audioContext = new (window.AudioContext || window.webkitAudioContext)({ sampleRate: 16000 });
+            // Created inside the click handler so the browser lets it play sound
+            ensurePlaybackContext();
+            mediaStream = await navigator.mediaDevices.getUserMedia({
+                // Keeps our own playback out of the mic, so it isn't mistaken for the user barging in
+                audio: { echoCancellation: true, noiseSuppression: true }
+            });
+            audioContext = new (window.AudioContext || window.webkitAudioContext)({ sampleRate: CAPTURE_SAMPLE_RATE });
             const source = audioContext.createMediaStreamSource(mediaStream);
 
-            processor = audioContext.createScriptProcessor(1024, 1, 1);
-            source.connect(processor);
-            processor.connect(audioContext.destination);
+            // PCM16 conversion and framing happen on the audio thread, not here
+            await audioContext.audioWorklet.addModule("/static/pcm-capture-worklet.js");
+            captureNode = new AudioWorkletNode(audioContext, "pcm-capture", {
+                processorOptions: { frameSamples: CAPTURE_SAMPLE_RATE * CAPTURE_FRAME_MS / 1000 }
+            });
+            source.connect(captureNode);
+            captureNode.connect(audioContext.destination);
 
             // Generate WebSocket URL based on current host
             const wsUrl = `ws://${window.location.host}/ws`;
             ws = new WebSocket(wsUrl);
+            ws.binaryType = "arraybuffer";
 
             ws.onopen = () => {
                 console.log("✅ WebSocket connection open");
@@ -91,16 +216,13 @@ document.addEventListener("DOMContentLoaded", () => {
                     assemblyai: localStorage.getItem('ASSEMBLYAI_API_KEY'),
                     murf: localStorage.getItem('MURF_API_KEY')
                 }));
+                // Ask for raw binary audio frames instead of base64 JSON
+                ws.send(JSON.stringify({ type: 'audio_mode', mode: 'binary' }));
             };
 
-            processor.onaudioprocess = (e) => {
+            captureNode.port.onmessage = (event) => {
                 if (ws && ws.readyState === WebSocket.OPEN) {
-                    const audioData = e.inputBuffer.getChannelData(0);
-                    const pcm16 = new Int16Array(audioData.length);
-                    for (let i = 0; i < audioData.length; i++) {
-                        pcm16[i] = Math.max(-1, Math.min(1, audioData[i])) * 0x7FFF;
-                    }
-                    ws.send(pcm16.buffer);
+                    ws.send(event.data);
                 }
             };
 
@@ -115,22 +237,28 @@ document.addEventListener("DOMContentLoaded", () => {
             };
 
             ws.onmessage = (event) => {
+                if (event.data instanceof ArrayBuffer) {
+                    handleAudioFrame(event.data);
+                    return;
+                }
                 const msg = JSON.parse(event.data);
                 if (msg.type === "partial") {
-                    if (assistantMessageDiv) {
-                        assistantMessageDiv.textContent = msg.text;
-                    } else {
-                        addOrUpdateMessage(msg.text, "assistant");
-                    }
+                    showPartialTranscript(msg.text);
                 } else if (msg.type === "final") {
                     addOrUpdateMessage(msg.text, "user");
                 } else if (msg.type === "assistant") {
                     addOrUpdateMessage(msg.text, "assistant");
                 } else if (msg.type === "audio") {
-                    audioQueue.push(msg.b64);
-                    if (!isPlaying) {
-                        playNextInQueue();
-                    }
+                    enqueueEncoded(base64ToArrayBuffer(msg.b64));
+                } else if (msg.type === "audio_format") {
+                    pcmFormat = { sampleRate: msg.sample_rate, channels: msg.channels };
+                } else if (msg.type === "flush") {
+                    flushPlayback();
+                } else if (msg.type === "audio_mode") {
+                    console.log("Audio delivery mode:", msg.mode);
+                } else if (msg.type === "error") {
+                    console.error(`❌ ${msg.source} error:`, msg.text);
+                    statusDisplay.textContent = msg.text;
                 }
             };
 
@@ -144,7 +272,10 @@ document.addEventListener("DOMContentLoaded", () => {
     };
 
     const stopRecording = () => {
-        if (processor) processor.disconnect();
+        if (captureNode) {
+            captureNode.port.postMessage("flush");
+            captureNode.disconnect();
+        }
         if (mediaStream) mediaStream.getTracks().forEach(track => track.stop());
         if (ws) ws.close();
 
@@ -0,0 +1,43 @@
+import google.generativeai as genai
+from google.ai import generativelanguage as glm
+
+from services import llm
+
+
+def answer(client, keys_used):
+    # The key a real request would carry is the one its client was created with
+    keys_used.append(client._transport._credentials.token)
+    return glm.GenerateContentResponse(candidates=[glm.Candidate(
+        content=glm.Content(role="model", parts=[glm.Part(text="Hi Mishka!")]),
+        finish_reason=glm.Candidate.FinishReason.STOP,
+    )])
+
+
+def test_models_send_requests_with_their_session_key(monkeypatch):
+    keys_used = []
+    monkeypatch.setattr(
+        glm.GenerativeServiceClient, "generate_content", lambda self, request=None, **kwargs: answer(self, keys_used)
+    )
+    # A process-wide key that must never be used for a session with its own key
+    genai.configure(api_key="process-default")
+
+    llm.get_model("session-a").generate_content("hello")
+    llm.get_model("session-b").generate_content("hello")
+    llm.get_model("session-a", system_instruction=llm.SUMMARY_INSTRUCTIONS).generate_content("hello")
+
+    assert keys_used == ["session-a", "session-b", "session-a"]
+
+
+def test_conversation_streams_with_its_session_key(monkeypatch):
+    keys_used = []
+    monkeypatch.setattr(
+        glm.GenerativeServiceClient, "stream_generate_content",
+        lambda self, request=None, **kwargs: iter([answer(self, keys_used)]),
+    )
+    monkeypatch.setattr(llm.news, "should_fetch_news", lambda query: False)
+    genai.configure(api_key="process-default")
+
+    conversation = llm.Conversation(api_key="session-c", token_budget=0).open()
+
+    assert "".join(conversation.stream("hello")) == "Hi Mishka!"
+    assert keys_used == ["session-c"]
@@ -0,0 +1,33 @@
+import asyncio
+
+from services.partials import PartialTranscriptThrottle
+
+
+def test_close_cancels_sends_in_flight():
+    async def run():
+        loop = asyncio.get_running_loop()
+        started, cancelled = asyncio.Event(), []
+
+        async def send(text):
+            started.set()
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.append(text)
+                raise
+
+        partials = PartialTranscriptThrottle(send, loop, min_interval_ms=0)
+        partials.offer("hello")
+        await started.wait()
+        assert len(partials._sends) == 1
+
+        partials.close()
+        await asyncio.sleep(0)
+        partials.offer("hello there")
+        await asyncio.sleep(0.01)
+
+        assert cancelled == ["hello"]
+        assert not partials._sends
+        assert partials.sent == 1
+
+    asyncio.run(run())
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+
+from services import llm
+from services.speculation import SpeculativePrefetcher
+
+
+class FakeConversation(llm.Conversation):
+    """Gemini as a request that takes FIRST_TOKEN_S to answer; records how many run at once."""
+
+    FIRST_TOKEN_S = 0.2
+
+    def __init__(self):
+        super().__init__()
+        self.queries = []
+        self.running = 0
+        self.most_running = 0
+        self._lock = threading.Lock()
+
+    def stream(self, user_query):
+        with self._lock:
+            self.queries.append(user_query)
+            self.running += 1
+            self.most_running = max(self.most_running, self.running)
+        try:
+            time.sleep(self.FIRST_TOKEN_S)
+            yield "Hi Mishka!"
+            return llm.text_content("user", user_query), llm.text_content("model", "Hi Mishka!")
+        finally:
+            with self._lock:
+                self.running -= 1
+
+
+async def ignore(text):
+    pass
+
+
+def test_a_missed_speculation_ends_before_the_turn_starts_its_own_request():
+    async def run():
+        conversation = FakeConversation().open()
+        speculator = SpeculativePrefetcher(conversation, asyncio.get_running_loop(), stable_ms=10, min_words=1)
+        speculator.offer("how do bees")
+        await asyncio.sleep(0.05)
+        assert speculator.stats()["started"] == 1
+
+        # The user went on talking after the pause the speculation started on
+        assert await speculator.take("how do bees make honey") is None
+        stream = llm.LLMStream("how do bees make honey", conversation)
+        await stream.consume(ignore)
+        speculator.end_turn(stream)
+
+        assert conversation.queries == ["how do bees", "how do bees make honey"]
+        assert conversation.most_running == 1
+
+    asyncio.run(run())
+
+
+def test_nothing_is_speculated_while_a_turn_is_answered():
+    async def run():
+        conversation = FakeConversation().open()
+        speculator = SpeculativePrefetcher(conversation, asyncio.get_running_loop(), stable_ms=10, min_words=1)
+        assert await speculator.take("hello") is None
+        stream = llm.LLMStream("hello", conversation)
+
+        # The user speaks again while the reply is still being generated
+        speculator.offer("and another thing")
+        await asyncio.sleep(0.05)
+        assert speculator.stats()["started"] == 0
+
+        # A barge-in cancels the reply; its request is still running when the turn ends
+        stream.cancel()
+        speculator.end_turn(stream)
+        speculator.offer("tell me about ants")
+        await asyncio.sleep(0.05)
+        assert speculator.stats()["started"] == 0
+
+        await stream.wait_finished()
+        speculator.offer("tell me about ants please")
+        await asyncio.sleep(0.05)
+        assert speculator.stats()["started"] == 1
+        speculator.close()
+        await asyncio.sleep(FakeConversation.FIRST_TOKEN_S + 0.05)
+        assert conversation.most_running == 1
+
+    asyncio.run(run())
@@ -0,0 +1,57 @@
+import numpy as np
+
+from services.vad import VoiceActivityGate
+
+SAMPLE_RATE = 16000
+FRAME_MS = 100
+
+
+def frames(ms, amplitude, hz=220.0):
+    """PCM16 frames of a tone (or low-level noise at hz=0), the way the browser sends them."""
+    count = SAMPLE_RATE * ms // 1000
+    if hz:
+        samples = amplitude * np.sin(2 * np.pi * hz * np.arange(count) / SAMPLE_RATE)
+    else:
+        samples = amplitude * np.random.default_rng(0).standard_normal(count)
+    pcm = (samples * 32767).astype("<i2").tobytes()
+    size = SAMPLE_RATE * FRAME_MS // 1000 * 2
+    return [pcm[offset:offset + size] for offset in range(0, len(pcm), size)]
+
+
+def feed(gate, audio):
+    return [forwarded for frame in audio for forwarded in gate.process(frame)]
+
+
+def test_noise_burst_then_speech():
+    gate = VoiceActivityGate()
+    room = frames(3000, 0.001, hz=0)
+    click = frames(FRAME_MS, 0.3, hz=3000)
+    pause = frames(200, 0.001, hz=0)
+    speech = frames(500, 0.2)
+
+    feed(gate, room)
+    assert feed(gate, click) == []
+    assert gate.speech_onsets == 0
+
+    feed(gate, pause)
+    forwarded = feed(gate, speech)
+    assert gate.speech_onsets == 1
+    # Every frame of speech goes out, in order, after the rest of the 300 ms pre-roll before it
+    assert forwarded == pause + speech
+
+    # A pause of a few hundred ms ends the utterance, so the next one is a new onset
+    feed(gate, frames(500, 0.001, hz=0))
+    feed(gate, speech)
+    assert gate.speech_onsets == 2
+
+
+def test_silence_after_speech_is_forwarded_for_the_turn_to_end():
+    gate = VoiceActivityGate(tail_ms=2600, keepalive_ms=1000)
+    feed(gate, frames(500, 0.2))
+    silence = frames(4000, 0.001, hz=0)
+
+    forwarded = feed(gate, silence)
+
+    # 2.6 s untouched, then one frame per second
+    assert len(forwarded) == 26 + 1
+    assert not gate.in_speech
@@ -0,0 +1,78 @@
+# slow_client.py
+"""
+How long AssemblyAI's reader thread is held up by our callbacks when the browser is slow.
+
+A fake reader thread delivers TURNS transcript events EVENT_GAP_MS apart, like the SDK does,
+and each callback sends one message to a browser that takes SEND_MS to accept it.
+"blocking" is the old handler (run_coroutine_threadsafe(...).result(timeout=5)); "bridge"
+posts to ClientEventBridge. For each we report how long the callbacks kept the reader thread
+busy, how late the last event was handled, and whether every message still reached the client
+in order.
+
+Run from the `test` folder:
+    python -m benchmarks.slow_client
+"""
+import asyncio
+import threading
+import time
+
+from services.event_bridge import ClientEventBridge
+
+TURNS = 20
+EVENT_GAP_MS = 50
+SEND_MS = 300
+
+
+class SlowWebSocket:
+    def __init__(self):
+        self.received = []
+
+    async def send_json(self, message):
+        await asyncio.sleep(SEND_MS / 1000)
+        self.received.append(message["text"])
+
+
+def reader_thread(on_turn, timings):
+    started = time.perf_counter()
+    for turn in range(TURNS):
+        due = started + turn * EVENT_GAP_MS / 1000
+        time.sleep(max(0.0, due - time.perf_counter()))
+        call_started = time.perf_counter()
+        on_turn({"type": "transcript", "text": f"turn {turn}"})
+        timings.append(time.perf_counter() - call_started)
+    timings.append(time.perf_counter() - due)  # how late the last event was done with
+
+
+async def run(use_bridge: bool):
+    loop = asyncio.get_running_loop()
+    websocket = SlowWebSocket()
+    bridge = ClientEventBridge(websocket, loop)
+    bridge.start()
+
+    def on_turn_blocking(message):
+        try:
+            asyncio.run_coroutine_threadsafe(websocket.send_json(message), loop).result(timeout=5)
+        except Exception:
+            pass
+
+    timings = []
+    reader = threading.Thread(target=reader_thread, args=(bridge.post if use_bridge else on_turn_blocking, timings))
+    reader.start()
+    await loop.run_in_executor(None, reader.join)
+    await bridge.close(timeout=TURNS * SEND_MS / 1000 + 1)
+
+    lateness = timings.pop()
+    in_order = websocket.received == [f"turn {turn}" for turn in range(TURNS)]
+    label = "bridge" if use_bridge else "blocking"
+    print(f"{label:<9} reader thread busy {1000 * sum(timings):6.0f} ms   "
+          f"last event handled {1000 * lateness:6.0f} ms late   delivered {len(websocket.received)}/{TURNS} in order: {in_order}")
+
+
+def main():
+    print(f"{TURNS} transcript events {EVENT_GAP_MS} ms apart, browser takes {SEND_MS} ms per message")
+    asyncio.run(run(use_bridge=False))
+    asyncio.run(run(use_bridge=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -20,9 +20,10 @@ from typing import Type
 import os
 from dotenv import load_dotenv
 import asyncio
-from concurrent.futures import TimeoutError
 import json
 from services.llm_service import LLMService
+from services.event_bridge import ClientEventBridge
+from services.audio_ingress import AudioIngressQueue
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -44,6 +45,8 @@ UPLOADS_DIR.mkdir(exist_ok=True)
 
 # Global WebSocket connection storage
 active_websockets = {}
+# Audio ingress queue per connection, for /stats
+active_ingress = {}
 
 
 # WebSocket Audio Streaming with AssemblyAI Transcription
@@ -72,66 +75,29 @@ async def websocket_audio(websocket: WebSocket):
     # Get the event loop for WebSocket communication
     loop = asyncio.get_event_loop()
 
+    # SDK callbacks run on AssemblyAI's reader thread; they only queue messages for the
+    # browser, and a single sender task delivers them, so a slow client never stalls them
+    bridge = ClientEventBridge(websocket, loop)
+    bridge.start()
+
     # Define event handlers
     def on_begin(_: Type[StreamingClient], event: BeginEvent):
-        try:
-            msg = {"type": "session", "message": f"Session started: {event.id}"}
-            asyncio.run_coroutine_threadsafe(
-                websocket.send_json(msg), loop
-            ).result(timeout=5)
-        except TimeoutError:
-            pass
-        except Exception:
-            pass
+        bridge.post({"type": "session", "message": f"Session started: {event.id}"})
 
     def on_turn(_: Type[StreamingClient], event: TurnEvent):
         is_formatted = hasattr(event, 'turn_is_formatted') and event.turn_is_formatted
         if event.end_of_turn:
-            try:
-                msg = {"type": "end_of_turn"}
-                asyncio.run_coroutine_threadsafe(
-                    websocket.send_json(msg), loop
-                ).result(timeout=5)
-            except TimeoutError:
-                pass
-            except Exception:
-                pass
+            bridge.post({"type": "end_of_turn"})
         if is_formatted and event.end_of_turn:
-            try:
-                msg = {"type": "transcript", "text": event.transcript}
-                asyncio.run_coroutine_threadsafe(
-                    websocket.send_json(msg), loop
-                ).result(timeout=5)
-                # Stream LLM response for final transcript
-                asyncio.run_coroutine_threadsafe(
-                    llm_service.stream_llm(event.transcript), loop
-                )
-            except TimeoutError:
-                pass
-            except Exception as e:
-                logger.error(f"Error in on_turn handler: {str(e)}")
+            bridge.post({"type": "transcript", "text": event.transcript})
+            # Stream LLM response for final transcript, after the transcript has been sent
+            bridge.spawn(llm_service.stream_llm, event.transcript)
 
     def on_terminated(_: Type[StreamingClient], event: TerminationEvent):
-        try:
-            msg = {"type": "termination", "message": f"Session ended: {event.audio_duration_seconds}s processed"}
-            asyncio.run_coroutine_threadsafe(
-                websocket.send_json(msg), loop
-            ).result(timeout=5)
-        except TimeoutError:
-            pass
-        except Exception:
-            pass
+        bridge.post({"type": "termination", "message": f"Session ended: {event.audio_duration_seconds}s processed"})
 
     def on_error(_: Type[StreamingClient], error: StreamingError):
-        try:
-            msg = {"type": "error", "message": str(error)}
-            asyncio.run_coroutine_threadsafe(
-                websocket.send_json(msg), loop
-            ).result(timeout=5)
-        except TimeoutError:
-            pass
-        except Exception:
-            pass
+        bridge.post({"type": "error", "message": str(error)})
 
     # Register event handlers
     client.on(StreamingEvents.Begin, on_begin)
@@ -149,14 +115,27 @@ async def websocket_audio(websocket: WebSocket):
 
     try:
         with open(file_path, "wb") as f:
-            while True:
-                message = await websocket.receive()
-                if "bytes" in message:
-                    pcm_data = message["bytes"]
-                    f.write(pcm_data)
-                    client.stream(pcm_data)
-                elif message.get("text") == "EOF":
-                    break
+            def forward_audio(pcm_data: bytes):
+                # Runs in a worker thread so a slow upstream socket never blocks the event loop
+                f.write(pcm_data)
+                client.stream(pcm_data)
+
+            ingress = AudioIngressQueue(forward_audio)
+            ingress.start()
+            active_ingress[connection_id] = ingress
+            eof = False
+            try:
+                while True:
+                    message = await websocket.receive()
+                    if "bytes" in message:
+                        await ingress.put(message["bytes"])
+                    elif message.get("text") == "EOF":
+                        eof = True
+                        break
+            finally:
+                # On EOF the queued audio is still uploaded; on disconnect it is discarded
+                await ingress.close(drain=eof)
+                logger.info(f"Audio ingress stats: {ingress.stats()}")
     except WebSocketDisconnect:
         pass
     except Exception as err:
@@ -168,7 +147,10 @@ async def websocket_audio(websocket: WebSocket):
         # Clean up WebSocket connection
         if connection_id in active_websockets:
             del active_websockets[connection_id]
+        active_ingress.pop(connection_id, None)
         client.disconnect(terminate=True)
+        # Deliver the termination message and anything still queued before closing
+        await bridge.close()
         await websocket.close()
 
 
@@ -182,6 +164,12 @@ async def health_check():
     }
 
 
+# Per-connection audio queue depth, to spot overloaded sessions
+@app.get("/stats")
+async def stats():
+    return {"audio_ingress": {connection_id: ingress.stats() for connection_id, ingress in active_ingress.items()}}
+
+
 # App Initialization
 app.mount("/", StaticFiles(directory=BASE_DIR / "static", html=True), name="static")
 
@@ -0,0 +1,171 @@
+# audio_ingress.py
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Callable, Dict
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Default cap: 2 s of 16 kHz PCM16; uploads merged up to 0.5 s
+AUDIO_INGRESS_MAX_BYTES = int(os.getenv("AUDIO_INGRESS_MAX_BYTES", str(16000 * 2 * 2)))
+AUDIO_INGRESS_POLICY = os.getenv("AUDIO_INGRESS_POLICY", "drop_oldest").lower()
+AUDIO_INGRESS_COALESCE_BYTES = int(os.getenv("AUDIO_INGRESS_COALESCE_BYTES", str(16000 * 2 // 2)))
+
+POLICY_DROP_OLDEST = "drop_oldest"
+POLICY_DROP_NEWEST = "drop_newest"
+POLICY_BLOCK = "block"
+POLICIES = (POLICY_DROP_OLDEST, POLICY_DROP_NEWEST, POLICY_BLOCK)
+
+
+class AudioIngressQueue:
+    """
+    Per-session queue between the WebSocket receive loop and the blocking STT upload.
+
+    The receive loop only enqueues; one drain task hands frames to `sink` in a worker thread,
+    so a slow upstream socket never stalls the event loop. At most `max_bytes` of audio is
+    held. When a new frame does not fit, `policy` decides what happens:
+
+      - drop_oldest: discard the oldest queued audio (keeps the stream close to real time)
+      - drop_newest: discard the incoming frame
+      - block:       `put()` waits for room, which stops reading the socket and pushes back
+                     on the client through TCP flow control
+
+    Frames waiting together are coalesced into one upload of up to `coalesce_bytes`
+    (0 sends them one by one), so a backlog clears in fewer, larger sends.
+    """
+
+    def __init__(
+            self,
+            sink: Callable[[bytes], None],
+            max_bytes: int = AUDIO_INGRESS_MAX_BYTES,
+            policy: str = AUDIO_INGRESS_POLICY,
+            coalesce_bytes: int = AUDIO_INGRESS_COALESCE_BYTES,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown audio ingress policy: {policy}")
+        self.sink = sink
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.coalesce_bytes = coalesce_bytes
+
+        self._frames: deque = deque()
+        self._bytes = 0
+        self._ready = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._closed = False
+        self._task = None
+
+        self.frames_in = 0
+        self.bytes_in = 0
+        self.sends = 0
+        self.bytes_sent = 0
+        self.frames_dropped = 0
+        self.bytes_dropped = 0
+        self.max_depth_bytes = 0
+        self.blocked_ms = 0.0
+        self.sink_ms = 0.0
+
+    def start(self):
+        self._task = asyncio.create_task(self._drain())
+
+    @property
+    def depth_bytes(self) -> int:
+        return self._bytes
+
+    async def put(self, frame: bytes):
+        """Queues one frame, applying the overflow policy if the queue is full."""
+        if self._closed or not frame:
+            return
+        self.frames_in += 1
+        self.bytes_in += len(frame)
+
+        if self._bytes + len(frame) > self.max_bytes:
+            if self.policy == POLICY_BLOCK:
+                started = time.perf_counter()
+                while self._frames and self._bytes + len(frame) > self.max_bytes and not self._closed:
+                    self._space.clear()
+                    await self._space.wait()
+                self.blocked_ms += 1000 * (time.perf_counter() - started)
+                if self._closed:
+                    return
+            elif self.policy == POLICY_DROP_NEWEST:
+                self._drop(frame)
+                return
+            else:
+                while self._frames and self._bytes + len(frame) > self.max_bytes:
+                    oldest = self._frames.popleft()
+                    self._bytes -= len(oldest)
+                    self._drop(oldest)
+
+        self._frames.append(frame)
+        self._bytes += len(frame)
+        self.max_depth_bytes = max(self.max_depth_bytes, self._bytes)
+        self._ready.set()
+
+    async def close(self, drain: bool = True):
+        """Stops accepting audio; with drain=True, waits for queued audio to be sent first."""
+        self._closed = True
+        if not drain:
+            self._frames.clear()
+            self._bytes = 0
+        self._ready.set()
+        self._space.set()
+        if self._task:
+            await self._task
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "policy": self.policy,
+            "depth_bytes": self._bytes,
+            "depth_frames": len(self._frames),
+            "max_depth_bytes": self.max_depth_bytes,
+            "frames_in": self.frames_in,
+            "bytes_in": self.bytes_in,
+            "sends": self.sends,
+            "bytes_sent": self.bytes_sent,
+            "frames_dropped": self.frames_dropped,
+            "bytes_dropped": self.bytes_dropped,
+            "blocked_ms": round(self.blocked_ms, 1),
+            "sink_ms": round(self.sink_ms, 1),
+        }
+
+    def _drop(self, frame: bytes):
+        if self.frames_dropped == 0:
+            logger.warning(f"Audio ingress queue full ({self.max_bytes} bytes), dropping audio ({self.policy})")
+        self.frames_dropped += 1
+        self.bytes_dropped += len(frame)
+
+    def _take_batch(self) -> bytes:
+        batch = [self._frames.popleft()]
+        size = len(batch[0])
+        while self._frames and size + len(self._frames[0]) <= self.coalesce_bytes:
+            frame = self._frames.popleft()
+            batch.append(frame)
+            size += len(frame)
+        self._bytes -= size
+        self._space.set()
+        return batch[0] if len(batch) == 1 else b"".join(batch)
+
+    async def _drain(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._frames:
+                if self._closed:
+                    return
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+
+            chunk = self._take_batch()
+            started = time.perf_counter()
+            try:
+                await loop.run_in_executor(None, self.sink, chunk)
+            except Exception as e:
+                logger.error(f"Error forwarding audio upstream: {e}")
+            self.sink_ms += 1000 * (time.perf_counter() - started)
+            self.sends += 1
+            self.bytes_sent += len(chunk)
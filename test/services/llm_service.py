@@ -1,11 +1,16 @@
 # llm_service.py
 import logging
 import google.generativeai as genai
+from google.ai import generativelanguage as glm
 from dotenv import load_dotenv
 import os
 import websockets
 import json
 import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from uuid import uuid4
 import re  # For sentence splitting
 
@@ -15,6 +20,63 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Gemini's streaming client is blocking; each reply is read on this bounded pool so the event
+# loop keeps serving other sockets while Gemini thinks
+LLM_WORKERS = int(os.getenv("LLM_WORKERS", "8"))
+_executor = ThreadPoolExecutor(max_workers=LLM_WORKERS, thread_name_prefix="llm")
+_DONE = object()
+
+# GenerativeModel objects reused across turns and sockets, least recently used first. Keyed by
+# (model name, system instruction, API key) and bound to that key's client, so keys never mix.
+MAX_MODELS = 16
+_models = OrderedDict()
+# Gemini clients, one per API key
+MAX_CLIENTS = 8
+_clients = OrderedDict()
+_models_lock = threading.Lock()
+
+
+def get_model(api_key: str, model_name: str = "gemini-1.5-flash", system_instruction: str = None):
+    """Returns the shared model for this name, instruction and key, building it on first use."""
+    key = (model_name, system_instruction, api_key)
+    with _models_lock:
+        model = _models.get(key)
+        if model is not None:
+            _models.move_to_end(key)
+            return model
+
+        model = genai.GenerativeModel(model_name, system_instruction=system_instruction)
+        if api_key:
+            _bind_client(model, _get_client(api_key))
+        _models[key] = model
+        if len(_models) > MAX_MODELS:
+            _models.popitem(last=False)
+        return model
+
+
+def _bind_client(model, client):
+    # The SDK has no public way to give a model its own client; the pinned version reads `_client`.
+    # Fail loudly on a version without it rather than quietly using the process-wide key.
+    if getattr(model, "_client", False) is not None:
+        raise RuntimeError(
+            f"google-generativeai {genai.__version__} can't be bound to a per-key client; "
+            "install the pinned version"
+        )
+    model._client = client
+
+
+def _get_client(api_key: str):
+    # Caller holds _models_lock
+    client = _clients.get(api_key)
+    if client is not None:
+        _clients.move_to_end(api_key)
+        return client
+    client = _clients[api_key] = glm.GenerativeServiceClient(client_options={"api_key": api_key})
+    if len(_clients) > MAX_CLIENTS:
+        # Models still holding the evicted client keep working until they are evicted too
+        _clients.popitem(last=False)
+    return client
+
 
 class LLMService:
     def __init__(self, client_websocket=None):
@@ -85,6 +147,28 @@ class LLMService:
             logger.error(f"Error in receive loop: {str(e)}")
         return audio_chunks
 
+    def stream_gemini(self, text: str) -> asyncio.Queue:
+        """
+        Reads the Gemini stream on the LLM pool and returns a queue of chunk texts, ended by
+        _DONE (or an exception). How long the call waited for a worker is logged.
+        """
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+        queued_at = time.perf_counter()
+
+        def produce():
+            queue_wait_ms = 1000 * (time.perf_counter() - queued_at)
+            logger.info(f"Gemini stream waited {queue_wait_ms:.0f} ms for a free worker")
+            try:
+                for chunk in get_model(self.api_key).generate_content(text, stream=True):
+                    loop.call_soon_threadsafe(chunks.put_nowait, chunk.text)
+                loop.call_soon_threadsafe(chunks.put_nowait, _DONE)
+            except Exception as e:
+                loop.call_soon_threadsafe(chunks.put_nowait, e)
+
+        loop.run_in_executor(_executor, produce)
+        return chunks
+
     async def stream_llm(self, text: str) -> tuple[str, list]:
         """Stream response from Gemini LLM, send sentences to Murf via WebSocket, and stream audio to client."""
         if not self.api_key:
@@ -110,8 +194,7 @@ class LLMService:
                 }
                 await ws.send(json.dumps(voice_config))
                 receiver_task = asyncio.create_task(self.receive_loop(ws))
-                model = genai.GenerativeModel("gemini-1.5-flash")
-                stream = model.generate_content(text, stream=True)
+                chunks = self.stream_gemini(text)
                 sentence_buffer = ""
                 accumulated_response = ""
                 print("\nGEMINI STREAMING RESPONSE \n")
@@ -127,11 +210,16 @@ class LLMService:
                     except Exception as e:
                         logger.error(f"Error sending start message: {str(e)}")
 
-                for chunk in stream:
-                    if chunk.text:
-                        accumulated_response += chunk.text
-                        sentence_buffer += chunk.text
-                        print(chunk.text, end="", flush=True)
+                while True:
+                    chunk_text = await chunks.get()
+                    if chunk_text is _DONE:
+                        break
+                    if isinstance(chunk_text, Exception):
+                        raise chunk_text
+                    if chunk_text:
+                        accumulated_response += chunk_text
+                        sentence_buffer += chunk_text
+                        print(chunk_text, end="", flush=True)
 
                         sentences = re.split(r'(?<=[.?!])\s+', sentence_buffer)
 
@@ -0,0 +1,46 @@
+import asyncio
+import threading
+
+from services.event_bridge import ClientEventBridge
+
+
+class RecordingWebSocket:
+    def __init__(self):
+        self.messages = []
+
+    async def send_json(self, message):
+        self.messages.append(message)
+
+
+def test_close_delivers_messages_posted_by_the_reader_thread_during_disconnect():
+    async def scenario():
+        websocket = RecordingWebSocket()
+        bridge = ClientEventBridge(websocket, asyncio.get_running_loop())
+        bridge.start()
+        bridge.post({"type": "session"})
+
+        # client.disconnect(terminate=True) blocks the loop while AssemblyAI's reader thread
+        # fires on_terminated, whose post only runs once the loop is free again
+        reader = threading.Thread(target=bridge.post, args=({"type": "termination"},))
+        reader.start()
+        reader.join()
+
+        await bridge.close()
+        return websocket.messages
+
+    assert asyncio.run(scenario()) == [{"type": "session"}, {"type": "termination"}]
+
+
+def test_close_stops_the_sender_after_draining_the_queue():
+    async def scenario():
+        websocket = RecordingWebSocket()
+        bridge = ClientEventBridge(websocket, asyncio.get_running_loop())
+        bridge.start()
+        for number in range(5):
+            bridge.post({"number": number})
+        await bridge.close()
+        return websocket.messages, bridge._task.done()
+
+    messages, stopped = asyncio.run(scenario())
+    assert [message["number"] for message in messages] == list(range(5))
+    assert stopped
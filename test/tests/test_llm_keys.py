@@ -0,0 +1,32 @@
+import pytest
+import google.generativeai as genai
+from google.ai import generativelanguage as glm
+
+# The service module also streams to Murf over websockets
+pytest.importorskip("websockets")
+
+from services import llm_service  # noqa: E402
+
+
+def answer(client, keys_used):
+    # The key a real request would carry is the one its client was created with
+    keys_used.append(client._transport._credentials.token)
+    return glm.GenerateContentResponse(candidates=[glm.Candidate(
+        content=glm.Content(role="model", parts=[glm.Part(text="Hi Mishka!")]),
+        finish_reason=glm.Candidate.FinishReason.STOP,
+    )])
+
+
+def test_models_send_requests_with_their_session_key(monkeypatch):
+    keys_used = []
+    monkeypatch.setattr(
+        glm.GenerativeServiceClient, "generate_content", lambda self, request=None, **kwargs: answer(self, keys_used)
+    )
+    # A process-wide key that must never be used for a session with its own key
+    genai.configure(api_key="process-default")
+
+    llm_service.get_model("session-a").generate_content("hello")
+    llm_service.get_model("session-b").generate_content("hello")
+    llm_service.get_model("session-a", system_instruction="Summarize.").generate_content("hello")
+
+    assert keys_used == ["session-a", "session-b", "session-a"]